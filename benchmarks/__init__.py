@@ -0,0 +1,4 @@
+"""
+MC Structure Cleaner
+Offline benchmarks for the cleaner pipeline
+"""
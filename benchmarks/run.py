@@ -0,0 +1,293 @@
+"""
+MC Structure Cleaner
+Benchmark runner
+
+Times the cleaner on a synthetic world, stage by stage and end to end,
+and stores the results by commit so runs can be compared:
+
+    python -m benchmarks.run --regions 4 --layout new --density 0.1
+    python -m benchmarks.run --regions 4 --layout new --compare <commit>
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from benchmarks.synthetic import LAYOUTS, MODDED_PREFIX, generate_world
+from structurecleaner.compression import DEFAULT_LEVEL
+from structurecleaner.constants import REGION_CHUNKS
+from structurecleaner.metrics import STAGES
+from structurecleaner.output_strategies import CopyOutputStrategy
+from structurecleaner.remove_tags import (
+    _get_strategies,
+    _remove_tags_region,
+    remove_tags,
+)
+from structurecleaner.removal_strategies import RemovalStrategy
+from structurecleaner.results import Metrics, RegionResult
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+# Settings a world is generated with, saved with it so it's only reused
+# by runs with the same settings
+WORLD_CONFIG = "benchmark-world.json"
+WORLD_SETTINGS = ("regions", "chunks", "layout", "density", "seed")
+
+Timings = Dict[str, float]
+
+
+def prepare_world(folder: Path, config: dict) -> List[Path]:
+    """Generate the world, or reuse the one generated in folder before
+    with the same settings
+
+    Args:
+        folder (Path): The world folder
+        config (dict): World and run settings
+
+    Returns:
+        List[Path]: The region files
+    """
+    settings = {key: config[key] for key in WORLD_SETTINGS}
+    src = folder / "region"
+    saved = folder / WORLD_CONFIG
+    paths = sorted(src.glob("*.mca"))
+    try:
+        reuse = json.loads(saved.read_text()) == settings
+    except (OSError, ValueError):
+        reuse = False
+    if reuse and len(paths) == config["regions"]:
+        return paths
+
+    for path in paths:
+        path.unlink()
+    paths = generate_world(
+        src,
+        config["regions"],
+        config["layout"],
+        config["density"],
+        config["seed"],
+        config["chunks"],
+    )
+    saved.write_text(json.dumps(settings, indent=2))
+    return paths
+
+
+def time_region(
+    paths: List[Path],
+    removal_strategy: RemovalStrategy,
+    dst: Path,
+    level: int,
+) -> Tuple[float, Metrics]:
+    """Time _remove_tags_region over every region, one after the other.
+    The time of each stage is taken from the metrics the cleaner records.
+
+    Returns:
+        Tuple[float, Metrics]: The total seconds, and the metrics of all
+            regions added up
+    """
+    metrics = Metrics()
+    start = time.perf_counter()
+    for path in paths:
+        result = RegionResult(path)
+        _remove_tags_region(
+            removal_strategy,
+            path,
+            dst,
+            CopyOutputStrategy(),
+            level,
+            result=result,
+        )
+        metrics.add(result.metrics)
+    return time.perf_counter() - start, metrics
+
+
+def time_remove_tags(
+    tags: set, src: Path, dst: Path, jobs: int, mode: str, level: int
+) -> float:
+    """Time a full remove_tags run, including the process pool"""
+    start = time.perf_counter()
+    remove_tags(tags, src, dst, jobs, mode, compression_level=level)
+    return time.perf_counter() - start
+
+
+def current_commit() -> Dict[str, object]:
+    """Get the checked out commit, and whether the tree has changes"""
+
+    def git(*args: str) -> str:
+        return subprocess.run(
+            ["git", *args],
+            capture_output=True,
+            text=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+
+    return {
+        "commit": git("rev-parse", "--short", "HEAD") or "unknown",
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+    }
+
+
+def run(config: dict, repeat: int, world: Optional[Path]) -> dict:
+    """Generate the world if needed and time every stage
+
+    Args:
+        config (dict): World and run settings
+        repeat (int): Number of runs, the fastest is kept
+        world (Path, optional): Folder the world is generated in and
+            reused from, a temporary folder is used if not given
+
+    Returns:
+        dict: The benchmark record
+    """
+    tags = {f"{MODDED_PREFIX}*"}
+    removal_strategy, _ = _get_strategies(tags, config["mode"], "copy")
+    best: Timings = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        src = (world or Path(tmp)) / "region"
+        paths = prepare_world(world or Path(tmp), config)
+
+        for attempt in range(repeat):
+            dst = Path(tmp) / f"output_{attempt}"
+            (dst / "region").mkdir(parents=True)
+            (dst / "pool").mkdir()
+
+            level = config["level"]
+            seconds, metrics = time_region(
+                paths, removal_strategy, dst / "region", level
+            )
+            timings = {stage: getattr(metrics, stage) for stage in STAGES}
+            timings["region"] = seconds
+            timings["remove_tags"] = time_remove_tags(
+                tags,
+                src,
+                dst / "pool",
+                config["jobs"],
+                config["mode"],
+                level,
+            )
+
+            for stage, seconds in timings.items():
+                best[stage] = min(best.get(stage, seconds), seconds)
+
+        size = sum(path.stat().st_size for path in paths)
+
+    return {
+        **current_commit(),
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "config": config,
+        "bytes": size,
+        "chunks": metrics.chunks,
+        "modified": metrics.modified,
+        "seconds": best,
+    }
+
+
+def save(record: dict) -> Path:
+    """Append a record to the results of its commit"""
+    RESULTS_DIR.mkdir(exist_ok=True)
+    path = RESULTS_DIR / f"{record['commit']}.json"
+    records = json.loads(path.read_text()) if path.exists() else []
+    records.append(record)
+    path.write_text(json.dumps(records, indent=2))
+    return path
+
+
+def load_baseline(commit: str, config: dict) -> Optional[dict]:
+    """Find the latest stored record of a commit with the same settings"""
+    path = RESULTS_DIR / f"{commit}.json"
+    if not path.exists():
+        return None
+    records = json.loads(path.read_text())
+    matches = [record for record in records if record["config"] == config]
+    return matches[-1] if matches else None
+
+
+def report(record: dict, baseline: Optional[dict]) -> None:
+    mb = record["bytes"] / 2**20
+    print(
+        f"{record['commit']}{' (dirty)' if record['dirty'] else ''}: "
+        f"{record['chunks']} chunks ({mb:.1f} MiB), "
+        f"{record['modified']} with matching tags"
+    )
+    header = f"{'stage':<12}{'seconds':>10}"
+    if baseline is not None:
+        header += f"{baseline['commit']:>12}{'ratio':>8}"
+    print(header)
+
+    for stage, seconds in record["seconds"].items():
+        line = f"{stage:<12}{seconds:>10.4f}"
+        if baseline is not None and stage in baseline["seconds"]:
+            before = baseline["seconds"][stage]
+            ratio = seconds / before if before else float("inf")
+            line += f"{before:>12.4f}{ratio:>8.2f}"
+        print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    parser.add_argument("--regions", type=int, default=4)
+    parser.add_argument(
+        "--chunks",
+        type=int,
+        default=REGION_CHUNKS**2,
+        help="Chunks per region",
+    )
+    parser.add_argument("--layout", choices=sorted(LAYOUTS), default="new")
+    parser.add_argument(
+        "--density",
+        type=float,
+        default=0.1,
+        help="Share of chunks with modded structures",
+    )
+    parser.add_argument("--mode", choices=["purge", "list"], default="purge")
+    parser.add_argument("--jobs", type=int, default=1)
+    parser.add_argument(
+        "--level",
+        type=int,
+        default=DEFAULT_LEVEL,
+        help="Compression level of cleaned chunks",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--world",
+        type=Path,
+        help="Generate the world here, reused by runs with the same settings",
+    )
+    parser.add_argument("--compare", help="Commit to compare against")
+    parser.add_argument(
+        "--no-save", action="store_true", help="Don't store the results"
+    )
+    args = parser.parse_args()
+
+    config = {
+        "regions": args.regions,
+        "chunks": args.chunks,
+        "layout": args.layout,
+        "density": args.density,
+        "mode": args.mode,
+        "jobs": args.jobs,
+        "level": args.level,
+        "seed": args.seed,
+    }
+    record = run(config, args.repeat, args.world)
+    baseline = None
+    if args.compare:
+        baseline = load_baseline(args.compare, config)
+        if baseline is None:
+            print(f"No results for {args.compare} with these settings")
+
+    report(record, baseline)
+    if not args.no_save:
+        print(f"Saved to {save(record)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+MC Structure Cleaner
+Synthetic world generator for benchmarks
+
+Chunks are shaped like real ones: block data sections that make up most
+of the size, plus structure Starts/References in either the old
+(Level.Structures, up to 1.17) or the new (structures, 1.18+) layout.
+Generation is seeded, the same arguments always give the same world.
+"""
+
+import random
+import time
+from nbt import nbt
+from pathlib import Path
+from typing import List
+from structurecleaner.constants import REGION_CHUNKS
+from structurecleaner.region import RegionWriter
+
+OLD_LAYOUT = "old"
+NEW_LAYOUT = "new"
+LAYOUTS = {OLD_LAYOUT: 2230, NEW_LAYOUT: 3465}  # DataVersion: 1.15.2, 1.20.1
+
+MODDED_PREFIX = "benchmark:"  # Namespace of the generated modded structures
+MODDED_STRUCTURES = [f"{MODDED_PREFIX}structure_{i}" for i in range(8)]
+VANILLA_STRUCTURES = ["mineshaft", "village", "stronghold", "fortress"]
+
+SECTIONS = 8  # Block data sections per chunk
+SECTION_LONGS = 256  # Block states per section, in longs
+
+
+def _long_array(name: str, values: List[int]) -> nbt.TAG_Long_Array:
+    tag = nbt.TAG_Long_Array(name=name)
+    tag.value = values
+    return tag
+
+
+def _block_data(rng: random.Random) -> List[int]:
+    # Few distinct values, so it compresses like real block states do
+    palette = [rng.getrandbits(63) for _ in range(16)]
+    return [rng.choice(palette) for _ in range(SECTION_LONGS)]
+
+
+def _structures(rng: random.Random, density: float) -> List[str]:
+    names = [rng.choice(VANILLA_STRUCTURES)]
+    if rng.random() < density:
+        names.extend(rng.sample(MODDED_STRUCTURES, rng.randint(1, 3)))
+    return names
+
+
+def generate_chunk(
+    rng: random.Random,
+    chunk_x: int,
+    chunk_z: int,
+    layout: str,
+    density: float,
+) -> nbt.NBTFile:
+    """Generate the NBT data of a chunk
+
+    Args:
+        rng (random.Random): Source of randomness
+        chunk_x (int): Global chunk X coordinate
+        chunk_z (int): Global chunk Z coordinate
+        layout (str): Chunk layout, old or new
+        density (float): Chance of the chunk having modded structures
+
+    Returns:
+        nbt.NBTFile: The chunk data
+    """
+    data = nbt.NBTFile()
+    data.tags.append(nbt.TAG_Int(name="DataVersion", value=LAYOUTS[layout]))
+
+    if layout == OLD_LAYOUT:
+        level = nbt.TAG_Compound(name="Level")
+        data.tags.append(level)
+        section_list_name, data_name = "Sections", "BlockStates"
+        structures = nbt.TAG_Compound(name="Structures")
+        starts = nbt.TAG_Compound(name="Starts")
+    else:
+        level = data
+        section_list_name, data_name = "sections", "data"
+        structures = nbt.TAG_Compound(name="structures")
+        starts = nbt.TAG_Compound(name="starts")
+
+    level.tags.append(nbt.TAG_Int(name="xPos", value=chunk_x))
+    level.tags.append(nbt.TAG_Int(name="zPos", value=chunk_z))
+    level.tags.append(nbt.TAG_String(name="Status", value="full"))
+
+    sections = nbt.TAG_List(name=section_list_name, type=nbt.TAG_Compound)
+    for y in range(SECTIONS):
+        section = nbt.TAG_Compound()
+        section.tags.append(nbt.TAG_Byte(name="Y", value=y))
+        section.tags.append(_long_array(data_name, _block_data(rng)))
+        sections.tags.append(section)
+    level.tags.append(sections)
+
+    references = nbt.TAG_Compound(name="References")
+    for name in _structures(rng, density):
+        reference = rng.getrandbits(31) << 32 | rng.getrandbits(32)
+        references.tags.append(_long_array(name, [reference]))
+        if rng.random() < 0.25:
+            start = nbt.TAG_Compound(name=name)
+            start.tags.append(nbt.TAG_String(name="id", value=name))
+            start.tags.append(nbt.TAG_Int(name="ChunkX", value=chunk_x))
+            start.tags.append(nbt.TAG_Int(name="ChunkZ", value=chunk_z))
+            starts.tags.append(start)
+
+    structures.tags.extend([starts, references])
+    level.tags.append(structures)
+    return data
+
+
+def generate_region(
+    path: Path,
+    layout: str,
+    density: float,
+    seed: int = 0,
+    chunks: int = REGION_CHUNKS**2,
+) -> None:
+    """Generate a region file, the region coordinates are taken from
+    its name (r.X.Z.mca)
+
+    Args:
+        path (Path): The region file to write
+        layout (str): Chunk layout, old or new
+        density (float): Chance of a chunk having modded structures
+        seed (int): Seed of the generated data
+        chunks (int): Number of chunks to fill, from the region's corner
+    """
+    _, region_x, region_z, _ = path.name.split(".")
+    rng = random.Random(f"{seed}:{path.name}")
+    region = RegionWriter()
+    timestamp = int(time.time())
+
+    for index in range(chunks):
+        chunk_x = int(region_x) * REGION_CHUNKS + index % REGION_CHUNKS
+        chunk_z = int(region_z) * REGION_CHUNKS + index // REGION_CHUNKS
+        data = generate_chunk(rng, chunk_x, chunk_z, layout, density)
+        region.add_chunk(chunk_x, chunk_z, data, timestamp)
+
+    region.save(path)
+
+
+def generate_world(
+    folder: Path,
+    regions: int,
+    layout: str,
+    density: float,
+    seed: int = 0,
+    chunks: int = REGION_CHUNKS**2,
+) -> List[Path]:
+    """Generate a region folder with regions laid out in a square
+
+    Args:
+        folder (Path): The region folder, created if needed
+        regions (int): Number of region files
+        layout (str): Chunk layout, old or new
+        density (float): Chance of a chunk having modded structures
+        seed (int): Seed of the generated data
+        chunks (int): Number of chunks in every region
+
+    Returns:
+        List[Path]: The generated region files
+    """
+    folder.mkdir(parents=True, exist_ok=True)
+    side = max(1, round(regions**0.5))
+    paths = []
+    for index in range(regions):
+        path = folder / f"r.{index % side}.{index // side}.mca"
+        generate_region(path, layout, density, seed, chunks)
+        paths.append(path)
+    return paths
@@ -14,12 +14,38 @@ Project structure:
     tests - Unit tests
 """
 
+import time
 from argparse import ArgumentParser, Namespace
 from pathlib import Path
 from multiprocessing import cpu_count
+from structurecleaner.compression import DEFAULT_LEVEL
 from structurecleaner.constants import SEP
-from structurecleaner.remove_tags import remove_tags
-from typing import Tuple
+from structurecleaner.errors import ShardError
+from structurecleaner.executors import AUTO, EXECUTORS
+from structurecleaner.metrics import summarize
+from structurecleaner.pipeline import DEFAULT_PREFETCH, NFS_PREFETCH
+from structurecleaner.selection import (
+    DEFAULT_UNIT,
+    UNITS,
+    Selection,
+    make_selection,
+)
+from structurecleaner.output_strategies import OUTPUT_STRATEGIES
+from structurecleaner.progress import ConsoleProgress, ConsoleScanProgress
+from structurecleaner.region import CHUNK_ORDERS, DEFAULT_ORDER
+from structurecleaner.results import RunResult
+from structurecleaner.remove_tags import remove_tags, remove_tags_world
+from structurecleaner.scan_tags import scan_tags, scan_tags_world, write_report
+from structurecleaner.shards import (
+    MERGED_RESULT,
+    Shard,
+    merge_shard_files,
+    parse_shard,
+    write_shard_result,
+)
+from structurecleaner.watch import watch
+from structurecleaner.world import find_dimensions
+from typing import Callable, List, NamedTuple, Optional
 
 try:
     from gooey import Gooey, GooeyParser  # type: ignore
@@ -30,6 +56,7 @@ except ImportError:
 NAME = "MC Structure Cleaner"
 VERSION = "1.7"
 DESCRIPTION = f"By: Nyveon\nVersion: {VERSION}"
+REPOSITORY = "https://github.com/Nyveon/MCStructureCleaner"
 HELP_JOBS = (
     "The number of processes to run. "
     "Going over your CPU count may "
@@ -40,6 +67,8 @@ HELP_TAG = (
     "Or you can write a list of: \n"
     "- The exact structure tag you want removed. \n"
     "- A (*) as a wildcard for a prefix (see github) \n"
+    "- A glob pattern like mod:*_tower or mod:ruin_? \n"
+    "- A regular expression starting with re: \n"
     "Separate tags by spaces. Use \"\" if the names have space characters. "
 )
 HELP_PATH = "The path of the world you wish to process"
@@ -48,24 +77,125 @@ HELP_REGION = (
     "The name of the region folder (dimension) "
     " | Overworld: (blank) | Nether: DIM-1 | End: DIM1"
 )
+HELP_OUTPUT_MODE = (
+    "How region files are written | copy: write every region to the "
+    "output folder | changed: only write regions that had tags removed "
+    "| link: hard-link unchanged regions from the world "
+    "| inplace: atomically replace changed regions in the world itself"
+)
+HELP_SPLIT = (
+    "Spread the chunks of every region over all processes. "
+    "Faster when there are only a few, large region files"
+)
+HELP_ALL_DIMENSIONS = (
+    "Clean every dimension of the world in one run, including datapack "
+    "and modded dimensions. The region option is ignored and the new "
+    "region folders are saved in a new_world folder"
+)
+HELP_INDEX = (
+    "Keep an index of scanned regions in the output folder (next to the "
+    "region folder with -m inplace). Later runs with the same output "
+    "folder skip regions that haven't changed and have nothing to remove"
+)
+HELP_SCAN = (
+    "Don't clean anything, only count the structure tags in the world "
+    "and save the report to this file (.json or .csv)"
+)
+HELP_ENTITIES = (
+    "Also clean the entities and poi folders (1.17+). Entities and points "
+    "of interest are removed if their id matches the entity tags"
+)
+HELP_ENTITY_TAG = (
+    "Entity ids and point of interest types to remove with --entities, "
+    "with the same patterns as the tags. Structure tags and purge mode "
+    "never remove entities"
+)
+HELP_COMPRESSION_LEVEL = (
+    "Compression level of the cleaned chunks, from 1 (fastest) to 9 "
+    "(smallest). Unchanged chunks are copied as they are"
+)
+HELP_EXECUTOR = (
+    "How jobs are run: process (one process per job, best for big "
+    "worlds), thread (starts instantly, best for small worlds) or inline "
+    "(one region at a time). auto picks from the jobs and world size"
+)
+HELP_PREFETCH = (
+    "Number of regions read ahead while others are cleaned and written, "
+    f"keeps the disk busy on network storage (try {NFS_PREFETCH}). Holds "
+    "whole regions in memory. 0 to read and write every region in its "
+    "worker"
+)
+HELP_BOX = (
+    "Only clean the area between two corners, X1 Z1 X2 Z2. Chunks outside "
+    "it are copied unchanged"
+)
+HELP_RADIUS = (
+    "Only clean the area within a radius of a center, X Z R. Chunks "
+    "outside it are copied unchanged"
+)
+HELP_UNIT = "Unit of the --box and --radius coordinates"
+HELP_INCREMENTAL = (
+    "Only clean the chunks saved since the last run, from the chunk "
+    "timestamps. Keeps an index in the output folder, like --index"
+)
+HELP_WATCH = (
+    "Keep cleaning the chunks saved since the last pass every this many "
+    "seconds, until stopped with Ctrl+C. For live copies of a world"
+)
+HELP_RESUME = (
+    "Continue an interrupted run into the same output folder, skipping "
+    "the regions it finished"
+)
+HELP_COMPACT = (
+    "Also rewrite regions without tags to remove when they are smaller "
+    "written again, packing chunks fragmented by years of saves"
+)
+HELP_CHUNK_ORDER = (
+    "Order chunks are laid out in written regions: zx (row by row) or "
+    "morton (Z-order curve, keeps neighboring chunks close together)"
+)
+HELP_SHARD = (
+    "Only clean part I of N of the world, for splitting a run over N "
+    "machines sharing the world and output folder. Saves the part's "
+    "results to the output folder"
+)
+HELP_MERGE = (
+    "Don't clean anything, only merge the results saved by the shards "
+    "of a run into shards.json in the output folder"
+)
+HELP_VERBOSE = (
+    "Print every processed region, with the tags removed from it (or the "
+    "structure starts and references found, with --scan), and the "
+    "workers used, instead of a single progress line"
+)
+HELP_METRICS = (
+    "Save the bytes read, chunks scanned and modified, time per stage "
+    "and peak memory of every region to this file (JSON lines)"
+)
 
 # Configuration
 DEFAULT_PATH = "world"
 DEFAULT_OUTPUT = "./"
+DEFAULT_OUTPUT_MODE = "copy"
 
 
 # Environment
-def setup_environment(new_region: Path) -> bool:
+def setup_environment(new_region: Path, shared: bool = False) -> bool:
     """Try to create new_region folder
     This is the folder where the new region files will be saved
 
     Args:
         new_region (Path): Path to new region folder
+        shared (bool): The folder may already exist, from an interrupted
+            run or from other shards of the run
 
     Returns:
         bool: True if successful, False otherwise
     """
     if new_region.exists():
+        if shared:
+            print(f"Saving region files to {new_region.resolve()}")
+            return True
         if Gooey:
             raise FileExistsError(
                 f"{new_region} already exists, please delete"
@@ -77,7 +207,7 @@ def setup_environment(new_region: Path) -> bool:
             print(SEP)
             return proceed.startswith("y")
 
-    new_region.mkdir()
+    new_region.mkdir(exist_ok=shared)
     print(f"Saving newly generated region files to {new_region.resolve()}")
 
     return True
@@ -87,9 +217,9 @@ def get_default_jobs() -> int:
     """Get default number of jobs
 
     Returns:
-        int: The number of CPU cores in the device
+        int: Half the number of CPU cores in the device, at least 1
     """
-    return cpu_count() // 2
+    return max(cpu_count() // 2, 1)
 
 
 def get_cli_args() -> Namespace:
@@ -118,6 +248,93 @@ def get_cli_args() -> Namespace:
     parser.add_argument(
         "-r", "--region", type=str, help=HELP_REGION, default=""
     )
+    parser.add_argument(
+        "-m",
+        "--output-mode",
+        type=str,
+        help=f"{HELP_OUTPUT_MODE} (default: '{DEFAULT_OUTPUT_MODE}')",
+        default=DEFAULT_OUTPUT_MODE,
+        choices=list(OUTPUT_STRATEGIES),
+    )
+    parser.add_argument("-s", "--split", action="store_true", help=HELP_SPLIT)
+    parser.add_argument(
+        "-a", "--all-dimensions", action="store_true", help=HELP_ALL_DIMENSIONS
+    )
+    parser.add_argument("-i", "--index", action="store_true", help=HELP_INDEX)
+    parser.add_argument(
+        "--incremental", action="store_true", help=HELP_INCREMENTAL
+    )
+    parser.add_argument("--watch", type=float, help=HELP_WATCH, default=0)
+    parser.add_argument("--resume", action="store_true", help=HELP_RESUME)
+    parser.add_argument(
+        "-e", "--entities", action="store_true", help=HELP_ENTITIES
+    )
+    parser.add_argument(
+        "--entity-tag", type=str, nargs="+", help=HELP_ENTITY_TAG
+    )
+    parser.add_argument("--scan", type=str, help=HELP_SCAN, default="")
+    parser.add_argument("--metrics", type=str, help=HELP_METRICS, default="")
+    parser.add_argument(
+        "-l",
+        "--compression-level",
+        type=int,
+        help=f"{HELP_COMPRESSION_LEVEL} (default: {DEFAULT_LEVEL})",
+        default=DEFAULT_LEVEL,
+        choices=range(1, 10),
+    )
+    parser.add_argument(
+        "-x",
+        "--executor",
+        type=str,
+        help=f"{HELP_EXECUTOR} (default: '{AUTO}')",
+        default=AUTO,
+        choices=EXECUTORS,
+    )
+    parser.add_argument(
+        "--prefetch",
+        type=int,
+        help=f"{HELP_PREFETCH} (default: {DEFAULT_PREFETCH})",
+        default=DEFAULT_PREFETCH,
+    )
+    area = parser.add_mutually_exclusive_group()
+    area.add_argument(
+        "--box",
+        type=int,
+        nargs=4,
+        metavar=("X1", "Z1", "X2", "Z2"),
+        help=HELP_BOX,
+    )
+    area.add_argument(
+        "--radius",
+        type=int,
+        nargs=3,
+        metavar=("X", "Z", "R"),
+        help=HELP_RADIUS,
+    )
+    parser.add_argument(
+        "--unit",
+        type=str,
+        help=f"{HELP_UNIT} (default: '{DEFAULT_UNIT}')",
+        default=DEFAULT_UNIT,
+        choices=list(UNITS),
+    )
+    parser.add_argument("--compact", action="store_true", help=HELP_COMPACT)
+    parser.add_argument(
+        "--chunk-order",
+        type=str,
+        help=f"{HELP_CHUNK_ORDER} (default: '{DEFAULT_ORDER}')",
+        default=DEFAULT_ORDER,
+        choices=list(CHUNK_ORDERS),
+    )
+    parser.add_argument(
+        "--shard", type=parse_shard, metavar="I/N", help=HELP_SHARD
+    )
+    parser.add_argument(
+        "--merge", type=str, nargs="+", metavar="RESULT", help=HELP_MERGE
+    )
+    parser.add_argument(
+        "-v", "--verbose", action="store_true", help=HELP_VERBOSE
+    )
 
     return parser.parse_args()
 
@@ -131,6 +348,8 @@ if Gooey:
         header_bg_color="#6dd684",
         default_size=(610, 610),
         image_dir="./images",
+        progress_regex=r"^\[(?P<current>\d+)/(?P<total>\d+)\]",
+        progress_expr="current / total * 100",
         menu=[
             {
                 "name": "About",
@@ -141,7 +360,7 @@ if Gooey:
                         "name": NAME,
                         "description": DESCRIPTION,
                         "version": VERSION,
-                        "website": "https://github.com/Nyveon/MCStructureCleaner",
+                        "website": REPOSITORY,
                     }
                 ],
             },
@@ -151,12 +370,12 @@ if Gooey:
                     {
                         "type": "Link",
                         "menuTitle": "Information",
-                        "url": "https://github.com/Nyveon/MCStructureCleaner",
+                        "url": REPOSITORY,
                     },
                     {
                         "type": "Link",
                         "menuTitle": "Report an issue",
-                        "url": "https://github.com/Nyveon/MCStructureCleaner/issues",
+                        "url": f"{REPOSITORY}/issues",
                     },
                 ],
             },
@@ -202,36 +421,361 @@ if Gooey:
         parser.add_argument(
             "-r", "--region", type=str, help=HELP_REGION, default=""
         )
+        parser.add_argument(
+            "-m",
+            "--output-mode",
+            type=str,
+            help=HELP_OUTPUT_MODE,
+            default=DEFAULT_OUTPUT_MODE,
+            choices=list(OUTPUT_STRATEGIES),
+            widget="Dropdown",
+        )
+        parser.add_argument(
+            "-s", "--split", action="store_true", help=HELP_SPLIT
+        )
+        parser.add_argument(
+            "-a",
+            "--all-dimensions",
+            action="store_true",
+            help=HELP_ALL_DIMENSIONS,
+        )
+        parser.add_argument(
+            "-i", "--index", action="store_true", help=HELP_INDEX
+        )
+        parser.add_argument(
+            "--incremental", action="store_true", help=HELP_INCREMENTAL
+        )
+        parser.add_argument(
+            "--watch",
+            type=float,
+            help=HELP_WATCH,
+            default=0,
+            widget="DecimalField",
+        )
+        parser.add_argument(
+            "--resume", action="store_true", help=HELP_RESUME
+        )
+        parser.add_argument(
+            "-e", "--entities", action="store_true", help=HELP_ENTITIES
+        )
+        parser.add_argument(
+            "--entity-tag", type=str, nargs="*", help=HELP_ENTITY_TAG
+        )
+        parser.add_argument(
+            "--scan",
+            type=str,
+            help=HELP_SCAN,
+            default="",
+            widget="FileSaver",
+        )
+        parser.add_argument(
+            "--metrics",
+            type=str,
+            help=HELP_METRICS,
+            default="",
+            widget="FileSaver",
+        )
+        parser.add_argument(
+            "-l",
+            "--compression-level",
+            type=int,
+            help=HELP_COMPRESSION_LEVEL,
+            default=DEFAULT_LEVEL,
+            widget="IntegerField",
+            gooey_options={"min": 1, "max": 9},
+        )
+        parser.add_argument(
+            "-x",
+            "--executor",
+            type=str,
+            help=HELP_EXECUTOR,
+            default=AUTO,
+            choices=EXECUTORS,
+            widget="Dropdown",
+        )
+        parser.add_argument(
+            "--prefetch",
+            type=int,
+            help=HELP_PREFETCH,
+            default=DEFAULT_PREFETCH,
+            widget="IntegerField",
+            gooey_options={"min": 0, "max": 64},
+        )
+        area = parser.add_mutually_exclusive_group()
+        area.add_argument("--box", type=int, nargs=4, help=HELP_BOX)
+        area.add_argument("--radius", type=int, nargs=3, help=HELP_RADIUS)
+        parser.add_argument(
+            "--unit",
+            type=str,
+            help=HELP_UNIT,
+            default=DEFAULT_UNIT,
+            choices=list(UNITS),
+            widget="Dropdown",
+        )
+        parser.add_argument(
+            "--compact", action="store_true", help=HELP_COMPACT
+        )
+        parser.add_argument(
+            "--chunk-order",
+            type=str,
+            help=HELP_CHUNK_ORDER,
+            default=DEFAULT_ORDER,
+            choices=list(CHUNK_ORDERS),
+            widget="Dropdown",
+        )
+        parser.add_argument("--shard", type=parse_shard, help=HELP_SHARD)
+        parser.add_argument(
+            "--merge",
+            type=str,
+            nargs="*",
+            help=HELP_MERGE,
+            widget="MultiFileChooser",
+        )
+        parser.add_argument(
+            "-v", "--verbose", action="store_true", help=HELP_VERBOSE
+        )
 
         return parser.parse_args()
 
 
-def process_args(args: Namespace) -> Tuple[set, Path, Path, int]:
+class Options(NamedTuple):
+    """Processed CLI or GUI arguments"""
+
+    to_replace: set  # A set of tags (strings)
+    new_region: Path  # The output path
+    world_region: Path  # The input path (the whole world for all dims)
+    jobs: int
+    output_mode: str
+    split: bool  # Whether to split regions between processes
+    all_dimensions: bool  # Whether to process all dimensions
+    index: bool  # Whether to keep an index of scanned regions
+    scan: Optional[Path]  # Where to save a tag report, instead of cleaning
+    metrics: Optional[Path]  # Where to save per-region metrics
+    verbose: bool  # Whether to print every region instead of progress
+    entities: bool  # Whether to clean the entities and poi folders too
+    entity_tags: set  # Entity ids and POI types to remove from them
+    compression_level: int  # Compression level of cleaned chunks
+    executor: str  # Worker pool (auto, process, thread, inline)
+    prefetch: int  # Regions read ahead of the workers
+    selection: Optional[Selection]  # Area to clean, None for everything
+    incremental: bool  # Whether to only clean chunks saved since last run
+    watch: float  # Seconds between incremental passes, 0 to run once
+    resume: bool  # Whether to continue an interrupted run
+    compact: bool  # Whether to rewrite unchanged regions that would shrink
+    chunk_order: str  # Order chunks are laid out in (zx, morton)
+    shard: Optional[Shard]  # Part of the run to clean, None for all of it
+    merge: List[Path]  # Shard results to merge, instead of cleaning
+    results: Path  # Where shard results and merged results are saved
+
+
+def process_args(args: Namespace) -> Options:
     """Process CLI or GUI Arguments
 
     Args:
         args (Namespace): Parsed CLI or GUI arguments
 
     Returns:
-        Tuple[set, Path, Path, int]: Processed arguments:
-            1. A set of tags (strings)
-            2. The output path
-            3. The input path
-            4. The job
+        Options: Processed arguments
     """
-    return (
+    if args.all_dimensions:
+        world_region = Path(args.path)
+    else:
+        world_region = Path(f"{args.path}/{args.region}/region")
+
+    if args.output_mode == "inplace":
+        new_region = world_region
+    elif args.all_dimensions:
+        new_region = Path(f"{args.output}/new_world")
+    else:
+        new_region = Path(f"{args.output}/new_region{args.region}")
+
+    return Options(
         set(args.tag),
-        Path(f"{args.output}/new_region{args.region}"),
-        Path(f"{args.path}/{args.region}/region"),
+        new_region,
+        world_region,
         args.jobs,
+        args.output_mode,
+        args.split,
+        args.all_dimensions,
+        args.index,
+        Path(args.scan) if args.scan else None,
+        Path(args.metrics) if args.metrics else None,
+        args.verbose,
+        args.entities,
+        set(args.entity_tag or ()),
+        args.compression_level,
+        args.executor,
+        args.prefetch,
+        make_selection(args.box, args.radius, args.unit),
+        args.incremental or args.watch > 0,
+        args.watch,
+        args.resume,
+        args.compact,
+        args.chunk_order,
+        args.shard,
+        [Path(path) for path in args.merge or []],
+        Path(args.output),
+    )
+
+
+def scan(options: Options) -> None:
+    """Write a report of the structure tags in the world, without cleaning
+
+    Args:
+        options (Options): Processed arguments
+    """
+    print(f"Scanning structure tags in {options.world_region}.")
+    print(SEP)
+
+    if options.all_dimensions:
+        scan_folders = scan_tags_world
+    else:
+        scan_folders = scan_tags
+    start = time.perf_counter()
+    report = scan_folders(
+        options.world_region,
+        options.jobs,
+        ConsoleScanProgress(options.verbose),
+        options.executor,
+    )
+    end = time.perf_counter()
+
+    print(SEP)
+    print(f"Found {len(report)} structure tags:")
+    for name, entry in report.items():
+        modded = " (non-vanilla)" if entry["modded"] else ""
+        print(
+            f"{name}{modded}: {entry['starts']} starts, "
+            f"{entry['references']} references "
+            f"in {len(entry['regions'])} regions"
+        )
+    print(f"Took {end - start:.3f} seconds")
+
+    write_report(report, options.scan)
+    print(f"{SEP}\nSaved report to {options.scan.resolve()}")
+
+
+def merge(options: Options) -> None:
+    """Merge the results of the shards of a run, without cleaning
+
+    Args:
+        options (Options): Processed arguments
+    """
+    path = options.results / MERGED_RESULT
+    try:
+        merged = merge_shard_files(options.merge, path)
+    except ShardError as error:
+        raise SystemExit(str(error))
+
+    print(f"Merged the results of {len(options.merge)} shards")
+    if merged["missing"]:
+        count = merged["shards"]
+        missing = ", ".join(f"{i}/{count}" for i in merged["missing"])
+        print(f"Missing shards: {missing}")
+    print(SEP)
+    print(
+        f"Removed {merged['count']} instances of tags from {merged['total']} "
+        f"files in {merged['seconds']:.3f} seconds"
     )
+    if merged["reclaimed"] > 0:
+        reclaimed = merged["reclaimed"]
+        print(
+            f"Written regions are {reclaimed / 2**20:.1f} MiB "
+            f"({reclaimed} bytes) smaller than their sources"
+        )
+    for shard, seconds in merged["shard_seconds"].items():
+        print(f"Shard {shard} took {seconds:.3f} seconds")
+    if merged["tags"]:
+        print(f"Removed tags: {sorted(merged['tags'])}")
+    for error in merged["errors"].values():
+        print(error)
+    print(f"{SEP}\nSaved merged results to {path.resolve()}")
+
+
+def print_summary(result: RunResult, mode: str, to_replace: set) -> None:
+    """Print what a run did
+
+    Args:
+        result (RunResult): The result of the run
+        mode (str): Purge or normal mode
+        to_replace (set): The tags given for normal mode
+    """
+    print(SEP)
+    print("Done!")
+    if mode == "purge":
+        print(f"Removed {result.count} instances of non-vanilla tags")
+    else:
+        print(f"Removed {result.count} instances of tags: {to_replace}")
+    if result.removed_tags:
+        print(f"Removed tags: {sorted(result.removed_tags)}")
+    if result.reclaimed > 0:
+        print(
+            f"Written regions are {result.reclaimed / 2**20:.1f} MiB "
+            f"({result.reclaimed} bytes) smaller than their sources"
+        )
+    print(f"Took {result.seconds:.3f} seconds")
+    for line in summarize(result.regions, result.seconds):
+        print(line)
+
+
+def print_pass(result: RunResult) -> None:
+    """Print what a watch pass cleaned, if anything"""
+    cleaned = len(result.regions) - len(result.skipped)
+    if cleaned or result.skipped:
+        print(
+            f"{time.strftime('%H:%M:%S')} Cleaned {cleaned} changed regions, "
+            f"removed {result.count} tags in {result.seconds:.3f} seconds"
+        )
+    for error in result.errors.values():
+        print(error)
+
+
+def watch_world(
+    run: Callable[[Optional[ConsoleProgress]], RunResult], options: Options
+) -> None:
+    """Clean newly saved chunks until interrupted
+
+    Args:
+        run (Callable): Runs one incremental pass with a progress callback
+        options (Options): Processed arguments
+    """
+    print(
+        f"Watching {options.world_region} every {options.watch:g} seconds, "
+        "press Ctrl+C to stop"
+    )
+    progress = ConsoleProgress(True) if options.verbose else None
+    try:
+        watch(lambda: run(progress), options.watch, on_pass=print_pass)
+    except KeyboardInterrupt:
+        print(f"{SEP}\nStopped watching")
 
 
 def main() -> None:
     """The main program"""
     # CLI or GUI arguments
     args = get_gui_args() if Gooey else get_cli_args()
-    to_replace, new_region, world_region, num_processes = process_args(args)
+    options = process_args(args)
+    to_replace = options.to_replace
+    new_region = options.new_region
+    world_region = options.world_region
+    output_mode = options.output_mode
+
+    if options.merge:
+        merge(options)
+        return None
+
+    # Check if world exists
+    if not world_region.exists():
+        raise FileNotFoundError(f"Couldn't find {world_region.resolve()}")
+
+    if options.scan:
+        scan(options)
+        return None
+
+    if options.entities and not options.entity_tags:
+        raise SystemExit(
+            "--entities needs the entities to remove, given with --entity-tag"
+        )
 
     # Force purge mode if no tag is given, otherwise normal.
     mode = "purge" if not to_replace else "normal"
@@ -247,20 +791,67 @@ def main() -> None:
 
     print(SEP)
 
-    # Check if world exists
-    if not world_region.exists():
-        raise FileNotFoundError(f"Couldn't find {world_region.resolve()}")
-
-    # Check if output already exists
-    if not setup_environment(new_region):
+    # Check if output already exists, indexed runs reuse the last output
+    reuse_output = output_mode == "inplace" or (
+        (options.index or options.incremental) and new_region.exists()
+    )
+    shared = options.resume or options.shard is not None
+    if not reuse_output and not setup_environment(new_region, shared):
         raise SystemExit("Aborted, nothing was done")
 
-    n_to_process = len(list(world_region.iterdir()))
-    remove_tags(to_replace, world_region, new_region, num_processes, mode)
+    if options.all_dimensions:
+        dimensions = find_dimensions(world_region)
+        print(f"Found dimensions: {', '.join(map(str, dimensions))}")
+        clean = remove_tags_world
+    else:
+        clean = remove_tags
+
+    def run(progress: Optional[ConsoleProgress]) -> RunResult:
+        return clean(
+            to_replace,
+            world_region,
+            new_region,
+            options.jobs,
+            mode,
+            output_mode,
+            options.split,
+            options.index,
+            options.metrics,
+            progress,
+            options.entities,
+            options.compression_level,
+            options.executor,
+            options.prefetch,
+            options.selection,
+            options.incremental,
+            options.resume,
+            options.shard,
+            options.compact,
+            options.chunk_order,
+            options.entity_tags,
+        )
+
+    if options.watch > 0:
+        watch_world(run, options)
+        return None
+
+    result = run(ConsoleProgress(options.verbose))
 
     # End output
-    print(f"{SEP}\nProcessed {n_to_process} files")
-    print(f"You can now replace {world_region} with {new_region}")
+    print_summary(result, mode, to_replace)
+    print(f"{SEP}\nProcessed {result.total} files")
+    if options.shard is not None:
+        path = options.results / options.shard.result_name
+        write_shard_result(result, options.shard, path)
+        print(f"Saved the results of shard {options.shard} to {path}")
+        print("Merge the results of all shards with --merge once they finish")
+        return None
+    if output_mode == "inplace":
+        print(f"Changed region files were replaced in {world_region}")
+    elif output_mode == "copy" and not options.all_dimensions:
+        print(f"You can now replace {world_region} with {new_region}")
+    else:
+        print(f"You can now copy {new_region} into {world_region}")
     return None
 
 
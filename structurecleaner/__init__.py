@@ -0,0 +1,62 @@
+"""
+MC Structure Cleaner
+Library API
+
+Runs don't print anything: they return a RunResult with the result of
+every region, and report progress to an optional callback. Scans return
+their report the same way.
+"""
+
+from structurecleaner.errors import Error
+from structurecleaner.progress import (
+    ConsoleProgress,
+    ConsoleScanProgress,
+    ProgressCallback,
+    ScanProgressCallback,
+)
+from structurecleaner.remove_tags import remove_tags, remove_tags_world
+from structurecleaner.results import (
+    Metrics,
+    RegionResult,
+    RunResult,
+    ScanResult,
+    ScanRun,
+)
+from structurecleaner.scan_tags import scan_tags, scan_tags_world
+from structurecleaner.selection import (
+    BoxSelection,
+    RadiusSelection,
+    Selection,
+    make_selection,
+)
+from structurecleaner.shards import (
+    Shard,
+    merge_shard_results,
+    parse_shard,
+    shard_result,
+)
+
+__all__ = [
+    "BoxSelection",
+    "ConsoleProgress",
+    "ConsoleScanProgress",
+    "Error",
+    "Metrics",
+    "ProgressCallback",
+    "RadiusSelection",
+    "RegionResult",
+    "RunResult",
+    "ScanProgressCallback",
+    "ScanResult",
+    "ScanRun",
+    "Selection",
+    "Shard",
+    "make_selection",
+    "merge_shard_results",
+    "parse_shard",
+    "remove_tags",
+    "remove_tags_world",
+    "scan_tags",
+    "scan_tags_world",
+    "shard_result",
+]
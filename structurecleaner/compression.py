@@ -0,0 +1,143 @@
+"""
+MC Structure Cleaner
+Chunk compression types
+
+Region files store each chunk compressed with its own type: gzip, zlib,
+uncompressed (1.15.1+) or LZ4 (1.20.5+). zlib and LZ4 release the GIL
+while they work, so chunks can be (de)compressed in threads in parallel.
+"""
+
+import struct
+import zlib
+from structurecleaner.errors import (
+    CorruptChunkError,
+    UnsupportedCompressionError,
+)
+
+try:
+    import lz4.block  # type: ignore
+except ImportError:
+    lz4 = None
+
+GZIP = 1
+ZLIB = 2
+UNCOMPRESSED = 3
+LZ4 = 4
+
+# Set on the compression type when the chunk is stored in a .mcc file
+EXTERNAL_FLAG = 0x80
+
+DEFAULT_LEVEL = 6  # zlib's default compression level
+
+# LZ4 chunks are written by lz4-java's LZ4BlockOutputStream: a series of
+# blocks, each with a header, ending with an empty block
+LZ4_MAGIC = b"LZ4Block"
+LZ4_HEADER = struct.Struct("<8sBiii")  # Magic, method, lengths, checksum
+LZ4_RAW = 0x10
+LZ4_COMPRESSED = 0x20
+
+# Compression types cleaned chunks can be written back with.
+# LZ4 checksums need xxHash, so those chunks are written back as zlib,
+# which Minecraft reads no matter which type the server writes.
+WRITABLE = {GZIP, ZLIB, UNCOMPRESSED}
+
+
+def _decompress_lz4(payload: bytes) -> bytes:
+    """Decompress an lz4-java block stream"""
+    blocks = []
+    pos = 0
+    while pos < len(payload):
+        magic, token, length, original, _ = LZ4_HEADER.unpack_from(
+            payload, pos
+        )
+        if magic != LZ4_MAGIC:
+            raise UnsupportedCompressionError("Invalid LZ4 block stream")
+        pos += LZ4_HEADER.size
+        if original == 0:
+            break
+
+        end = pos + length
+        block = payload[pos:end]
+        pos = end
+        method = token & 0xF0
+        if method == LZ4_RAW:
+            blocks.append(block)
+        elif lz4 is None:
+            raise UnsupportedCompressionError(
+                "LZ4 compressed chunks need the lz4 package"
+            )
+        else:
+            try:
+                blocks.append(lz4.block.decompress(block, original))
+            except lz4.block.LZ4BlockError as error:
+                raise CorruptChunkError(f"Invalid LZ4 block: {error}")
+
+    return b"".join(blocks)
+
+
+def decompress(compression: int, payload: bytes) -> bytes:
+    """Decompress a chunk payload
+
+    Args:
+        compression (int): The chunk's compression type
+        payload (bytes): The compressed chunk data
+
+    Raises:
+        UnsupportedCompressionError: If the type is unknown, or it's LZ4
+            and the lz4 package isn't installed
+        CorruptChunkError: If the payload is truncated or damaged
+
+    Returns:
+        bytes: The uncompressed NBT data
+    """
+    try:
+        return _decompress(compression, payload)
+    except (zlib.error, struct.error) as error:
+        raise CorruptChunkError(f"Invalid chunk payload: {error}")
+
+
+def _decompress(compression: int, payload: bytes) -> bytes:
+    """Decompress a chunk payload, see decompress"""
+    if compression == ZLIB:
+        return zlib.decompress(payload)
+    if compression == GZIP:
+        return zlib.decompress(payload, wbits=zlib.MAX_WBITS | 16)
+    if compression == UNCOMPRESSED:
+        return bytes(payload)
+    if compression == LZ4:
+        return _decompress_lz4(payload)
+    raise UnsupportedCompressionError(f"Compression type {compression}")
+
+
+def compress(
+    compression: int, data: bytes, level: int = DEFAULT_LEVEL
+) -> bytes:
+    """Compress a chunk payload
+
+    Args:
+        compression (int): The compression type, one of WRITABLE
+        data (bytes): The uncompressed NBT data
+        level (int): zlib/gzip compression level, 1 (fast) to 9 (small)
+
+    Raises:
+        UnsupportedCompressionError: If the type can't be written
+
+    Returns:
+        bytes: The compressed chunk data
+    """
+    if compression == ZLIB:
+        return zlib.compress(data, level)
+    if compression == GZIP:
+        compressor = zlib.compressobj(level, wbits=zlib.MAX_WBITS | 16)
+        return compressor.compress(data) + compressor.flush()
+    if compression == UNCOMPRESSED:
+        return data
+    raise UnsupportedCompressionError(
+        f"Can't write compression type {compression}"
+    )
+
+
+def output_compression(compression: int) -> int:
+    """Get the type a cleaned chunk is written with, the same as the
+    original chunk when possible"""
+    return compression if compression in WRITABLE else ZLIB
@@ -3,7 +3,8 @@ MC Structure Cleaner
 Constants
 """
 
-NEW_DATA_VERSION = 2730  # 1.17.1 vs 1.18
+SECTOR_SIZE = 4096  # Region files are allocated in 4KiB sectors
+REGION_CHUNKS = 32  # Chunks per region along each axis
 
 SEP = "-" * 32
 
@@ -49,3 +50,12 @@ VANILLA_STRUCTURES = {
 }
 
 DIMENSIONS = {"region", "DIM1/region", "DIM-1/region"}
+
+# Datapack and modded dimensions: dimensions/<namespace>/<name>/region
+CUSTOM_DIMENSIONS = "dimensions/*/*/region"
+
+# Chunk data stored in region files next to the region folder (1.17+)
+REGION_FOLDER = "region"
+ENTITIES_FOLDER = "entities"
+POI_FOLDER = "poi"
+CHUNK_FOLDERS = (ENTITIES_FOLDER, POI_FOLDER)
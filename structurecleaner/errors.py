@@ -26,3 +26,21 @@ class EmptyFileError(Error):
     """Raised when a 0byte file is being processed"""
 
     pass
+
+
+class UnsupportedCompressionError(Error):
+    """Raised when a chunk uses a compression type that can't be read"""
+
+    pass
+
+
+class CorruptChunkError(Error):
+    """Raised when a chunk's data is truncated or can't be decompressed"""
+
+    pass
+
+
+class ShardError(Error):
+    """Raised when the results of shards don't belong to the same run"""
+
+    pass
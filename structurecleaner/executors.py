@@ -0,0 +1,93 @@
+"""
+MC Structure Cleaner
+Worker pools the regions are processed with
+
+- process: A process per job, scales with the number of cores but takes
+  a while to start, especially where processes are spawned (Windows,
+  macOS)
+- thread: A thread per job, starts instantly. Decompression, compression
+  and file access release the GIL, but NBT scanning doesn't.
+- inline: Everything in the calling process, one region at a time
+- auto: Picks one of the above from the number of jobs and world size
+"""
+
+from multiprocessing.pool import Pool, ThreadPool
+from typing import Callable, Iterable, Iterator, Optional, Tuple, Union
+
+PROCESS = "process"
+THREAD = "thread"
+INLINE = "inline"
+AUTO = "auto"
+EXECUTORS = (AUTO, PROCESS, THREAD, INLINE)
+
+# Below this much region data, starting processes costs more than it saves
+SMALL_WORLD_BYTES = 64 * 2**20
+
+
+class InlinePool:
+    """Runs tasks in the calling process, with the same interface as Pool"""
+
+    def __init__(
+        self,
+        initializer: Optional[Callable] = None,
+        initargs: Tuple = (),
+    ):
+        if initializer is not None:
+            initializer(*initargs)
+
+    def imap_unordered(self, func: Callable, iterable: Iterable) -> Iterator:
+        return map(func, iterable)
+
+    def __enter__(self) -> "InlinePool":
+        return self
+
+    def __exit__(self, *_) -> None:
+        pass
+
+
+WorkerPool = Union[Pool, ThreadPool, InlinePool]
+
+
+def choose_executor(executor: str, jobs: int, total_bytes: int) -> str:
+    """Pick the executor for a run
+
+    Args:
+        executor (str): The requested executor, or auto
+        jobs (int): Number of jobs
+        total_bytes (int): Size of the regions to process
+
+    Returns:
+        str: process, thread or inline
+    """
+    if executor != AUTO:
+        return executor
+    if jobs <= 1:
+        return INLINE
+    if total_bytes < SMALL_WORLD_BYTES:
+        return THREAD
+    return PROCESS
+
+
+def make_pool(
+    executor: str,
+    jobs: int,
+    initializer: Optional[Callable] = None,
+    initargs: Tuple = (),
+) -> WorkerPool:
+    """Start a worker pool
+
+    Args:
+        executor (str): process, thread or inline
+        jobs (int): Number of workers, at least one is started
+        initializer (Callable, optional): Called once in every worker with
+            initargs, so per-run state isn't sent with every task
+
+    Returns:
+        WorkerPool: The pool, to be used as a context manager
+    """
+    jobs = max(jobs, 1)
+    if executor == PROCESS:
+        return Pool(jobs, initializer, initargs)
+    if executor == THREAD:
+        return ThreadPool(jobs, initializer, initargs)
+    return InlinePool(initializer, initargs)
@@ -0,0 +1,76 @@
+"""
+MC Structure Cleaner
+Crash-safe file writes
+
+Every output file is written to a temporary file next to it, which is
+renamed over the target once it is complete. A crashed or interrupted
+run never leaves a partially written file behind. Replaced files keep
+their permissions, new files get the usual ones for the umask.
+"""
+
+import os
+import shutil
+import secrets
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO, Iterator, Tuple
+
+# Binary mode only matters on Windows
+OPEN_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0)
+
+
+def _create_temp(path: Path) -> Tuple[int, Path]:
+    """Create a new temporary file next to path. Unlike tempfile.mkstemp,
+    it is created with the umask's permissions rather than owner only.
+
+    Args:
+        path (Path): The file the temporary file will replace
+
+    Returns:
+        Tuple[int, Path]: File descriptor and path of the temporary file
+    """
+    while True:
+        tmp = path.with_name(f".{path.name}.{secrets.token_hex(4)}")
+        try:
+            return os.open(tmp, OPEN_FLAGS, 0o666), tmp
+        except FileExistsError:
+            continue
+
+
+@contextmanager
+def atomic_file(path: Path) -> Iterator[BinaryIO]:
+    """Open a temporary file next to path, which is renamed over path once
+    it has been written. Readers never see a partially written file.
+
+    Args:
+        path (Path): The file to (re)place
+
+    Yields:
+        BinaryIO: The temporary file to write to
+    """
+    fd, tmp = _create_temp(path)
+    try:
+        with os.fdopen(fd, "wb") as file:
+            yield file
+            file.flush()
+            os.fsync(file.fileno())
+        if path.exists():
+            shutil.copymode(path, tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def write_atomic(path: Path, data: bytes) -> None:
+    """Atomically replace the contents of path with data"""
+    with atomic_file(path) as file:
+        file.write(data)
+
+
+def copy_atomic(src: Path, dst: Path) -> None:
+    """Atomically replace dst with a copy of src, keeping its metadata"""
+    with atomic_file(dst) as file:
+        with open(src, "rb") as source:
+            shutil.copyfileobj(source, file)
+    shutil.copystat(src, dst)
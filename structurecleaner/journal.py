@@ -0,0 +1,109 @@
+"""
+MC Structure Cleaner
+Journal of finished regions, to resume interrupted runs
+
+Every region is appended to the journal in the output folder as soon as
+it has been written, with the size and modification time of its source.
+A resumed run skips the regions in the journal whose source hasn't
+changed since. The journal is removed once a run finishes.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, Optional, TextIO, Tuple
+from structurecleaner.results import RegionResult
+
+JOURNAL_FILE = ".structurecleaner-journal.jsonl"
+
+
+class Journal:
+    path: Path
+    resume: bool
+    done: Dict[str, Tuple[int, int]]  # Size and mtime of finished sources
+    file: Optional[TextIO]
+
+    def __init__(
+        self, folder: Path, resume: bool = False, name: str = JOURNAL_FILE
+    ):
+        """
+        Args:
+            folder (Path): The output folder the journal is kept in
+            resume (bool): Continue the journal of an interrupted run
+                instead of starting a new one
+            name (str): File name of the journal
+        """
+        self.path = folder / name
+        self.resume = resume
+        self.done = self._load() if resume else {}
+        self.file = None
+
+    def _load(self) -> Dict[str, Tuple[int, int]]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                lines = file.read().splitlines()
+        except OSError:
+            return {}
+
+        done = {}
+        for line in lines:
+            try:
+                record = json.loads(line)
+                done[record["src"]] = (record["size"], record["mtime"])
+            except (ValueError, KeyError, TypeError):
+                # Cut short by a crash while it was written
+                continue
+        return done
+
+    def is_done(self, src: Path) -> bool:
+        """Check if a region was finished and its source is unchanged"""
+        state = self.done.get(str(src.resolve()))
+        if state is None:
+            return False
+        stat = src.stat()
+        return state == (stat.st_size, stat.st_mtime_ns)
+
+    def open(self) -> None:
+        """Start writing the journal, appending to it when resuming"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if not self.resume:
+            self.file = open(self.path, "w", encoding="utf-8")
+            return
+
+        self.file = open(self.path, "a+", encoding="utf-8")
+        if self.file.tell():
+            # Don't continue a line cut short by a crash
+            self.file.seek(self.file.tell() - 1)
+            if self.file.read(1) != "\n":
+                self.file.write("\n")
+
+    def record(self, result: RegionResult) -> None:
+        """Append a finished region, flushed to disk right away"""
+        if result.skipped or self.file is None:
+            return
+
+        record = {
+            "src": str(result.src.resolve()),
+            "size": result.size,
+            "mtime": result.mtime,
+        }
+        self.file.write(json.dumps(record) + "\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def finish(self) -> None:
+        """Remove the journal of a run that finished"""
+        self.close()
+        self.path.unlink(missing_ok=True)
+
+    def __enter__(self) -> "Journal":
+        self.open()
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
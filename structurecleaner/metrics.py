@@ -0,0 +1,123 @@
+"""
+MC Structure Cleaner
+Per-region metrics measured by the workers
+
+Every region result carries what it took to clean it: bytes read,
+chunks scanned and modified, time in each stage and the peak memory of
+the worker. They are summed into a summary at the end of a run and can
+be written to a JSON lines file, one region per line.
+"""
+
+import json
+import sys
+from dataclasses import asdict
+from pathlib import Path
+from typing import List, Optional, TextIO
+from structurecleaner.results import Metrics, RegionResult
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore
+
+# Stages of cleaning a chunk, timed separately
+STAGES = ("decompress", "scan", "parse", "filter", "encode", "write")
+
+
+def peak_rss() -> int:
+    """Get the peak resident memory of this process, in bytes
+
+    Returns:
+        int: Peak memory, or the current memory where the peak is not
+            available. 0 if it can't be measured at all.
+    """
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KiB, macOS bytes
+        return peak if sys.platform == "darwin" else peak * 1024
+
+    try:
+        import psutil  # type: ignore
+    except ImportError:
+        return 0
+
+    memory = psutil.Process().memory_info()
+    return getattr(memory, "peak_wset", memory.rss)
+
+
+def metrics_record(result: RegionResult) -> dict:
+    """Get the metrics of a region as a JSON serializable record"""
+    return {
+        "src": str(result.src),
+        "count": result.count,
+        "seconds": result.seconds,
+        "skipped": result.skipped,
+        "reclaimed": result.reclaimed,
+        **asdict(result.metrics),
+    }
+
+
+class MetricsWriter:
+    """Writes the metrics of every region to a JSON lines file as they
+    arrive, so a cancelled run still has the regions it finished
+    """
+
+    file: Optional[TextIO]
+
+    def __init__(self, path: Optional[Path]):
+        self.file = None if path is None else open(path, "w")
+
+    def write(self, result: RegionResult) -> None:
+        if self.file is not None:
+            self.file.write(json.dumps(metrics_record(result)) + "\n")
+            self.file.flush()
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.file.close()
+
+    def __enter__(self) -> "MetricsWriter":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+
+def summarize(results: List[RegionResult], seconds: float) -> List[str]:
+    """Summarize the metrics of a run
+
+    Args:
+        results (List[RegionResult]): The results of every region
+        seconds (float): Wall time of the run
+
+    Returns:
+        List[str]: Lines of the summary
+    """
+    total = Metrics()
+    for result in results:
+        total.add(result.metrics)
+
+    megabytes = total.bytes_read / 2**20
+    rate = megabytes / seconds if seconds else 0.0
+    stage_seconds = {stage: getattr(total, stage) for stage in STAGES}
+    worker_seconds = sum(stage_seconds.values()) or 1.0
+    stages = ", ".join(
+        f"{stage} {value:.3f} s ({value / worker_seconds:.0%})"
+        for stage, value in stage_seconds.items()
+    )
+
+    lines = [
+        f"Read {megabytes:.1f} MiB from {len(results)} regions "
+        f"({rate:.1f} MiB/s)",
+        f"Scanned {total.chunks} chunks, modified {total.modified}",
+        f"Time per stage: {stages}",
+        f"Peak worker memory: {total.peak_rss / 2**20:.1f} MiB",
+    ]
+
+    processed = [result for result in results if not result.skipped]
+    if processed:
+        slowest = max(processed, key=lambda result: result.seconds)
+        lines.append(
+            f"Slowest region: {slowest.src} ({slowest.seconds:.3f} s)"
+        )
+    return lines
@@ -0,0 +1,313 @@
+"""
+MC Structure Cleaner
+Streaming NBT scanner
+
+Walks uncompressed chunk NBT without building a tag tree. Payloads that
+can't hold structure data (block states, heightmaps, entities...) are
+skipped by their length, only the structure Starts/References keys are
+read. Entities and POI chunks are scanned the same
+way for entity ids and POI types.
+
+The scanner also finds where every structure entry is in the data, so
+removed entries can be cut out of it without parsing or serializing the
+rest of the chunk. Compounds end with a TAG_End instead of holding a
+length, so the data stays valid after whole entries are cut out.
+"""
+
+from struct import error as StructError, unpack_from
+from typing import Callable, Dict, List, NamedTuple, Tuple
+from structurecleaner.errors import CorruptChunkError
+
+TAG_END = 0
+TAG_BYTE_ARRAY = 7
+TAG_STRING = 8
+TAG_LIST = 9
+TAG_COMPOUND = 10
+TAG_INT_ARRAY = 11
+TAG_LONG_ARRAY = 12
+
+# Payload size of the fixed size tags: byte, short, int, long, float, double
+FIXED_SIZES = {1: 1, 2: 2, 3: 4, 4: 8, 5: 4, 6: 8}
+
+# Element size of the array tags
+ARRAY_SIZES = {TAG_BYTE_ARRAY: 1, TAG_INT_ARRAY: 4, TAG_LONG_ARRAY: 8}
+
+
+class ChunkScan(NamedTuple):
+    """What the scanner found in a chunk"""
+
+    starts: List[str]
+    references: List[str]
+    # Name, start and end of every Starts/References entry, in order
+    entries: List[Tuple[str, int, int]]
+
+
+def _read_name(buffer: bytes, pos: int) -> Tuple[bytes, int]:
+    start = pos + 2
+    end = start + unpack_from(">H", buffer, pos)[0]
+    return buffer[start:end], end
+
+
+def _skip(buffer: bytes, pos: int, tag_type: int) -> int:
+    """Skip over a payload
+
+    Args:
+        buffer (bytes): The uncompressed NBT data
+        pos (int): Start of the payload
+        tag_type (int): Type of the payload
+
+    Returns:
+        int: Position right after the payload
+    """
+    if tag_type in FIXED_SIZES:
+        return pos + FIXED_SIZES[tag_type]
+    if tag_type in ARRAY_SIZES:
+        length = unpack_from(">i", buffer, pos)[0]
+        return pos + 4 + length * ARRAY_SIZES[tag_type]
+    if tag_type == TAG_STRING:
+        return pos + 2 + unpack_from(">H", buffer, pos)[0]
+    if tag_type == TAG_LIST:
+        item_type = buffer[pos]
+        length = unpack_from(">i", buffer, pos + 1)[0]
+        pos += 5
+        if item_type in FIXED_SIZES:
+            return pos + max(length, 0) * FIXED_SIZES[item_type]
+        for _ in range(length):
+            pos = _skip(buffer, pos, item_type)
+        return pos
+    if tag_type == TAG_COMPOUND:
+        return _walk(buffer, pos, {})
+    raise ValueError(f"Unknown NBT tag type {tag_type}")
+
+
+# Called with (buffer, payload start, tag type), returns the payload end
+Visitor = Callable[[bytes, int, int], int]
+
+
+def _walk(buffer: bytes, pos: int, visitors: Dict[bytes, Visitor]) -> int:
+    """Walk a compound payload, handing the wanted entries to visitors.
+    Entries without a visitor are skipped.
+
+    Args:
+        buffer (bytes): The uncompressed NBT data
+        pos (int): Start of the compound payload
+        visitors (Dict[bytes, Visitor]): Visitors by entry name
+
+    Returns:
+        int: Position right after the compound
+    """
+    while True:
+        tag_type = buffer[pos]
+        if tag_type == TAG_END:
+            return pos + 1
+
+        name, pos = _read_name(buffer, pos + 1)
+        visitor = visitors.get(name)
+        if visitor is None:
+            pos = _skip(buffer, pos, tag_type)
+        else:
+            pos = visitor(buffer, pos, tag_type)
+
+
+def _compound(visitors: Dict[bytes, Visitor]) -> Visitor:
+    """Visitor walking a compound entry with its own visitors"""
+
+    def visit(buffer, pos, tag_type):
+        if tag_type != TAG_COMPOUND:
+            return _skip(buffer, pos, tag_type)
+        return _walk(buffer, pos, visitors)
+
+    return visit
+
+
+def _compound_list(visitors: Dict[bytes, Visitor]) -> Visitor:
+    """Visitor walking every compound of a list entry"""
+
+    def visit(buffer, pos, tag_type):
+        if tag_type != TAG_LIST or buffer[pos] != TAG_COMPOUND:
+            return _skip(buffer, pos, tag_type)
+        length = unpack_from(">i", buffer, pos + 1)[0]
+        pos += 5
+        for _ in range(length):
+            pos = _walk(buffer, pos, visitors)
+        return pos
+
+    return visit
+
+
+def _each_compound(visitors: Dict[bytes, Visitor]) -> Visitor:
+    """Visitor walking every compound inside a compound entry,
+    whatever their names are"""
+
+    def visit(buffer, pos, tag_type):
+        if tag_type != TAG_COMPOUND:
+            return _skip(buffer, pos, tag_type)
+        while True:
+            entry_type = buffer[pos]
+            if entry_type == TAG_END:
+                return pos + 1
+            _, pos = _read_name(buffer, pos + 1)
+            if entry_type == TAG_COMPOUND:
+                pos = _walk(buffer, pos, visitors)
+            else:
+                pos = _skip(buffer, pos, entry_type)
+
+    return visit
+
+
+def _string_into(found: List[str]) -> Visitor:
+    """Visitor adding the value of a string entry to found"""
+
+    def visit(buffer, pos, tag_type):
+        if tag_type != TAG_STRING:
+            return _skip(buffer, pos, tag_type)
+        value, end = _read_name(buffer, pos)
+        found.append(value.decode("utf-8"))
+        return end
+
+    return visit
+
+
+def _walk_root(buffer: bytes, visitors: Dict[bytes, Visitor]) -> None:
+    """Walk the root compound of chunk data
+
+    Raises:
+        CorruptChunkError: If the data isn't an NBT compound, or it's
+            truncated or damaged
+    """
+    # Root is a named compound
+    if not buffer or buffer[0] != TAG_COMPOUND:
+        raise CorruptChunkError("Chunk data is not an NBT compound")
+    try:
+        _, pos = _read_name(buffer, 1)
+        _walk(buffer, pos, visitors)
+    except (IndexError, ValueError, StructError) as error:
+        raise CorruptChunkError(f"Invalid chunk NBT: {error}")
+
+
+def compound_keys(buffer: bytes, pos: int) -> List[Tuple[str, int, int]]:
+    """List the entries of a compound payload
+
+    Args:
+        buffer (bytes): The uncompressed NBT data
+        pos (int): Start of the compound payload
+
+    Returns:
+        List[Tuple[str, int, int]]: Name, start and end of every entry,
+            the range covers the entry's type, name and payload
+    """
+    entries = []
+    while True:
+        tag_type = buffer[pos]
+        if tag_type == TAG_END:
+            return entries
+
+        start = pos
+        name, pos = _read_name(buffer, pos + 1)
+        pos = _skip(buffer, pos, tag_type)
+        entries.append((name.decode("utf-8"), start, pos))
+
+
+def scan_chunk(buffer: bytes) -> ChunkScan:
+    """Find the structure tag names of a chunk and where their entries are
+
+    Handles both the old (Level.Structures.Starts/References) and the new
+    (structures.starts/References) layouts.
+
+    Args:
+        buffer (bytes): The uncompressed chunk NBT data
+
+    Raises:
+        CorruptChunkError: If the data is truncated or damaged
+
+    Returns:
+        ChunkScan: The chunk's structure tag names and entries
+    """
+    found: Dict[str, List[str]] = {"starts": [], "references": []}
+    entries: List[Tuple[str, int, int]] = []
+
+    def keys_into(key):
+        def visit(buffer, pos, tag_type):
+            if tag_type != TAG_COMPOUND:
+                return _skip(buffer, pos, tag_type)
+            keys = compound_keys(buffer, pos)
+            found[key].extend(name for name, _, _ in keys)
+            entries.extend(keys)
+            return keys[-1][2] + 1 if keys else pos + 1
+
+        return visit
+
+    structures = _compound(
+        {
+            b"Starts": keys_into("starts"),
+            b"starts": keys_into("starts"),
+            b"References": keys_into("references"),
+        }
+    )
+    root = {
+        b"Level": _compound({b"Structures": structures}),
+        b"structures": structures,
+    }
+
+    _walk_root(buffer, root)
+
+    return ChunkScan(found["starts"], found["references"], entries)
+
+
+def cut_ranges(buffer: bytes, ranges: List[Tuple[int, int]]) -> bytes:
+    """Cut byte ranges out of NBT data
+
+    Args:
+        buffer (bytes): The uncompressed NBT data
+        ranges (List[Tuple[int, int]]): Start and end of every range, in
+            order and not overlapping, like the entries of a ChunkScan
+
+    Returns:
+        bytes: The data without the ranges
+    """
+    pieces = []
+    pos = 0
+    for start, end in ranges:
+        pieces.append(buffer[pos:start])
+        pos = end
+    pieces.append(buffer[pos:])
+    return b"".join(pieces)
+
+
+def scan_entities(buffer: bytes) -> List[str]:
+    """Find the ids of the entities in an entities chunk (1.17+),
+    including the passengers riding them
+
+    Args:
+        buffer (bytes): The uncompressed chunk NBT data
+
+    Raises:
+        CorruptChunkError: If the data is truncated or damaged
+
+    Returns:
+        List[str]: The entity ids
+    """
+    ids: List[str] = []
+    entity = {b"id": _string_into(ids)}
+    entity[b"Passengers"] = _compound_list(entity)
+    _walk_root(buffer, {b"Entities": _compound_list(entity)})
+    return ids
+
+
+def scan_poi(buffer: bytes) -> List[str]:
+    """Find the types of the points of interest in a POI chunk
+
+    Args:
+        buffer (bytes): The uncompressed chunk NBT data
+
+    Raises:
+        CorruptChunkError: If the data is truncated or damaged
+
+    Returns:
+        List[str]: The POI types
+    """
+    types: List[str] = []
+    record = {b"type": _string_into(types)}
+    section = {b"Records": _compound_list(record)}
+    _walk_root(buffer, {b"Sections": _each_compound(section)})
+    return types
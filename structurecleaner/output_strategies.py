@@ -0,0 +1,215 @@
+"""
+MC Structure Cleaner
+Strategies for writing processed region files
+"""
+
+import os
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, List, Tuple
+from structurecleaner.files import atomic_file, copy_atomic
+from structurecleaner.region import (
+    DEFAULT_ORDER,
+    RegionWriter,
+    external_files,
+    region_coords,
+)
+
+
+class OutputStrategy(ABC):
+    # Whether changed regions are written over the source files
+    modifies_source: bool = False
+
+    compact: bool  # Also rewrite unchanged regions that would shrink
+    order: str  # Order chunks are laid out in (zx, morton)
+    # .mcc files of the source folders, listed once per folder
+    _external: Dict[Path, Dict[Tuple[int, int], List[Path]]]
+
+    def __init__(self, compact: bool = False, order: str = DEFAULT_ORDER):
+        self.compact = compact
+        self.order = order
+        self._external = {}
+
+    @abstractmethod
+    def write(
+        self,
+        src: Path,
+        dst: Path,
+        region: RegionWriter,
+        count: int,
+        merged: bool = False,
+    ) -> bool:
+        """Write the processed region
+
+        Args:
+            src (Path): The source region file
+            dst (Path): The destination folder
+            region (RegionWriter): The processed region
+            count (int): The number of tags removed from it
+            merged (bool): The region holds chunks cleaned by the last
+                run, taken from its output, so it differs from src even
+                when nothing was removed now
+
+        Returns:
+            bool: True if the processed region was written, False if it
+                was left out or the source was used instead
+        """
+        pass
+
+    def should_write(
+        self, src: Path, region: RegionWriter, count: int, merged: bool
+    ) -> bool:
+        """Check if a region has to be written: when tags were removed from
+        it or it holds chunks cleaned by the last run, or when compacting
+        and it is smaller written again"""
+        if count or merged:
+            return True
+        return self.compact and region.size() < src.stat().st_size
+
+    def keep(self, src: Path, dst: Path) -> None:
+        """Handle a region that was skipped without being processed
+
+        Args:
+            src (Path): The source region file
+            dst (Path): The destination folder
+        """
+        pass
+
+    def pass_through(self, src: Path, dst: Path) -> None:
+        """Handle a region that couldn't be read. Output meant to replace
+        the world's folder gets the source as it is, so no region is lost.
+
+        Args:
+            src (Path): The source region file
+            dst (Path): The destination folder
+        """
+        pass
+
+    def external_files(self, src: Path) -> List[Path]:
+        """Get the .mcc files of a source region's oversized chunks, which
+        go along with it when it is kept as it is"""
+        try:
+            coords = region_coords(src)
+        except ValueError:
+            # Not named like a region, so it has no .mcc files
+            return []
+        if src.parent not in self._external:
+            self._external[src.parent] = external_files(src.parent)
+        return self._external[src.parent].get(coords, [])
+
+    @abstractmethod
+    def get_name(self) -> str:
+        pass
+
+
+class CopyOutputStrategy(OutputStrategy):
+    """Write every region to the destination folder"""
+
+    def write(self, src, dst, region, count, merged=False) -> bool:
+        region.save(dst / src.name, self.order)
+        return True
+
+    def keep(self, src, dst) -> None:
+        if self.compact and (dst / src.name).exists():
+            # Written by the run that found src unchanged, compacted
+            return
+        self.pass_through(src, dst)
+
+    def pass_through(self, src, dst) -> None:
+        for path in [src, *self.external_files(src)]:
+            target = dst / path.name
+            if target.exists():
+                stat, target_stat = path.stat(), target.stat()
+                if (stat.st_size, stat.st_mtime_ns) == (
+                    target_stat.st_size,
+                    target_stat.st_mtime_ns,
+                ):
+                    continue
+            copy_atomic(path, target)
+
+    def get_name(self) -> str:
+        return "copy"
+
+
+class ChangedOutputStrategy(OutputStrategy):
+    """Only write regions that had tags removed"""
+
+    def write(self, src, dst, region, count, merged=False) -> bool:
+        if not self.should_write(src, region, count, merged):
+            return False
+        region.save(dst / src.name, self.order)
+        return True
+
+    def get_name(self) -> str:
+        return "changed"
+
+
+class LinkOutputStrategy(OutputStrategy):
+    """Write changed regions, hard-link unchanged ones from the source"""
+
+    def write(self, src, dst, region, count, merged=False) -> bool:
+        if not self.should_write(src, region, count, merged):
+            self._link(src, dst)
+            return False
+        region.save(dst / src.name, self.order)
+        return True
+
+    def keep(self, src, dst) -> None:
+        if self.compact and (dst / src.name).exists():
+            # Written by the run that found src unchanged, compacted
+            return
+        self._link(src, dst)
+
+    def pass_through(self, src, dst) -> None:
+        self._link(src, dst)
+
+    def _link(self, src: Path, dst: Path) -> None:
+        for path in [src, *self.external_files(src)]:
+            target = dst / path.name
+            if target.exists() and target.samefile(path):
+                continue
+
+            # Linked next to the target and renamed over it, like other
+            # output
+            tmp = target.with_name(f".{target.name}.link")
+            if tmp.exists():
+                tmp.unlink()
+            try:
+                os.link(path, tmp)
+            except OSError:
+                # Different filesystem or links not supported
+                copy_atomic(path, target)
+            else:
+                os.replace(tmp, target)
+
+    def get_name(self) -> str:
+        return "link"
+
+
+class InPlaceOutputStrategy(OutputStrategy):
+    """Atomically replace changed regions in the source folder"""
+
+    modifies_source = True
+
+    def write(self, src, dst, region, count, merged=False) -> bool:
+        if not self.should_write(src, region, count, merged):
+            return False
+        with atomic_file(src) as file:
+            region.write_to(file, src, self.order)
+            # The source can't be replaced while it is still open
+            region.close_sources()
+        return True
+
+    def get_name(self) -> str:
+        return "inplace"
+
+
+OUTPUT_STRATEGIES = {
+    strategy().get_name(): strategy
+    for strategy in (
+        CopyOutputStrategy,
+        ChangedOutputStrategy,
+        LinkOutputStrategy,
+        InPlaceOutputStrategy,
+    )
+}
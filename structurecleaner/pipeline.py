@@ -0,0 +1,154 @@
+"""
+MC Structure Cleaner
+Staged pipeline overlapping disk reads, cleaning and writes
+
+Reader threads prefetch whole region files into memory, the worker pool
+cleans them and a writer thread writes them out, so region N+1 is read
+while region N is cleaned and region N-1 written. This keeps the disk
+busy during CPU work, which matters most on network storage (NFS).
+The stages are connected by bounded queues and only a limited number of
+regions are held in memory at once.
+
+It is off by default. Prefetched regions are read whole into the parent
+process and sent to the workers, while workers reading their own regions
+map them and only touch the chunks they need, so local disks are better
+off without it.
+"""
+
+import queue
+import threading
+from typing import Callable, Iterable, Iterator, List
+from structurecleaner.executors import WorkerPool
+
+READER_THREADS = 4  # Reads in flight, more hide the latency of NFS
+DEFAULT_PREFETCH = 0  # Regions read ahead of the workers, 0 for none
+NFS_PREFETCH = 4  # A good start for network storage
+
+_DONE = object()  # Marks the end of a stage's output
+
+
+def run_pipeline(
+    items: Iterable,
+    read: Callable,
+    process: Callable,
+    write: Callable,
+    pool: WorkerPool,
+    limit: int,
+    readers: int = READER_THREADS,
+) -> Iterator:
+    """Read, process and write items in overlapping stages
+
+    Args:
+        items (Iterable): What to process, read in this order
+        read (Callable): Reads an item, called in the reader threads
+        process (Callable): Processes what was read, called in the pool.
+            Must be picklable for process pools.
+        write (Callable): Writes a processed item and returns its result,
+            called in the writer thread
+        pool (WorkerPool): The worker pool
+        limit (int): Most items between being read and written at once
+        readers (int): Number of reader threads
+
+    Raises:
+        Exception: The first error raised by read, process or write
+
+    Yields:
+        The results of write, as items are written
+    """
+    slots = threading.Semaphore(max(limit, 1))
+    source = iter(items)
+    source_lock = threading.Lock()
+    stop = threading.Event()
+    errors: List[BaseException] = []
+
+    # Slots keep the queues from filling, the extra room is for _DONE
+    read_queue: queue.Queue = queue.Queue(limit + readers)
+    write_queue: queue.Queue = queue.Queue(limit + 1)
+    done_queue: queue.Queue = queue.Queue()
+
+    def reader() -> None:
+        try:
+            while True:
+                slots.acquire()
+                with source_lock:
+                    item = _DONE if stop.is_set() else next(source, _DONE)
+                if item is _DONE:
+                    # Pass the slot on, so the other readers can exit too
+                    slots.release()
+                    return
+                read_queue.put(read(item))
+        except Exception as error:
+            errors.append(error)
+            stop.set()
+            slots.release()
+        finally:
+            read_queue.put(_DONE)
+
+    def writer() -> None:
+        while True:
+            processed = write_queue.get()
+            if processed is _DONE:
+                break
+            try:
+                if not stop.is_set():
+                    done_queue.put(write(processed))
+            except Exception as error:
+                errors.append(error)
+                stop.set()
+            finally:
+                slots.release()
+        done_queue.put(_DONE)
+
+    def jobs() -> Iterator:
+        finished = 0
+        while finished < readers:
+            job = read_queue.get()
+            if job is _DONE:
+                finished += 1
+            else:
+                yield job
+
+    threads = [
+        threading.Thread(target=reader, daemon=True) for _ in range(readers)
+    ]
+    threads.append(threading.Thread(target=writer, daemon=True))
+    for thread in threads:
+        thread.start()
+
+    writing = True
+    try:
+        for processed in pool.imap_unordered(process, jobs()):
+            write_queue.put(processed)
+            yield from _drain(done_queue)
+        write_queue.put(_DONE)
+        writing = False
+
+        while True:
+            result = done_queue.get()
+            if result is _DONE:
+                break
+            yield result
+    finally:
+        stop.set()
+        # Wake up the readers waiting for a slot so they can exit
+        for _ in range(readers):
+            slots.release()
+        if writing:
+            write_queue.put(_DONE)
+
+    if errors:
+        raise errors[0]
+
+
+def _drain(results: queue.Queue) -> Iterator:
+    """Get the results that are ready without waiting"""
+    while True:
+        try:
+            result = results.get_nowait()
+        except queue.Empty:
+            return
+        if result is _DONE:
+            # Keep the end marker for the final loop
+            results.put(_DONE)
+            return
+        yield result
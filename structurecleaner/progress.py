@@ -0,0 +1,266 @@
+"""
+MC Structure Cleaner
+Progress reporting from the main process
+
+Workers don't print anything, they hand their results back and the main
+process renders a single progress line: regions done, throughput, tags
+removed and time left. Verbose runs print a line per region instead.
+
+Runs themselves don't print either, they report to an optional progress
+callback. The command line passes a ConsoleProgress, or for scans a
+ConsoleScanProgress.
+"""
+
+import sys
+import time
+from datetime import timedelta
+from typing import Callable, Optional, TextIO
+from structurecleaner.results import (
+    RegionResult,
+    RunResult,
+    ScanResult,
+    ScanRun,
+)
+
+PROGRESS_INTERVAL = 0.2  # Shortest time between redraws, in seconds
+
+# Called with the run once its regions are scheduled, with None as the
+# region, then again every time a region is finished
+ProgressCallback = Callable[[RunResult, Optional[RegionResult]], None]
+
+# The same for scans
+ScanProgressCallback = Callable[[ScanRun, Optional[ScanResult]], None]
+
+
+class Progress:
+    """Tracks finished regions and renders the progress line.
+    On a terminal the line is redrawn in place, otherwise (pipes, the GUI
+    console) a new line is printed every time another percent is done.
+    """
+
+    total: int
+    total_bytes: int
+    verbose: bool
+    label: str
+    stream: TextIO
+    done: int
+    done_bytes: int
+    count: int
+    start: float
+
+    def __init__(
+        self,
+        total: int,
+        total_bytes: int,
+        verbose: bool = False,
+        stream: Optional[TextIO] = None,
+        done: int = 0,
+        label: str = "tags removed",
+    ):
+        """
+        Args:
+            total (int): Number of regions in the run
+            total_bytes (int): Size of the regions left to process
+            verbose (bool): Print a line per region instead of progress
+            stream (TextIO, optional): Where to write, defaults to stdout
+            done (int): Number of regions that are already done
+            label (str): What the counted tags are
+        """
+        self.total = total
+        self.total_bytes = total_bytes
+        self.verbose = verbose
+        self.stream = sys.stdout if stream is None else stream
+        self.done = done
+        self.label = label
+        self.done_bytes = 0
+        self.count = 0
+        self.start = time.perf_counter()
+
+        self._interactive = self.stream.isatty()
+        self._last_draw = 0.0
+        self._last_percent = -1
+        self._width = 0
+
+    def advance(self, size: int, count: int) -> None:
+        """Record a finished region
+
+        Args:
+            size (int): Size of the region file, in bytes
+            count (int): Number of tags counted in it
+        """
+        self.done += 1
+        self.done_bytes += size
+        self.count += count
+        if not self.verbose:
+            self._draw()
+
+    def log(self, line: str) -> None:
+        """Print a line above the progress line"""
+        self._clear()
+        print(line, file=self.stream)
+        if not self.verbose:
+            self._draw(force=True)
+
+    def finish(self) -> None:
+        """Leave the final progress on its own line"""
+        if self._width:
+            print(file=self.stream)
+            self._width = 0
+
+    def status(self) -> str:
+        """Get the current progress as a line of text"""
+        elapsed = time.perf_counter() - self.start
+        rate = self.done_bytes / elapsed if elapsed else 0.0
+        left = self.total_bytes - self.done_bytes
+
+        if self.done >= self.total:
+            eta = "0:00:00"
+        elif rate:
+            eta = str(timedelta(seconds=round(left / rate)))
+        else:
+            eta = "?"
+
+        return (
+            f"[{self.done}/{self.total}] {self._percent()}% | "
+            f"{rate / 2**20:.1f} MiB/s | "
+            f"{self.count} {self.label} | ETA {eta}"
+        )
+
+    def _percent(self) -> int:
+        return 100 * self.done // self.total if self.total else 100
+
+    def _draw(self, force: bool = False) -> None:
+        now = time.perf_counter()
+        finished = self.done >= self.total
+
+        if self._interactive:
+            if not force and not finished:
+                if now - self._last_draw < PROGRESS_INTERVAL:
+                    return
+            line = self.status()
+            padding = " " * max(self._width - len(line), 0)
+            self.stream.write(f"\r{line}{padding}")
+            self.stream.flush()
+            self._width = len(line)
+        else:
+            percent = self._percent()
+            if percent == self._last_percent:
+                return
+            self._last_percent = percent
+            print(self.status(), file=self.stream, flush=True)
+
+        self._last_draw = now
+
+    def _clear(self) -> None:
+        if self._width:
+            self.stream.write("\r" + " " * self._width + "\r")
+            self._width = 0
+
+
+class ConsoleProgress:
+    """Progress callback rendering a run on the console"""
+
+    verbose: bool
+    stream: Optional[TextIO]
+    progress: Optional[Progress]
+
+    def __init__(
+        self, verbose: bool = False, stream: Optional[TextIO] = None
+    ):
+        """
+        Args:
+            verbose (bool): Print a line per region instead of progress
+            stream (TextIO, optional): Where to write, defaults to stdout
+        """
+        self.verbose = verbose
+        self.stream = stream
+        self.progress = None
+
+    def __call__(self, run: RunResult, result: Optional[RegionResult]):
+        if result is None:
+            self._start(run)
+            return
+
+        progress = self.progress
+        progress.advance(result.metrics.bytes_read, result.count)
+        if result.skipped:
+            progress.log(result.error)
+        elif self.verbose:
+            progress.log(
+                f"[{progress.done}/{progress.total}] {result.src}: "
+                f"{result.count} instances of tags removed "
+                f"in {result.seconds:.3f} s"
+            )
+            if result.removed_tags:
+                progress.log(f"Removed tags: {sorted(result.removed_tags)}")
+
+        if run.done >= run.total:
+            progress.finish()
+
+    def _start(self, run: RunResult) -> None:
+        self.progress = Progress(
+            run.total,
+            run.total_bytes,
+            self.verbose,
+            self.stream,
+            done=run.done,
+        )
+        progress = self.progress
+        if run.resumed:
+            progress.log(f"Resuming, {len(run.resumed)} regions already done")
+        if run.unchanged:
+            progress.log(f"Skipping {len(run.unchanged)} unchanged regions")
+        if run.outside:
+            progress.log(f"Keeping {len(run.outside)} unselected regions")
+        if self.verbose:
+            progress.log(f"Using {run.jobs} {run.executor} workers")
+        if run.done >= run.total:
+            progress.finish()
+
+
+class ConsoleScanProgress:
+    """Progress callback rendering a scan on the console"""
+
+    verbose: bool
+    stream: Optional[TextIO]
+    progress: Optional[Progress]
+
+    def __init__(
+        self, verbose: bool = False, stream: Optional[TextIO] = None
+    ):
+        """
+        Args:
+            verbose (bool): Print a line per region instead of progress
+            stream (TextIO, optional): Where to write, defaults to stdout
+        """
+        self.verbose = verbose
+        self.stream = stream
+        self.progress = None
+
+    def __call__(self, run: ScanRun, result: Optional[ScanResult]):
+        if result is None:
+            self.progress = Progress(
+                run.total,
+                run.total_bytes,
+                self.verbose,
+                self.stream,
+                label="tags found",
+            )
+        else:
+            self._advance(result)
+
+        if run.done >= run.total:
+            self.progress.finish()
+
+    def _advance(self, result: ScanResult) -> None:
+        progress = self.progress
+        progress.advance(result.size, result.count)
+        if result.skipped:
+            progress.log(result.error)
+        elif self.verbose:
+            progress.log(
+                f"[{progress.done}/{progress.total}] {result.src}: "
+                f"{sum(result.starts.values())} starts, "
+                f"{sum(result.references.values())} references "
+                f"in {result.seconds:.3f} s"
+            )
@@ -0,0 +1,465 @@
+"""
+MC Structure Cleaner
+Region file reading and writing at the sector level
+"""
+
+import itertools as it
+import math
+import mmap
+import re
+import struct
+from io import BytesIO
+from nbt import nbt
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Optional, Tuple, Union
+from structurecleaner.constants import SECTOR_SIZE, REGION_CHUNKS
+from structurecleaner.files import atomic_file, write_atomic
+from structurecleaner.compression import (
+    DEFAULT_LEVEL,
+    EXTERNAL_FLAG,
+    ZLIB,
+    compress,
+    decompress,
+)
+
+HEADER_SECTORS = 2  # Locations table + timestamps table
+MAX_CHUNK_SECTORS = 255  # Larger chunks are stored in .mcc files
+EXTERNAL_SUFFIX = ".mcc"
+REGION_NAME = re.compile(r"r\.-?\d+\.-?\d+\.mca")
+
+# Orders chunks are laid out in when a region is written
+ZX_ORDER = "zx"  # Row by row, the order of the header tables
+MORTON_ORDER = "morton"  # Z-order curve, keeps neighboring chunks close
+DEFAULT_ORDER = ZX_ORDER
+
+
+def chunk_index(chunk_x: int, chunk_z: int) -> int:
+    """Get the position of a chunk in the region header tables
+
+    Args:
+        chunk_x (int): Chunk X coordinate (local or global)
+        chunk_z (int): Chunk Z coordinate (local or global)
+
+    Returns:
+        int: Index of the chunk, from 0 to 1023
+    """
+    return chunk_x % REGION_CHUNKS + chunk_z % REGION_CHUNKS * REGION_CHUNKS
+
+
+def morton_index(chunk_x: int, chunk_z: int) -> int:
+    """Get the position of a chunk on the Z-order curve of its region,
+    by interleaving the bits of its local coordinates"""
+    index = 0
+    for bit in range(REGION_CHUNKS.bit_length() - 1):
+        index |= (chunk_x >> bit & 1) << 2 * bit
+        index |= (chunk_z >> bit & 1) << 2 * bit + 1
+    return index
+
+
+# Header table indexes of the chunks, in the order they are written
+CHUNK_ORDERS = {
+    ZX_ORDER: list(range(REGION_CHUNKS**2)),
+    MORTON_ORDER: sorted(
+        range(REGION_CHUNKS**2),
+        key=lambda index: morton_index(
+            index % REGION_CHUNKS, index // REGION_CHUNKS
+        ),
+    ),
+}
+
+
+def is_region_file(path: Path) -> bool:
+    """Check if a file is named like a region file (r.X.Z.mca)"""
+    return REGION_NAME.fullmatch(path.name) is not None
+
+
+def region_coords(path: Path) -> Tuple[int, int]:
+    """Get the region coordinates from a region file name (r.X.Z.mca)"""
+    _, region_x, region_z, _ = path.name.split(".")
+    return int(region_x), int(region_z)
+
+
+def external_path(folder: Path, chunk_x: int, chunk_z: int) -> Path:
+    """Get the .mcc file an oversized chunk is stored in
+
+    Args:
+        folder (Path): The region folder
+        chunk_x (int): Global chunk X coordinate
+        chunk_z (int): Global chunk Z coordinate
+    """
+    return folder / f"c.{chunk_x}.{chunk_z}{EXTERNAL_SUFFIX}"
+
+
+def external_files(folder: Path) -> Dict[Tuple[int, int], List[Path]]:
+    """Find the .mcc files of a region folder
+
+    Args:
+        folder (Path): The region folder
+
+    Returns:
+        Dict[Tuple[int, int], List[Path]]: The .mcc files, by the
+            coordinates of the region their chunk is in
+    """
+    files: Dict[Tuple[int, int], List[Path]] = {}
+    for path in folder.glob(f"c.*.*{EXTERNAL_SUFFIX}"):
+        try:
+            _, chunk_x, chunk_z, _ = path.name.split(".")
+            region = (
+                int(chunk_x) // REGION_CHUNKS,
+                int(chunk_z) // REGION_CHUNKS,
+            )
+        except ValueError:
+            continue
+        files.setdefault(region, []).append(path)
+    return files
+
+
+def make_record(compression: int, payload: bytes) -> bytes:
+    """Build a raw chunk record from its compression type and payload"""
+    return (
+        (len(payload) + 1).to_bytes(4, "big")
+        + bytes((compression,))
+        + payload
+    )
+
+
+def decompress_chunk(raw: bytes) -> bytes:
+    """Decompress a raw chunk record
+
+    Args:
+        raw (bytes): Length, compression type and compressed payload
+
+    Raises:
+        UnsupportedCompressionError: If the compression type can't be read
+        CorruptChunkError: If the payload is truncated or damaged
+
+    Returns:
+        bytes: The chunk's uncompressed NBT data
+    """
+    return decompress(raw[4], raw[5:])
+
+
+def parse_chunk(buffer: bytes) -> nbt.NBTFile:
+    """Parse uncompressed chunk NBT data into a tag tree"""
+    return nbt.NBTFile(buffer=BytesIO(buffer))
+
+
+def decode_chunk(raw: bytes) -> nbt.NBTFile:
+    """Decompress and parse a raw chunk record"""
+    return parse_chunk(decompress_chunk(raw))
+
+
+def encode_chunk(
+    data: nbt.NBTFile, compression: int = ZLIB, level: int = DEFAULT_LEVEL
+) -> bytes:
+    """Serialize and compress chunk data into a raw chunk record
+
+    Args:
+        data (nbt.NBTFile): The chunk's NBT data
+        compression (int): The compression type (gzip, zlib, uncompressed)
+        level (int): The compression level, 1 (fast) to 9 (small)
+
+    Returns:
+        bytes: Length, compression type and compressed payload
+    """
+    buffer = BytesIO()
+    data.write_file(buffer=buffer)
+    return compress_chunk(buffer.getvalue(), compression, level)
+
+
+def compress_chunk(
+    buffer: bytes, compression: int = ZLIB, level: int = DEFAULT_LEVEL
+) -> bytes:
+    """Compress uncompressed chunk NBT data into a raw chunk record
+
+    Args:
+        buffer (bytes): The chunk's uncompressed NBT data
+        compression (int): The compression type (gzip, zlib, uncompressed)
+        level (int): The compression level, 1 (fast) to 9 (small)
+
+    Returns:
+        bytes: Length, compression type and compressed payload
+    """
+    return make_record(compression, compress(compression, buffer, level))
+
+
+class RegionReader:
+    """Read-only access to the raw sectors of a region file"""
+
+    data: Union[bytes, mmap.mmap]
+    path: Optional[Path]  # Where oversized chunks (.mcc files) are found
+
+    def __init__(
+        self, data: Union[bytes, mmap.mmap], path: Optional[Path] = None
+    ):
+        self.data = data
+        self.path = path
+
+    @classmethod
+    def from_file(cls, path: Path) -> "RegionReader":
+        """Map a region file into memory.
+        Sectors are only read from disk when a chunk is accessed.
+        """
+        with open(path, "rb") as file:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(data, path)
+
+    @classmethod
+    def header_from_file(cls, path: Path) -> "RegionReader":
+        """Read only the location and timestamp tables of a region file"""
+        with open(path, "rb") as file:
+            return cls(file.read(HEADER_SECTORS * SECTOR_SIZE))
+
+    def chunk_location(self, chunk_x: int, chunk_z: int) -> Tuple[int, int]:
+        """Get the sector offset and sector count of a chunk
+
+        Returns:
+            Tuple[int, int]: (0, 0) if the chunk doesn't exist
+        """
+        offset = chunk_index(chunk_x, chunk_z) * 4
+        end = offset + 3
+        sector = int.from_bytes(self.data[offset:end], "big")
+        return sector, self.data[end]
+
+    def timestamp(self, chunk_x: int, chunk_z: int) -> int:
+        """Get the last time a chunk was saved, in epoch seconds"""
+        offset = SECTOR_SIZE + chunk_index(chunk_x, chunk_z) * 4
+        end = offset + 4
+        return int.from_bytes(self.data[offset:end], "big")
+
+    def latest_timestamp(self) -> int:
+        """Get the last time any chunk of the region was saved"""
+        end = HEADER_SECTORS * SECTOR_SIZE
+        table = self.data[SECTOR_SIZE:end]
+        return max(struct.unpack_from(f">{len(table) // 4}I", table))
+
+    def close(self) -> None:
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+
+    def __enter__(self) -> "RegionReader":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def raw_chunk_range(self, chunk_x: int, chunk_z: int) -> Optional[slice]:
+        """Find where a chunk's record is stored in the file.
+        For oversized chunks this is only the record pointing to the .mcc
+        file.
+
+        Returns:
+            Optional[slice]: Position of the length, compression type and
+            payload, or None if the chunk doesn't exist
+        """
+        sector, _ = self.chunk_location(chunk_x, chunk_z)
+        if sector == 0:
+            return None
+        start = sector * SECTOR_SIZE
+        payload = start + 4
+        length = int.from_bytes(self.data[start:payload], "big")
+        return slice(start, payload + length)
+
+    def is_external(self, chunk_x: int, chunk_z: int) -> bool:
+        """Check if a chunk is stored in a .mcc file"""
+        location = self.raw_chunk_range(chunk_x, chunk_z)
+        if location is None:
+            return False
+        return bool(self.data[location.start + 4] & EXTERNAL_FLAG)
+
+    def raw_chunk(self, chunk_x: int, chunk_z: int) -> Optional[bytes]:
+        """Get a chunk's record exactly as it is stored in the file.
+        The payload of oversized chunks is read from their .mcc file.
+
+        Returns:
+            Optional[bytes]: Length, compression type and payload,
+            or None if the chunk doesn't exist
+        """
+        location = self.raw_chunk_range(chunk_x, chunk_z)
+        if location is None:
+            return None
+
+        record = self.data[location]
+        if not record[4] & EXTERNAL_FLAG:
+            return record
+
+        if self.path is None:
+            raise FileNotFoundError("Oversized chunk without a region path")
+        region_x, region_z = region_coords(self.path)
+        payload = external_path(
+            self.path.parent,
+            region_x * REGION_CHUNKS + chunk_x % REGION_CHUNKS,
+            region_z * REGION_CHUNKS + chunk_z % REGION_CHUNKS,
+        ).read_bytes()
+        return make_record(record[4] & ~EXTERNAL_FLAG, payload)
+
+    def existing_chunks(self) -> List[Tuple[int, int]]:
+        """Get the local coordinates of every chunk stored in the region"""
+        return [
+            (chunk_x, chunk_z)
+            for chunk_x, chunk_z in it.product(range(REGION_CHUNKS), repeat=2)
+            if self.chunk_location(chunk_x, chunk_z)[0] != 0
+        ]
+
+    def chunk_data(self, chunk_x: int, chunk_z: int) -> Optional[nbt.NBTFile]:
+        """Get a chunk's parsed NBT data, or None if it doesn't exist"""
+        raw = self.raw_chunk(chunk_x, chunk_z)
+        return None if raw is None else decode_chunk(raw)
+
+
+# A chunk record, or where to copy it from
+ChunkRecord = Union[bytes, Tuple[RegionReader, slice]]
+
+
+class RegionWriter:
+    """Builds a region file from raw chunk records.
+    Unmodified chunks are copied verbatim, only edited chunks are encoded.
+    Copied chunks are only read from their source while the region is
+    written out, so only the edited chunks are held in memory.
+    Chunks larger than 255 sectors are written to .mcc files.
+    """
+
+    chunks: List[Optional[ChunkRecord]]
+    timestamps: List[int]
+
+    def __init__(self):
+        self.chunks = [None] * REGION_CHUNKS**2
+        self.timestamps = [0] * REGION_CHUNKS**2
+
+    def copy_chunk(self, region: RegionReader, chunk_x: int, chunk_z: int):
+        """Copy a chunk's compressed record and timestamp unchanged"""
+        index = chunk_index(chunk_x, chunk_z)
+        location = region.raw_chunk_range(chunk_x, chunk_z)
+        if location is None:
+            self.chunks[index] = None
+        elif region.is_external(chunk_x, chunk_z):
+            # The .mcc file is written again next to the new region
+            self.chunks[index] = region.raw_chunk(chunk_x, chunk_z)
+        else:
+            self.chunks[index] = (region, location)
+        self.timestamps[index] = region.timestamp(chunk_x, chunk_z)
+
+    def add_chunk(
+        self, chunk_x: int, chunk_z: int, data: nbt.NBTFile, timestamp: int
+    ):
+        """Encode and add a modified chunk"""
+        self.set_chunk(chunk_x, chunk_z, encode_chunk(data), timestamp)
+
+    def set_chunk(
+        self, chunk_x: int, chunk_z: int, raw: bytes, timestamp: int
+    ):
+        """Add an already encoded chunk record"""
+        index = chunk_index(chunk_x, chunk_z)
+        self.chunks[index] = raw
+        self.timestamps[index] = timestamp
+
+    def close_sources(self) -> None:
+        """Close the regions chunks were copied from.
+        Only call this once the region has been written.
+        """
+        for record in self.chunks:
+            if isinstance(record, tuple):
+                record[0].close()
+
+    @staticmethod
+    def _length(record: ChunkRecord) -> int:
+        if isinstance(record, tuple):
+            return record[1].stop - record[1].start
+        return len(record)
+
+    def size(self) -> int:
+        """Get the size the region file will have, without .mcc files"""
+        sectors = HEADER_SECTORS
+        for record in self.chunks:
+            if record is None:
+                continue
+            count = math.ceil(self._length(record) / SECTOR_SIZE)
+            # Oversized chunks leave a one sector record behind
+            sectors += 1 if count > MAX_CHUNK_SECTORS else count
+        return sectors * SECTOR_SIZE
+
+    def _spill(
+        self, index: int, record: Optional[ChunkRecord], path: Optional[Path]
+    ) -> Optional[ChunkRecord]:
+        """Move an oversized chunk to its .mcc file
+
+        Returns:
+            Optional[ChunkRecord]: The record to store in the region file
+        """
+        if not isinstance(record, bytes):
+            return record
+        if math.ceil(len(record) / SECTOR_SIZE) <= MAX_CHUNK_SECTORS:
+            return record
+        if path is None:
+            raise ValueError("Oversized chunks need the region's path")
+
+        region_x, region_z = region_coords(path)
+        external = external_path(
+            path.parent,
+            region_x * REGION_CHUNKS + index % REGION_CHUNKS,
+            region_z * REGION_CHUNKS + index // REGION_CHUNKS,
+        )
+        write_atomic(external, record[5:])
+        return make_record(record[4] | EXTERNAL_FLAG, b"")
+
+    def write_to(
+        self,
+        file: BinaryIO,
+        path: Optional[Path] = None,
+        order: str = DEFAULT_ORDER,
+    ) -> None:
+        """Write the region, with all chunks laid out contiguously after
+        the header, one chunk at a time. Chunks are only padded to whole
+        sectors.
+
+        Args:
+            file (BinaryIO): Where the region file is written
+            path (Path, optional): The region file's final path, needed
+                to write oversized chunks next to it
+            order (str): Order the chunks are laid out in (zx, morton)
+        """
+        records = [
+            self._spill(index, record, path)
+            for index, record in enumerate(self.chunks)
+        ]
+        layout = [
+            index
+            for index in CHUNK_ORDERS[order]
+            if records[index] is not None
+        ]
+        locations = bytearray(4 * len(records))
+        sector = HEADER_SECTORS
+
+        for index in layout:
+            count = math.ceil(self._length(records[index]) / SECTOR_SIZE)
+            location = sector.to_bytes(3, "big") + count.to_bytes(1, "big")
+            start = 4 * index
+            end = start + 4
+            locations[start:end] = location
+            sector += count
+
+        file.write(locations)
+        file.write(b"".join(t.to_bytes(4, "big") for t in self.timestamps))
+
+        for index in layout:
+            record = records[index]
+            if isinstance(record, tuple):
+                region, location = record
+                file.write(region.data[location])
+            else:
+                file.write(record)
+
+            padding = -self._length(record) % SECTOR_SIZE
+            file.write(bytes(padding))
+
+    def to_bytes(self) -> bytes:
+        """Get the region file contents"""
+        buffer = BytesIO()
+        self.write_to(buffer)
+        return buffer.getvalue()
+
+    def save(self, path: Path, order: str = DEFAULT_ORDER) -> None:
+        """Write the region to path through a temporary file, so path
+        never holds a partially written region"""
+        with atomic_file(path) as file:
+            self.write_to(file, path, order)
@@ -1,20 +1,36 @@
-from typing import Set
+import fnmatch
+import re
+from typing import Dict, List, Optional, Pattern, Set
 from nbt import nbt
 from abc import ABC, abstractmethod
 from structurecleaner.constants import VANILLA_STRUCTURES
 
+REGEX_PREFIX = "re:"  # Tags starting with this are regular expressions
+GLOB_CHARACTERS = re.compile(r"[*?\[]")
+
 
 class RemovalStrategy(ABC):
-    @abstractmethod
-    def check_tag(self, tag: nbt.TAG) -> bool:
-        pass
+    # Decisions already made, by tag name
+    _decisions: Dict[str, bool]
 
-    @abstractmethod
-    def print_find(self, removed_tags: Set[str]) -> None:
-        pass
+    def __init__(self):
+        self._decisions = {}
+
+    def check_tag(self, tag: nbt.TAG) -> bool:
+        return self.check_name(tag.name)
+
+    def check_name(self, name: str) -> bool:
+        """Check if a structure tag should be removed.
+        The same names repeat in every chunk, so each is only matched once.
+        """
+        try:
+            return self._decisions[name]
+        except KeyError:
+            decision = self._decisions[name] = self.match_name(name)
+            return decision
 
     @abstractmethod
-    def print_done(self, count: int) -> None:
+    def match_name(self, name: str) -> bool:
         pass
 
     @abstractmethod
@@ -23,56 +39,80 @@ class RemovalStrategy(ABC):
 
 
 class PurgeRemovalStrategy(RemovalStrategy):
-    def check_tag(self, tag: nbt.TAG) -> bool:
-        if tag.name.lower() in VANILLA_STRUCTURES:
+    def match_name(self, name: str) -> bool:
+        name = name.lower()
+
+        if name in VANILLA_STRUCTURES:
             return False
 
-        if tag.name.lower().startswith("minecraft:"):
+        if name.startswith("minecraft:"):
             return False
 
         return True
 
-    def print_find(self, removed_tags: Set[str]) -> None:
-        print(f"Found {len(removed_tags)} non-vanilla tags: {removed_tags}")
-
-    def print_done(self, count: int) -> None:
-        print(f"Done!\nRemoved {count} instances of non-vanilla tags")
-
     def get_name(self) -> str:
         return "purge"
 
 
 class ListRemovalStrategy(RemovalStrategy):
+    """Removes the given tags. Besides exact names, tags can be:
+    - A prefix followed by a wildcard, e.g. "mod:*"
+    - A glob pattern, e.g. "mod:*_tower" or "mod:ruin_?"
+    - A regular expression after "re:", e.g. "re:mod:(ruin|tower)_\\d+"
+    """
+
     to_replace: Set[str]
     to_replace_specific: Set[str]
     to_replace_wildcard: Set[str]
+    to_replace_patterns: Set[str]
+    matcher: Optional[Pattern[str]]
 
     def __init__(self, to_replace: Set[str]):
+        super().__init__()
         self.to_replace = to_replace
         self.to_replace_specific = set()
         self.to_replace_wildcard = set()
+        self.to_replace_patterns = set()
 
         for tag in to_replace:
-            if tag.endswith("*"):
+            if tag.startswith(REGEX_PREFIX):
+                self.to_replace_patterns.add(tag)
+            elif tag.endswith("*") and not GLOB_CHARACTERS.search(tag[:-1]):
                 self.to_replace_wildcard.add(tag)
+            elif GLOB_CHARACTERS.search(tag):
+                self.to_replace_patterns.add(tag)
             else:
                 self.to_replace_specific.add(tag)
 
-    def check_tag(self, tag: nbt.TAG) -> bool:
-        if tag.name in self.to_replace_specific:
-            return True
+        self.matcher = self._compile()
 
-        for wildcard in self.to_replace_wildcard:
-            if tag.name.startswith(wildcard[:-1]):
-                return True
+    def _compile(self) -> Optional[Pattern[str]]:
+        """Combine all wildcards and patterns into a single expression
 
-        return False
+        Returns:
+            Optional[Pattern[str]]: The expression, None if there are no
+            wildcards or patterns
+        """
+        expressions: List[str] = [
+            re.escape(wildcard[:-1])
+            for wildcard in sorted(self.to_replace_wildcard)
+        ]
 
-    def print_find(self, removed_tags: Set[str]) -> None:
-        return
+        for pattern in sorted(self.to_replace_patterns):
+            if pattern.startswith(REGEX_PREFIX):
+                expressions.append(f"(?:{pattern[len(REGEX_PREFIX):]})\\Z")
+            else:
+                expressions.append(fnmatch.translate(pattern))
+
+        if not expressions:
+            return None
+        return re.compile("|".join(f"(?:{e})" for e in expressions))
+
+    def match_name(self, name: str) -> bool:
+        if name in self.to_replace_specific:
+            return True
 
-    def print_done(self, count: int) -> None:
-        print(f"Done!\nRemoved {count} instances of tags: {self.to_replace}")
+        return self.matcher is not None and bool(self.matcher.match(name))
 
     def get_name(self) -> str:
         return "replace"
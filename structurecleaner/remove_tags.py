@@ -6,18 +6,30 @@ Tag removal logic
 import time
 import os
 import itertools as it
-import anvil  # type: ignore
-from multiprocessing import Pool
+import math
+from functools import partial
 from pathlib import Path
-from typing import Set, Tuple
+from typing import (
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+)
 from structurecleaner.constants import (
-    SEP,
-    NEW_DATA_VERSION,
+    ENTITIES_FOLDER,
+    POI_FOLDER,
+    REGION_FOLDER,
 )
 from structurecleaner.errors import (
+    CorruptChunkError,
     InvalidRegionFileError,
     InvalidFileNameError,
     EmptyFileError,
+    UnsupportedCompressionError,
 )
 
 from structurecleaner.removal_strategies import (
@@ -25,19 +37,372 @@ from structurecleaner.removal_strategies import (
     PurgeRemovalStrategy,
     ListRemovalStrategy,
 )
-from structurecleaner.version_strategies import OldDataVersion, NewDataVersion
+from structurecleaner.output_strategies import (
+    OutputStrategy,
+    CopyOutputStrategy,
+    OUTPUT_STRATEGIES,
+)
+from structurecleaner.compression import DEFAULT_LEVEL, output_compression
+from structurecleaner.executors import (
+    AUTO,
+    PROCESS,
+    WorkerPool,
+    choose_executor,
+    make_pool,
+)
+from structurecleaner.journal import JOURNAL_FILE, Journal
+from structurecleaner.pipeline import DEFAULT_PREFETCH, run_pipeline
+from structurecleaner.nbt_scan import (
+    cut_ranges,
+    scan_chunk,
+    scan_entities,
+    scan_poi,
+)
+from structurecleaner.metrics import MetricsWriter, peak_rss
+from structurecleaner.progress import ProgressCallback
+from structurecleaner.results import (
+    BatchResult,
+    Metrics,
+    RegionResult,
+    RunResult,
+)
+from structurecleaner.region import (
+    DEFAULT_ORDER,
+    RegionReader,
+    RegionWriter,
+    compress_chunk,
+    decompress_chunk,
+    encode_chunk,
+    is_region_file,
+    parse_chunk,
+)
+from structurecleaner.scan_index import INDEX_FILE, ScanIndex, file_digest
+from structurecleaner.shards import Shard, select_shard
+from structurecleaner.selection import Selection
+from structurecleaner.world import chunk_folders, chunk_kind, find_dimensions
+from structurecleaner.version_strategies import EntitiesVersion, PoiVersion
+
+MIN_CHUNK_BATCH = 16  # Smallest number of chunks sent to a worker at once
+
+Task = Tuple[Path, Path]  # A region file and its destination folder
+
+
+class WorkerState(NamedTuple):
+    """What every task of a run shares, sent once to each worker"""
+
+    removal_strategy: RemovalStrategy
+    output_strategy: OutputStrategy
+    level: int = DEFAULT_LEVEL  # Compression level of re-encoded chunks
+    selection: Optional[Selection] = None  # Only clean these chunks
+    # Incremental runs only clean the chunks of a region saved since then
+    watermarks: Optional[Dict[Path, int]] = None
+    # Entity ids and POI types removed from the entities and poi folders
+    entity_strategy: Optional[RemovalStrategy] = None
+    index: bool = False  # Hash the sources, for the scan index
+
+    def strategy_for(self, src: Path) -> RemovalStrategy:
+        """Get the strategy matching the chunk data of a region file"""
+        return _strategy_for(src, self.removal_strategy, self.entity_strategy)
+
+
+# Set in each worker process by _init_worker
+_worker: Optional[WorkerState] = None
+
 
+def _init_worker(state: WorkerState) -> None:
+    """Process pool initializer, keeps the run's strategies in the worker"""
+    global _worker
+    _worker = state
+
+
+def _start_pool(
+    executor: str, jobs: int, state: WorkerState
+) -> Tuple[WorkerPool, Optional[WorkerState]]:
+    """Start the pool of a run. Worker processes get the run's state once,
+    from _init_worker. Thread and inline workers share this process with
+    any other run in it, so the state is bound to their tasks instead.
+
+    Returns:
+        Tuple[WorkerPool, Optional[WorkerState]]: The pool, and the state
+            to bind to its tasks, None for process pools
+    """
+    if executor == PROCESS:
+        return make_pool(executor, jobs, _init_worker, (state,)), None
+    return make_pool(executor, jobs), state
+
+
+def _bind(task: Callable, state: Optional[WorkerState]) -> Callable:
+    """Give the run's state to a task, see _start_pool"""
+    if state is None:
+        return task
+    return partial(task, state=state)
+
+
+def _remove_tags_region_task(
+    task: Task, state: Optional[WorkerState] = None
+) -> RegionResult:
+    """Wrapper for removing tags from a region file,
+    with the strategies of the run (see _start_pool)"""
+    state = state or _worker
+    src, dst = task
+    result = RegionResult(src)
+    start = time.perf_counter()
 
-def _remove_tags_region_task(args: Tuple[Set[str], Path, Path, str]) -> int:
-    """Wrapper for removing tags from a region file"""
     try:
-        return _remove_tags_region(*args)
-    except (InvalidRegionFileError, InvalidFileNameError, EmptyFileError):
+        result.count = _remove_tags_region(
+            state.strategy_for(src),
+            src,
+            dst,
+            state.output_strategy,
+            state.level,
+            result=result,
+            selection=state.selection,
+            since=_watermark(state, src),
+            index=state.index,
+        )
+    except (
+        InvalidRegionFileError,
+        InvalidFileNameError,
+        EmptyFileError,
+    ) as error:
+        result.skipped = True
+        result.error = str(error)
+    except (UnsupportedCompressionError, CorruptChunkError) as error:
+        result.skipped = True
+        result.error = _unreadable(
+            src, dst, state.output_strategy, str(error)
+        )
+
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+def _unreadable(
+    src: Path, dst: Path, output_strategy: OutputStrategy, error: str
+) -> str:
+    """Keep a region with chunks that can't be read as it is, so output
+    that replaces the world's folder doesn't lose it
+
+    Returns:
+        str: The error to report
+    """
+    output_strategy.pass_through(src, dst)
+    return f"{src} can't be read: {error}"
+
+
+def _strategy_for(
+    src: Path,
+    removal_strategy: RemovalStrategy,
+    entity_strategy: RemovalStrategy,
+) -> RemovalStrategy:
+    """Pick the strategy for a region file. Structure tags are only ever
+    matched in region chunks, entities and POI have their own patterns."""
+    if chunk_kind(src) == REGION_FOLDER:
+        return removal_strategy
+    return entity_strategy
+
+
+def _watermark(state: WorkerState, src: Path) -> int:
+    """Get the watermark of a region in the run's state"""
+    if state.watermarks is None:
         return 0
+    return state.watermarks.get(src, 0)
+
+
+def _clean_since(region: RegionReader, since: int) -> int:
+    """Get the time the chunks of a region have to be cleaned from.
+    A region without any chunk saved since its watermark was replaced,
+    e.g. restored from a backup, so all of it is cleaned.
+    """
+    if since and region.latest_timestamp() >= since:
+        return since
+    return 0
+
+
+def _chunks_to_clean(
+    region: RegionReader,
+    chunks: List[Tuple[int, int]],
+    selection: Optional[Selection],
+    since: int,
+) -> List[Tuple[int, int]]:
+    """Pick the chunks of a region that are in the selection and were
+    saved since the given time"""
+    if selection is not None:
+        chunks = selection.select_chunks(region.path, chunks)
+    if since:
+        chunks = [
+            (chunk_x, chunk_z)
+            for chunk_x, chunk_z in chunks
+            if region.timestamp(chunk_x, chunk_z) >= since
+        ]
+    return chunks
+
+
+def _previous_output(
+    src: Path, dst: Path, output_strategy: OutputStrategy, since: int
+) -> Optional[RegionReader]:
+    """Read the region written by the last run, which holds the cleaned
+    versions of the chunks saved before since. A region merged with it
+    has to be written even when no tags are removed now.
+
+    Returns:
+        Optional[RegionReader]: The region, None if those chunks are
+            clean in the source (in place runs, or regions the last run
+            had nothing to remove from)
+    """
+    if not since or output_strategy.modifies_source:
+        return None
+    path = dst / src.name
+    if not path.exists() or path.samefile(src):
+        return None
+    # Read into memory, the file is about to be replaced
+    return RegionReader(path.read_bytes(), path)
+
+
+def _copy_clean_chunks(
+    new_region: RegionWriter,
+    region: RegionReader,
+    previous: RegionReader,
+    since: int,
+) -> None:
+    """Copy the chunks saved before since from the last run's output"""
+    for chunk_x, chunk_z in region.existing_chunks():
+        if region.timestamp(chunk_x, chunk_z) >= since:
+            continue
+        if previous.chunk_location(chunk_x, chunk_z)[0] != 0:
+            new_region.copy_chunk(previous, chunk_x, chunk_z)
+
+
+def _schedule_regions(folders: List[Tuple[Path, Path]]) -> List[Task]:
+    """Order the files of the region folders for processing.
+    Largest files go first so no worker is left with a big region at the
+    end while the others sit idle.
+
+    Only region files (r.X.Z.mca) are scheduled: .mcc files go along with
+    their region file, and other files, like the index and journal of an
+    earlier run, are left alone.
+
+    Args:
+        folders (List[Tuple[Path, Path]]): Source and destination folders
+
+    Returns:
+        List[Task]: The files and their destination folder,
+            from largest to smallest
+    """
+    return sorted(
+        (
+            (path, dst)
+            for src, dst in folders
+            for path in src.iterdir()
+            if is_region_file(path)
+            if path.is_file()
+        ),
+        key=lambda task: task[0].stat().st_size,
+        reverse=True,
+    )
+
+
+def _check_region_file(src: Path) -> None:
+    """Check that src looks like a region file worth processing
+
+    Args:
+        src (Path): The source region file
+
+    Raises:
+        InvalidRegionFileError: If the file is not a valid region file
+        InvalidFileNameError: If the file is not a valid path
+        EmptyFileError: If the file is empty
+    """
+    # Check if it's even an .mca file
+    if len(str(src)) > 4:
+        if str(src)[-1:-5:-1] != "acm.":
+            raise InvalidRegionFileError(f"{src} is not a valid region file.")
+    else:
+        raise InvalidFileNameError(f"{src} is not a valid path.")
+
+    # Check if file isn't empty
+    if os.path.getsize(src) == 0:
+        raise EmptyFileError(f"{src} is empty.")
+
+
+def _clean_chunk(
+    removal_strategy: RemovalStrategy,
+    raw: bytes,
+    removed_tags: Set[str],
+    found_tags: Set[str],
+    metrics: Metrics,
+    kind: str,
+    level: int,
+) -> Tuple[Optional[bytes], int]:
+    """Remove tags from a single chunk record
+
+    Args:
+        removal_strategy (RemovalStrategy): The strategy to use (Purge, List)
+        raw (bytes): The chunk record as stored in the region file
+        removed_tags (Set[str]): Names of removed tags are added here
+        found_tags (Set[str]): Names of all structure tags are added here
+        metrics (Metrics): Time spent in each stage is added here
+        kind (str): The kind of chunk data (region, entities, poi).
+            Entities and points of interest are matched by id and type.
+        level (int): Compression level of re-encoded chunks
+
+    Returns:
+        Tuple[Optional[bytes], int]: The re-encoded chunk record, or None
+            if nothing was removed, and the number of tags removed
+    """
+    metrics.chunks += 1
+    with metrics.timer("decompress"):
+        buffer = decompress_chunk(raw)
+    with metrics.timer("scan"):
+        if kind == ENTITIES_FOLDER:
+            names, version = scan_entities(buffer), EntitiesVersion
+        elif kind == POI_FOLDER:
+            names, version = scan_poi(buffer), PoiVersion
+        else:
+            scan = scan_chunk(buffer)
+            names = scan.starts + scan.references
+
+    found_tags.update(names)
+    if not any(removal_strategy.check_name(name) for name in names):
+        return None, 0
+
+    compression = output_compression(raw[4])
+    metrics.modified += 1
+    if kind == ENTITIES_FOLDER or kind == POI_FOLDER:
+        # Entities and POI are list items, lists hold their length and
+        # have to be rewritten, so these chunks are fully parsed
+        with metrics.timer("parse"):
+            data = parse_chunk(buffer)
+        with metrics.timer("filter"):
+            count = version(removal_strategy).remove_tags(data, removed_tags)
+        with metrics.timer("encode"):
+            new_raw = encode_chunk(data, compression, level)
+        return new_raw, count
+
+    # Structure entries are cut out of the data as they are, the rest of
+    # the chunk is never parsed
+    with metrics.timer("filter"):
+        ranges = []
+        for name, start, end in scan.entries:
+            if removal_strategy.check_name(name):
+                removed_tags.add(name)
+                ranges.append((start, end))
+        buffer = cut_ranges(buffer, ranges)
+    with metrics.timer("encode"):
+        new_raw = compress_chunk(buffer, compression, level)
+    return new_raw, len(ranges)
 
 
 def _remove_tags_region(
-    removal_strategy: RemovalStrategy, src: Path, dst: Path
+    removal_strategy: RemovalStrategy,
+    src: Path,
+    dst: Path,
+    output_strategy: Optional[OutputStrategy] = None,
+    level: int = DEFAULT_LEVEL,
+    result: Optional[RegionResult] = None,
+    selection: Optional[Selection] = None,
+    since: int = 0,
+    index: bool = False,
 ) -> int:
     """Remove tags in to_replace from the src region
 
@@ -45,92 +410,879 @@ def _remove_tags_region(
         removal_strategy (RemovalStrategy): The strategy to use (Purge, List)
         src (Path): The source region file
         dst (Path): Where changes are written to
+        output_strategy (OutputStrategy, optional): How the result is
+            written (Copy, Changed, Link, InPlace). Defaults to Copy.
+        level (int): Compression level of re-encoded chunks
+        result (RegionResult, optional): Removed and found tag names and
+            the state of the source file are recorded here
+        selection (Selection, optional): Only clean the chunks in this
+            area, the others are copied unchanged
+        since (int): Only clean the chunks saved since this time, the
+            others were cleaned by the last run (0 to clean all)
+        index (bool): Hash the source for the scan index
 
     Raises:
         InvalidRegionFileError: If the file is not a valid region file
         InvalidFileNameError: If the file is not a valid path
         EmptyFileError: If the file is empty
-        NotImplementedError: If the file is a newer version than 1.17
+        UnsupportedCompressionError: If a chunk's compression type can't
+            be read
+        CorruptChunkError: If a chunk's data is truncated or damaged
 
     Returns:
         int: The number of times any tag was removed
     """
-    start: float = time.perf_counter()
     count: int = 0
 
-    # Check if it's even an .mca file
-    print("Checking file:", src)
-    if len(str(src)) > 4:
-        if str(src)[-1:-5:-1] != "acm.":
-            print(f"{src} is not a valid region file.")
-            raise InvalidRegionFileError
-    else:
-        print(f"{src} is not a valid path.")
-        raise InvalidFileNameError
+    _check_region_file(src)
 
-    # Check if file isn't empty
-    if os.path.getsize(src) == 0:
-        print(f"{src} is empty.")
-        raise EmptyFileError
-
-    coords = src.name.split(".")
-    region = anvil.Region.from_file(str(src.resolve()))
-    new_region = anvil.EmptyRegion(int(coords[1]), int(coords[2]))
-    removed_tags = set()
-
-    # Check chunks
-    for chunk_x, chunk_z in it.product(range(32), repeat=2):
-        # Chunk Exists
-        if region.chunk_location(chunk_x, chunk_z) != (0, 0):
-            data = region.chunk_data(chunk_x, chunk_z)
-            data_copy = region.chunk_data(chunk_x, chunk_z)
-
-            if int(data["DataVersion"].value) > NEW_DATA_VERSION:
-                strategy = NewDataVersion(removal_strategy)
+    new_region = RegionWriter()
+    if result is None:
+        result = RegionResult(src)
+    if output_strategy is None:
+        output_strategy = CopyOutputStrategy()
+
+    kind = chunk_kind(src)
+    chunks = list(it.product(range(32), repeat=2))
+
+    with RegionReader.from_file(src) as region:
+        since = _clean_since(region, since)
+        selected = set(_chunks_to_clean(region, chunks, selection, since))
+
+        # Check chunks
+        for chunk_x, chunk_z in chunks:
+            if (chunk_x, chunk_z) not in selected:
+                new_region.copy_chunk(region, chunk_x, chunk_z)
+                continue
+
+            raw = region.raw_chunk(chunk_x, chunk_z)
+
+            # Chunk doesn't exist
+            if raw is None:
+                continue
+
+            new_raw, chunk_count = _clean_chunk(
+                removal_strategy,
+                raw,
+                result.removed_tags,
+                result.found_tags,
+                result.metrics,
+                kind,
+                level,
+            )
+            if new_raw is None:
+                new_region.copy_chunk(region, chunk_x, chunk_z)
             else:
-                strategy = OldDataVersion(removal_strategy)
+                count += chunk_count
+                timestamp = region.timestamp(chunk_x, chunk_z)
+                new_region.set_chunk(chunk_x, chunk_z, new_raw, timestamp)
 
-            count += strategy.remove_tags(data, data_copy, removed_tags)
+        previous = _previous_output(src, dst, output_strategy, since)
+        if previous is not None:
+            _copy_clean_chunks(new_region, region, previous, since)
+        result.since = since
+        result.high_water = region.latest_timestamp()
 
-            new_region.add_chunk(anvil.Chunk(data_copy))
+        # Save Region
+        result.metrics.bytes_read = len(region.data)
+        digest = file_digest(region.data) if index else None
+        with result.metrics.timer("write"):
+            written = output_strategy.write(
+                src, dst, new_region, count, previous is not None
+            )
+        if written:
+            result.reclaimed = result.metrics.bytes_read - new_region.size()
 
-    # Save Region
-    new_region.save(str((dst / src.name).resolve()))
+    _record_source(result, digest, output_strategy, written)
+    result.metrics.peak_rss = peak_rss()
+
+    return count
+
+
+def _record_source(
+    result: RegionResult,
+    digest: Optional[str],
+    output_strategy: OutputStrategy,
+    written: bool,
+) -> None:
+    """Record the state of the source file after it has been processed
+
+    Args:
+        result (RegionResult): Where the state is recorded
+        digest (str, optional): Hash of the source region as it was read,
+            if it was hashed for the index
+        output_strategy (OutputStrategy): How the result was written
+        written (bool): Whether the processed region was written
+    """
+    result.digest = digest
+    if written and output_strategy.modifies_source:
+        # The source was replaced by the cleaned region
+        result.digest = None
+        result.found_tags -= result.removed_tags
+
+    stat = result.src.stat()
+    result.size = stat.st_size
+    result.mtime = stat.st_mtime_ns
+
+
+def _remove_tags_batch_task(
+    args: Tuple[Path, List[Tuple[int, int]]],
+    state: Optional[WorkerState] = None,
+) -> BatchResult:
+    """Remove tags from a batch of chunks of one region file,
+    with the strategy of the run (see _start_pool)
+
+    Args:
+        args (Tuple[Path, List[Tuple[int, int]]]): The source region file
+            and the chunks to clean
+        state (WorkerState, optional): The run's state, from _init_worker
+            if not given
+
+    Returns:
+        BatchResult: The re-encoded chunks that had tags removed, or the
+            error if one of them can't be read
+    """
+    src, chunks = args
+    result = BatchResult(src)
+    start = time.perf_counter()
+
+    with RegionReader.from_file(src) as region:
+        try:
+            _clean_batch(state or _worker, region, chunks, result)
+        except (UnsupportedCompressionError, CorruptChunkError) as error:
+            result.error = str(error)
+
+    result.metrics.peak_rss = peak_rss()
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+def _clean_batch(
+    state: WorkerState,
+    region: RegionReader,
+    chunks: List[Tuple[int, int]],
+    result: BatchResult,
+) -> None:
+    """Clean chunks of a region with the strategy of the run.
+    Chunks outside its selection or older than the region's watermark are
+    left out.
 
-    end: float = time.perf_counter()
-    print(
-        f"File {src}: {count} \
-        instances of tags removed in {end - start:.3f} s"
+    Args:
+        state (WorkerState): The run's strategies, selection and watermarks
+        region (RegionReader): The source region
+        chunks (List[Tuple[int, int]]): Local coordinates of the chunks
+        result (BatchResult): The re-encoded chunks are added here
+    """
+    kind = chunk_kind(result.src)
+    removal_strategy = state.strategy_for(result.src)
+    since = _clean_since(region, _watermark(state, result.src))
+    chunks = _chunks_to_clean(region, chunks, state.selection, since)
+
+    for chunk_x, chunk_z in chunks:
+        raw = region.raw_chunk(chunk_x, chunk_z)
+        new_raw, count = _clean_chunk(
+            removal_strategy,
+            raw,
+            result.removed_tags,
+            result.found_tags,
+            result.metrics,
+            kind,
+            state.level,
+        )
+        if new_raw is not None:
+            result.chunks.append((chunk_x, chunk_z, new_raw))
+            result.count += count
+
+
+def _clean_region_data(
+    args: Tuple[Path, bytes], state: Optional[WorkerState] = None
+) -> BatchResult:
+    """Clean every chunk of a region that was already read into memory,
+    with the strategy of the run (see _start_pool)
+
+    Args:
+        args (Tuple[Path, bytes]): The source region file and its contents
+        state (WorkerState, optional): The run's state, from _init_worker
+            if not given
+
+    Returns:
+        BatchResult: The re-encoded chunks that had tags removed, or the
+            error if one of them can't be read
+    """
+    src, data = args
+    result = BatchResult(src)
+    start = time.perf_counter()
+
+    region = RegionReader(data, src)
+    try:
+        _clean_batch(
+            state or _worker, region, region.existing_chunks(), result
+        )
+    except (UnsupportedCompressionError, CorruptChunkError) as error:
+        result.error = str(error)
+
+    result.metrics.peak_rss = peak_rss()
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+def _split_region(src: Path, jobs: int) -> List[List[Tuple[int, int]]]:
+    """Split the chunks of a region into batches for the pool
+
+    Args:
+        src (Path): The source region file
+        jobs (int): Number of processes the batches are shared between
+
+    Returns:
+        List[List[Tuple[int, int]]]: Batches of local chunk coordinates
+    """
+    chunks = RegionReader.header_from_file(src).existing_chunks()
+    size = max(MIN_CHUNK_BATCH, math.ceil(len(chunks) / (jobs * 4)))
+    batches = []
+    for start in range(0, len(chunks), size):
+        end = start + size
+        batches.append(chunks[start:end])
+    return batches
+
+
+def _remove_tags_split(
+    pool: WorkerPool,
+    state: Optional[WorkerState],
+    regions: List[Task],
+    output_strategy: OutputStrategy,
+    jobs: int,
+    watermarks: Dict[Path, int],
+    index: bool = False,
+) -> Iterator[RegionResult]:
+    """Remove tags with the chunks of every region spread over the pool.
+    Regions are reassembled and written as soon as all of their batches
+    are done.
+
+    Args:
+        pool (WorkerPool): The worker pool
+        state (WorkerState, optional): The run's state bound to the tasks,
+            see _start_pool
+        regions (List[Task]): The source region files and destinations
+        output_strategy (OutputStrategy): How the results are written
+        jobs (int): Number of workers in the pool
+        watermarks (Dict[Path, int]): Regions only cleaned from a time on
+        index (bool): Hash the sources for the scan index
+
+    Yields:
+        RegionResult: The result of every region as it is finished
+    """
+    tasks = []
+    pending: Dict[Path, int] = {}
+    destinations: Dict[Path, Path] = {}
+    results: Dict[Path, RegionResult] = {}
+    chunks: Dict[Path, List[Tuple[int, int, bytes]]] = {}
+
+    for src, dst in regions:
+        try:
+            _check_region_file(src)
+        except (
+            InvalidRegionFileError,
+            InvalidFileNameError,
+            EmptyFileError,
+        ) as error:
+            yield RegionResult(src, skipped=True, error=str(error))
+            continue
+
+        batches = _split_region(src, jobs)
+        results[src] = RegionResult(src)
+        chunks[src] = []
+        destinations[src] = dst
+        pending[src] = len(batches)
+        tasks.extend((src, batch) for batch in batches)
+
+        # Regions without chunks are written straight away
+        if not batches:
+            with RegionReader.from_file(src) as region:
+                result = _assemble_region(
+                    region,
+                    dst,
+                    output_strategy,
+                    [],
+                    results.pop(src),
+                    watermarks.get(src, 0),
+                    index,
+                )
+            yield result
+
+    task = _bind(_remove_tags_batch_task, state)
+    for batch in pool.imap_unordered(task, tasks):
+        result = results[batch.src]
+        result.error = result.error or batch.error
+        result.count += batch.count
+        result.removed_tags |= batch.removed_tags
+        result.found_tags |= batch.found_tags
+        result.seconds += batch.seconds
+        result.metrics.add(batch.metrics)
+        chunks[batch.src].extend(batch.chunks)
+
+        pending[batch.src] -= 1
+        if pending[batch.src] == 0 and result.error:
+            error = _unreadable(
+                batch.src,
+                destinations.pop(batch.src),
+                output_strategy,
+                results.pop(batch.src).error,
+            )
+            chunks.pop(batch.src)
+            yield RegionResult(
+                batch.src, skipped=True, error=error, seconds=result.seconds
+            )
+        elif pending[batch.src] == 0:
+            with RegionReader.from_file(batch.src) as region:
+                result = _assemble_region(
+                    region,
+                    destinations.pop(batch.src),
+                    output_strategy,
+                    chunks.pop(batch.src),
+                    results.pop(batch.src),
+                    watermarks.get(batch.src, 0),
+                    index,
+                )
+            yield result
+
+
+def _assemble_region(
+    region: RegionReader,
+    dst: Path,
+    output_strategy: OutputStrategy,
+    chunks: List[Tuple[int, int, bytes]],
+    result: RegionResult,
+    since: int = 0,
+    index: bool = False,
+) -> RegionResult:
+    """Write a region back together from its cleaned chunks
+
+    Args:
+        region (RegionReader): The source region
+        dst (Path): The destination folder
+        output_strategy (OutputStrategy): How the result is written
+        chunks (List[Tuple[int, int, bytes]]): The re-encoded chunks
+        result (RegionResult): The region's result, without the state of
+            the source file yet
+        since (int): Chunks saved before this time were cleaned by the
+            last run
+        index (bool): Hash the source for the scan index
+
+    Returns:
+        RegionResult: The result of the region
+    """
+    src = result.src
+    new_region = RegionWriter()
+    since = _clean_since(region, since)
+
+    for chunk_x, chunk_z in region.existing_chunks():
+        new_region.copy_chunk(region, chunk_x, chunk_z)
+    previous = _previous_output(src, dst, output_strategy, since)
+    if previous is not None:
+        _copy_clean_chunks(new_region, region, previous, since)
+    for chunk_x, chunk_z, raw in chunks:
+        timestamp = region.timestamp(chunk_x, chunk_z)
+        new_region.set_chunk(chunk_x, chunk_z, raw, timestamp)
+    result.since = since
+    result.high_water = region.latest_timestamp()
+
+    result.metrics.bytes_read = len(region.data)
+    digest = file_digest(region.data) if index else None
+    with result.metrics.timer("write"):
+        written = output_strategy.write(
+            src, dst, new_region, result.count, previous is not None
+        )
+    if written:
+        result.reclaimed = result.metrics.bytes_read - new_region.size()
+
+    _record_source(result, digest, output_strategy, written)
+    return result
+
+
+def _remove_tags_pipeline(
+    pool: WorkerPool,
+    state: Optional[WorkerState],
+    regions: List[Task],
+    output_strategy: OutputStrategy,
+    limit: int,
+    watermarks: Dict[Path, int],
+    index: bool = False,
+) -> Iterator[RegionResult]:
+    """Remove tags with reads, cleaning and writes overlapping: regions
+    are prefetched by reader threads, cleaned by the pool and written by
+    a writer thread.
+
+    Args:
+        pool (WorkerPool): The worker pool
+        state (WorkerState, optional): The run's state bound to the tasks,
+            see _start_pool
+        regions (List[Task]): The source region files and destinations
+        output_strategy (OutputStrategy): How the results are written
+        limit (int): Most regions held in memory at once
+        watermarks (Dict[Path, int]): Regions only cleaned from a time on
+        index (bool): Hash the sources for the scan index
+
+    Yields:
+        RegionResult: The result of every region as it is written
+    """
+    destinations: Dict[Path, Tuple[Path, bytes]] = {}
+    tasks = []
+
+    for src, dst in regions:
+        try:
+            _check_region_file(src)
+        except (
+            InvalidRegionFileError,
+            InvalidFileNameError,
+            EmptyFileError,
+        ) as error:
+            yield RegionResult(src, skipped=True, error=str(error))
+            continue
+        tasks.append((src, dst))
+
+    def read(task: Task) -> Tuple[Path, bytes]:
+        src, dst = task
+        data = src.read_bytes()
+        destinations[src] = (dst, data)
+        return src, data
+
+    def write(batch: BatchResult) -> RegionResult:
+        dst, data = destinations.pop(batch.src)
+        if batch.error:
+            error = _unreadable(batch.src, dst, output_strategy, batch.error)
+            return RegionResult(batch.src, skipped=True, error=error)
+
+        result = RegionResult(
+            batch.src,
+            count=batch.count,
+            removed_tags=batch.removed_tags,
+            found_tags=batch.found_tags,
+            seconds=batch.seconds,
+            metrics=batch.metrics,
+        )
+        region = RegionReader(data, batch.src)
+        since = watermarks.get(batch.src, 0)
+        return _assemble_region(
+            region, dst, output_strategy, batch.chunks, result, since, index
+        )
+
+    clean = _bind(_clean_region_data, state)
+    yield from run_pipeline(tasks, read, clean, write, pool, limit)
+
+
+def _remove_tags_folders(
+    removal_strategy: RemovalStrategy,
+    entity_strategy: RemovalStrategy,
+    folders: List[Tuple[Path, Path]],
+    jobs: int,
+    output_strategy: OutputStrategy,
+    split: bool,
+    index: Optional[ScanIndex],
+    metrics: Optional[Path],
+    progress: Optional[ProgressCallback],
+    level: int,
+    executor: str,
+    prefetch: int,
+    selection: Optional[Selection],
+    incremental: bool,
+    journal: Journal,
+    shard: Optional[Shard],
+    manifest: Optional[Path] = None,
+) -> RunResult:
+    """Removes tags from the region files of several folders with one pool
+
+    Args:
+        removal_strategy (RemovalStrategy): The strategy to use (Purge, List)
+        entity_strategy (RemovalStrategy): The strategy for the entities
+            and poi folders
+        folders (List[Tuple[Path, Path]]): Source and destination folders
+        jobs (int): Number of workers to use
+        output_strategy (OutputStrategy): How the results are written
+        split (bool): Spread the chunks of each region over all workers
+        index (ScanIndex, optional): Index used to skip unchanged regions
+        metrics (Path, optional): JSON lines file for per-region metrics
+        progress (ProgressCallback, optional): Called when the regions are
+            scheduled and every time one is finished
+        level (int): Compression level of re-encoded chunks
+        executor (str): Worker pool to use (auto, process, thread, inline)
+        prefetch (int): Regions read ahead of the workers, 0 to have every
+            worker read and write its own regions
+        selection (Selection, optional): Only clean this area of the world.
+            Regions outside it are kept as they are, partly cleaned
+            regions are left out of the index.
+        incremental (bool): Only clean the chunks saved since the last
+            run, as recorded in the index
+        journal (Journal): Records finished regions, regions it already
+            holds are skipped when resuming
+        shard (Shard, optional): Only clean this shard's regions
+        manifest (Path, optional): Where the shards of the run share how
+            the regions are split between them
+
+    Returns:
+        RunResult: What happened to every region
+    """
+    regions = _schedule_regions(folders)
+    if shard is not None:
+        regions = select_shard(regions, folders, shard, manifest)
+    run = RunResult(total=len(regions))
+
+    # Regions outside the selection are kept by name, without reading them
+    if selection is not None:
+        outside = [
+            (src, dst)
+            for src, dst in regions
+            if not selection.contains_file(src)
+        ]
+        for src, dst in outside:
+            output_strategy.keep(src, dst)
+        regions = [task for task in regions if task not in outside]
+        run.outside = [src for src, _ in outside]
+
+    if journal.done:
+        run.resumed = [src for src, _ in regions if journal.is_done(src)]
+        resumed = set(run.resumed)
+        regions = [task for task in regions if task[0] not in resumed]
+
+    def strategy_for(src: Path) -> RemovalStrategy:
+        return _strategy_for(src, removal_strategy, entity_strategy)
+
+    if index is not None:
+        unchanged = {
+            (src, dst)
+            for src, dst in regions
+            if index.can_skip(src, strategy_for(src), incremental)
+        }
+        # Incremental runs leave the last run's output as it is
+        if not incremental:
+            for src, dst in unchanged:
+                output_strategy.keep(src, dst)
+        regions = [task for task in regions if task not in unchanged]
+        run.unchanged = sorted(src for src, _ in unchanged)
+
+    watermarks: Dict[Path, int] = {}
+    if incremental and index is not None:
+        for src, _ in regions:
+            since = index.watermark(src, strategy_for(src))
+            if since:
+                watermarks[src] = since
+
+    run.total_bytes = sum(src.stat().st_size for src, _ in regions)
+    run.jobs = max(jobs, 1)
+    run.executor = choose_executor(executor, run.jobs, run.total_bytes)
+    if progress is not None:
+        progress(run, None)
+
+    # Partly cleaned regions are left out of the index, sources are only
+    # hashed for the regions that go into it
+    indexed = index is not None and selection is None
+    state = WorkerState(
+        removal_strategy,
+        output_strategy,
+        level,
+        selection,
+        watermarks,
+        entity_strategy,
+        indexed,
     )
+    pool, bound = _start_pool(run.executor, run.jobs, state)
 
-    removal_strategy.print_find(removed_tags)
+    with pool, MetricsWriter(metrics) as writer, journal:
+        start = time.perf_counter()
+        if split:
+            results = _remove_tags_split(
+                pool,
+                bound,
+                regions,
+                output_strategy,
+                run.jobs,
+                watermarks,
+                indexed,
+            )
+        elif prefetch > 0:
+            results = _remove_tags_pipeline(
+                pool,
+                bound,
+                regions,
+                output_strategy,
+                run.jobs + prefetch,
+                watermarks,
+                indexed,
+            )
+        else:
+            task = _bind(_remove_tags_region_task, bound)
+            results = pool.imap_unordered(task, regions)
 
-    return count
+        for result in results:
+            run.count += result.count
+            run.regions.append(result)
+            writer.write(result)
+            journal.record(result)
+            if indexed:
+                index.update(result)
+            if progress is not None:
+                progress(run, result)
+        run.seconds = time.perf_counter() - start
+
+    if index is not None:
+        index.save()
+    journal.finish()
+    return run
+
+
+def _get_strategies(
+    tags: Set[str],
+    mode: str,
+    output: str,
+    compact: bool = False,
+    chunk_order: str = DEFAULT_ORDER,
+) -> Tuple[RemovalStrategy, OutputStrategy]:
+    """Create the removal and output strategies for a run"""
+    if mode == "purge":
+        removal_strategy = PurgeRemovalStrategy()
+    else:
+        removal_strategy = ListRemovalStrategy(tags)
+
+    return removal_strategy, OUTPUT_STRATEGIES[output](compact, chunk_order)
+
+
+def _get_entity_strategy(
+    entities: bool, entity_tags: Optional[Set[str]]
+) -> RemovalStrategy:
+    """Create the strategy for the entities and poi folders. Entities and
+    POI of mods that are still installed live there too, so only the ids
+    and types given are removed, never everything that isn't vanilla.
+
+    Raises:
+        ValueError: If entities are cleaned without any entity tags
+    """
+    if entities and not entity_tags:
+        raise ValueError("Cleaning entities needs the entity_tags to remove")
+    return ListRemovalStrategy(set(entity_tags or ()))
+
+
+def _state_folder(src: Path, dst: Path, output: str) -> Path:
+    """Get the folder the index and journal of a run are kept in: dst,
+    or next to src when it is cleaned in place, so the run's state is
+    never written into the region folder it cleans"""
+    return src.parent if output == "inplace" else dst
+
+
+def _run_state(
+    dst: Path,
+    index: bool,
+    resume: bool,
+    shard: Optional[Shard],
+) -> Tuple[Optional[ScanIndex], Journal, Optional[Path]]:
+    """Load the index and journal of a run, every shard keeps its own.
+    Also get the manifest the shards share their split in."""
+    index_name, journal_name = INDEX_FILE, JOURNAL_FILE
+    manifest = None
+    if shard is not None:
+        index_name = shard.file_name(index_name)
+        journal_name = shard.file_name(journal_name)
+        manifest = dst / shard.manifest_name
+    scan_index = ScanIndex.load(dst, index_name) if index else None
+    return scan_index, Journal(dst, resume, journal_name), manifest
 
 
 def remove_tags(
-    tags: Set[str], src: Path, dst: Path, jobs: int, mode: str
-) -> None:
+    tags: Set[str],
+    src: Path,
+    dst: Path,
+    jobs: int,
+    mode: str,
+    output: str = "copy",
+    split: bool = False,
+    index: bool = False,
+    metrics: Optional[Path] = None,
+    progress: Optional[ProgressCallback] = None,
+    entities: bool = False,
+    compression_level: int = DEFAULT_LEVEL,
+    executor: str = AUTO,
+    prefetch: int = DEFAULT_PREFETCH,
+    selection: Optional[Selection] = None,
+    incremental: bool = False,
+    resume: bool = False,
+    shard: Optional[Shard] = None,
+    compact: bool = False,
+    chunk_order: str = DEFAULT_ORDER,
+    entity_tags: Optional[Set[str]] = None,
+) -> RunResult:
     """Removes tags from src region files and writes them to dst
 
     Args:
         tags (Set[str]): Tags to be removed
         src (Path): The source region files
         dst (Path): The destination folder
-        jobs (int): Number of processes to use
+        jobs (int): Number of workers to use
         mode (str): Purge or remove strategy
+        output (str): Output strategy (copy, changed, link, inplace)
+        split (bool): Spread the chunks of each region over all processes
+            instead of giving each process a whole region
+        index (bool): Keep an index in dst to skip unchanged regions.
+            Inplace runs keep it and the journal next to src instead.
+        metrics (Path, optional): Write per-region metrics to this file
+        progress (ProgressCallback, optional): Called when the regions are
+            scheduled and every time one is finished, nothing is printed
+        entities (bool): Also clean the entities and poi folders next to
+            src, into the matching folders next to dst (e.g. new_entities).
+            Needs entity_tags.
+        compression_level (int): Compression level of cleaned chunks,
+            1 (fast) to 9 (small)
+        executor (str): Worker pool to use (auto, process, thread, inline)
+        prefetch (int): Regions read ahead of the workers, 0 to have every
+            worker read and write its own regions
+        selection (Selection, optional): Only clean this area of the world
+        incremental (bool): Only clean the chunks saved since the last
+            run, from the chunk timestamps. Keeps an index like index.
+        resume (bool): Skip the regions finished by an interrupted run
+            into dst, from the journal it left there
+        shard (Shard, optional): Only clean one shard of the regions, for
+            runs split over several machines sharing src and dst
+        compact (bool): Also rewrite regions without tags to remove when
+            that makes them smaller, instead of keeping them as they are
+        chunk_order (str): Order chunks are laid out in written regions,
+            zx (row by row) or morton (Z-order curve)
+        entity_tags (Set[str], optional): Entity ids and POI types removed
+            from the entities and poi folders, with the same patterns as
+            tags. Purge mode doesn't apply to them.
+
+    Raises:
+        ValueError: If entities is set without entity_tags
+
+    Returns:
+        RunResult: What happened to every region
     """
-    if mode == "purge":
-        removal_strategy = PurgeRemovalStrategy()
-    else:
-        removal_strategy = ListRemovalStrategy(tags)
+    removal_strategy, output_strategy = _get_strategies(
+        tags, mode, output, compact, chunk_order
+    )
+    entity_strategy = _get_entity_strategy(entities, entity_tags)
+    folders = [(src, dst)]
+    if entities:
+        folders = chunk_folders(folders)
 
-    with Pool(processes=jobs) as pool:
-        start = time.perf_counter()
-        data = zip(it.repeat(removal_strategy), src.iterdir(), it.repeat(dst))
-        count = sum(pool.map(_remove_tags_region_task, data))
-        end = time.perf_counter()
+    scan_index, journal, manifest = _run_state(
+        _state_folder(src, dst, output), index or incremental, resume, shard
+    )
+    return _remove_tags_folders(
+        removal_strategy,
+        entity_strategy,
+        folders,
+        jobs,
+        output_strategy,
+        split,
+        scan_index,
+        metrics,
+        progress,
+        compression_level,
+        executor,
+        prefetch,
+        selection,
+        incremental,
+        journal,
+        shard,
+        manifest,
+    )
+
+
+def remove_tags_world(
+    tags: Set[str],
+    world: Path,
+    dst: Path,
+    jobs: int,
+    mode: str,
+    output: str = "copy",
+    split: bool = False,
+    index: bool = False,
+    metrics: Optional[Path] = None,
+    progress: Optional[ProgressCallback] = None,
+    entities: bool = False,
+    compression_level: int = DEFAULT_LEVEL,
+    executor: str = AUTO,
+    prefetch: int = DEFAULT_PREFETCH,
+    selection: Optional[Selection] = None,
+    incremental: bool = False,
+    resume: bool = False,
+    shard: Optional[Shard] = None,
+    compact: bool = False,
+    chunk_order: str = DEFAULT_ORDER,
+    entity_tags: Optional[Set[str]] = None,
+) -> RunResult:
+    """Removes tags from the region files of every dimension in a world.
+    All dimensions share one pool, new region folders are created in dst
+    with the same layout as the world (e.g. dst/DIM-1/region).
 
-        print(SEP)
-        removal_strategy.print_done(count)
-        print(f"Took {end - start:.3f} seconds")
+    Args:
+        tags (Set[str]): Tags to be removed
+        world (Path): The world folder
+        dst (Path): The destination folder
+        jobs (int): Number of workers to use
+        mode (str): Purge or remove strategy
+        output (str): Output strategy (copy, changed, link, inplace)
+        split (bool): Spread the chunks of each region over all processes
+        index (bool): Keep an index in dst to skip unchanged regions
+        metrics (Path, optional): Write per-region metrics to this file
+        progress (ProgressCallback, optional): Called when the regions are
+            scheduled and every time one is finished, nothing is printed
+        entities (bool): Also clean the entities and poi folders of every
+            dimension. Needs entity_tags.
+        compression_level (int): Compression level of cleaned chunks,
+            1 (fast) to 9 (small)
+        executor (str): Worker pool to use (auto, process, thread, inline)
+        prefetch (int): Regions read ahead of the workers, 0 to have every
+            worker read and write its own regions
+        selection (Selection, optional): Only clean this area of the world
+        incremental (bool): Only clean the chunks saved since the last
+            run, from the chunk timestamps. Keeps an index like index.
+        resume (bool): Skip the regions finished by an interrupted run
+            into dst, from the journal it left there
+        shard (Shard, optional): Only clean one shard of the regions, for
+            runs split over several machines sharing src and dst
+        compact (bool): Also rewrite regions without tags to remove when
+            that makes them smaller, instead of keeping them as they are
+        chunk_order (str): Order chunks are laid out in written regions,
+            zx (row by row) or morton (Z-order curve)
+        entity_tags (Set[str], optional): Entity ids and POI types removed
+            from the entities and poi folders, with the same patterns as
+            tags. Purge mode doesn't apply to them.
+
+    Raises:
+        ValueError: If entities is set without entity_tags
+
+    Returns:
+        RunResult: What happened to every region
+    """
+    removal_strategy, output_strategy = _get_strategies(
+        tags, mode, output, compact, chunk_order
+    )
+    entity_strategy = _get_entity_strategy(entities, entity_tags)
+
+    folders = []
+    for dimension in find_dimensions(world):
+        (dst / dimension).mkdir(parents=True, exist_ok=True)
+        folders.append((world / dimension, dst / dimension))
+    if entities:
+        folders = chunk_folders(folders)
+
+    scan_index, journal, manifest = _run_state(
+        dst, index or incremental, resume, shard
+    )
+    return _remove_tags_folders(
+        removal_strategy,
+        entity_strategy,
+        folders,
+        jobs,
+        output_strategy,
+        split,
+        scan_index,
+        metrics,
+        progress,
+        compression_level,
+        executor,
+        prefetch,
+        selection,
+        incremental,
+        journal,
+        shard,
+        manifest,
+    )
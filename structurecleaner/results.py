@@ -0,0 +1,168 @@
+"""
+MC Structure Cleaner
+Results reported back from the workers
+"""
+
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field, fields
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+
+@dataclass
+class Metrics:
+    """What it took to clean a region, or a batch of its chunks"""
+
+    bytes_read: int = 0
+    chunks: int = 0  # Chunks scanned
+    modified: int = 0  # Chunks that had tags removed
+    decompress: float = 0.0
+    scan: float = 0.0
+    parse: float = 0.0
+    filter: float = 0.0
+    encode: float = 0.0
+    write: float = 0.0
+    peak_rss: int = 0
+
+    @contextmanager
+    def timer(self, stage: str) -> Iterator[None]:
+        """Add the time spent in the block to a stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            setattr(self, stage, getattr(self, stage) + elapsed)
+
+    def add(self, other: "Metrics") -> None:
+        """Add the metrics of another region or batch to these"""
+        for metric in fields(self):
+            if metric.name == "peak_rss":
+                self.peak_rss = max(self.peak_rss, other.peak_rss)
+            else:
+                value = getattr(other, metric.name)
+                setattr(self, metric.name, getattr(self, metric.name) + value)
+
+
+@dataclass
+class RegionResult:
+    """What happened to a single region file"""
+
+    src: Path
+    count: int = 0
+    removed_tags: Set[str] = field(default_factory=set)
+    seconds: float = 0.0
+    skipped: bool = False
+    error: str = ""  # Why the region was skipped
+    unchanged: bool = False
+
+    # State of the source file after processing, for the scan index
+    found_tags: Set[str] = field(default_factory=set)
+    size: int = 0
+    mtime: int = 0
+    digest: Optional[str] = None
+    high_water: int = 0  # Last time any chunk of the source was saved
+    since: int = 0  # Only chunks saved since then were cleaned, if set
+    reclaimed: int = 0  # Bytes the written region is smaller than src
+
+    metrics: Metrics = field(default_factory=Metrics)
+
+
+@dataclass
+class RunResult:
+    """What happened in a whole run, returned by remove_tags"""
+
+    regions: List[RegionResult] = field(default_factory=list)
+    unchanged: List[Path] = field(default_factory=list)  # Skipped by index
+    resumed: List[Path] = field(default_factory=list)  # Done before resuming
+    outside: List[Path] = field(default_factory=list)  # Not in the selection
+    total: int = 0  # Region files in the run, unchanged ones included
+    total_bytes: int = 0  # Size of the region files to process
+    count: int = 0  # Tags removed
+    seconds: float = 0.0
+    jobs: int = 0
+    executor: str = ""
+
+    @property
+    def done(self) -> int:
+        """Number of region files that are finished"""
+        return (
+            len(self.unchanged)
+            + len(self.resumed)
+            + len(self.outside)
+            + len(self.regions)
+        )
+
+    @property
+    def removed_tags(self) -> Set[str]:
+        """Names of the tags removed from any region"""
+        return set().union(*(result.removed_tags for result in self.regions))
+
+    @property
+    def reclaimed(self) -> int:
+        """Bytes the written regions are smaller than their sources"""
+        return sum(result.reclaimed for result in self.regions)
+
+    @property
+    def skipped(self) -> List[Path]:
+        """Files that couldn't be processed"""
+        return [result.src for result in self.regions if result.skipped]
+
+    @property
+    def errors(self) -> Dict[Path, str]:
+        """Why each skipped file couldn't be processed"""
+        return {
+            result.src: result.error for result in self.regions if result.error
+        }
+
+
+@dataclass
+class BatchResult:
+    """Chunks cleaned from one batch of a split region"""
+
+    src: Path
+    chunks: List[Tuple[int, int, bytes]] = field(default_factory=list)
+    count: int = 0
+    removed_tags: Set[str] = field(default_factory=set)
+    found_tags: Set[str] = field(default_factory=set)
+    seconds: float = 0.0
+    error: str = ""  # Why the region couldn't be cleaned
+    metrics: Metrics = field(default_factory=Metrics)
+
+
+@dataclass
+class ScanResult:
+    """Structure tags found in a single region file, nothing is written"""
+
+    src: Path
+    starts: Counter = field(default_factory=Counter)
+    references: Counter = field(default_factory=Counter)
+    chunks: int = 0
+    size: int = 0  # Size of the region file
+    seconds: float = 0.0
+    skipped: bool = False
+    error: str = ""  # Why the region was skipped
+
+    @property
+    def count(self) -> int:
+        """Number of Starts and References entries found"""
+        return sum(self.starts.values()) + sum(self.references.values())
+
+
+@dataclass
+class ScanRun:
+    """A whole scan, reported to the progress callback of scan_tags"""
+
+    regions: List[ScanResult] = field(default_factory=list)
+    total: int = 0  # Region files in the scan
+    total_bytes: int = 0  # Size of the region files
+    seconds: float = 0.0
+    jobs: int = 0
+    executor: str = ""
+
+    @property
+    def done(self) -> int:
+        """Number of region files that are finished"""
+        return len(self.regions)
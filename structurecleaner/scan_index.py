@@ -0,0 +1,145 @@
+"""
+MC Structure Cleaner
+Persistent index of scanned regions
+
+Remembers the size, modification time, content hash and structure tag
+names of every processed region, so later runs can skip regions that
+haven't changed and hold nothing the current strategy would remove.
+
+For incremental runs it also remembers when the newest chunk of every
+region was saved (its high-water mark) and the tags left in the written
+region, so only chunks saved since then have to be cleaned.
+"""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, Optional
+from structurecleaner.files import write_atomic
+from structurecleaner.removal_strategies import RemovalStrategy
+from structurecleaner.results import RegionResult
+
+INDEX_FILE = ".structurecleaner-index.json"
+INDEX_VERSION = 1
+
+
+def file_digest(data: bytes) -> str:
+    """Hash the contents of a region file"""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class ScanIndex:
+    path: Path
+    entries: Dict[str, dict]
+
+    def __init__(self, path: Path, entries: Optional[Dict[str, dict]] = None):
+        self.path = path
+        self.entries = {} if entries is None else entries
+
+    @classmethod
+    def load(cls, folder: Path, name: str = INDEX_FILE) -> "ScanIndex":
+        """Load the index of a folder, or start a new one
+
+        Args:
+            folder (Path): The folder the index is kept in
+            name (str): File name of the index
+
+        Returns:
+            ScanIndex: The loaded index, empty if it is missing or invalid
+        """
+        path = folder / name
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return cls(path)
+
+        if data.get("version") != INDEX_VERSION:
+            return cls(path)
+        return cls(path, data["regions"])
+
+    def save(self) -> None:
+        data = {"version": INDEX_VERSION, "regions": self.entries}
+        write_atomic(self.path, json.dumps(data, indent=1).encode("utf-8"))
+
+    def can_skip(
+        self,
+        src: Path,
+        removal_strategy: RemovalStrategy,
+        written: bool = False,
+    ) -> bool:
+        """Check if a region is unchanged since it was indexed and holds no
+        tags the strategy would remove.
+
+        Args:
+            src (Path): The source region file
+            removal_strategy (RemovalStrategy): The strategy to use
+            written (bool): Check the region the last run wrote instead of
+                the source, for runs that keep the last output
+
+        Returns:
+            bool: True if the region doesn't need to be processed
+        """
+        entry = self.entries.get(str(src.resolve()))
+        if entry is None:
+            return False
+
+        tags = entry.get("kept", entry["tags"]) if written else entry["tags"]
+        if any(removal_strategy.check_name(tag) for tag in tags):
+            return False
+
+        stat = src.stat()
+        if stat.st_size != entry["size"]:
+            return False
+        if stat.st_mtime_ns == entry["mtime"]:
+            return True
+
+        # Touched but possibly identical, e.g. restored from a backup
+        digest = entry["digest"]
+        if digest is None or file_digest(src.read_bytes()) != digest:
+            return False
+        entry["mtime"] = stat.st_mtime_ns
+        return True
+
+    def watermark(self, src: Path, removal_strategy: RemovalStrategy) -> int:
+        """Get the time chunks of a region have been cleaned up to
+
+        Args:
+            src (Path): The source region file
+            removal_strategy (RemovalStrategy): The strategy to use
+
+        Returns:
+            int: Chunks saved before this time (epoch seconds) are already
+                clean, 0 if the whole region has to be cleaned
+        """
+        entry = self.entries.get(str(src.resolve()))
+        if entry is None or "high_water" not in entry:
+            return 0
+
+        # Cleaned with a strategy that left tags this one removes
+        if any(removal_strategy.check_name(tag) for tag in entry["kept"]):
+            return 0
+        return entry["high_water"]
+
+    def update(self, result: RegionResult) -> None:
+        """Record the state of a processed region"""
+        if result.skipped:
+            return
+
+        key = str(result.src.resolve())
+        tags = result.found_tags
+        kept = result.found_tags - result.removed_tags
+        previous = self.entries.get(key)
+        if result.since and previous is not None:
+            # Only new chunks were scanned, the others keep their tags
+            tags = tags | set(previous["tags"])
+            kept = kept | set(previous.get("kept", ()))
+
+        self.entries[key] = {
+            "size": result.size,
+            "mtime": result.mtime,
+            "digest": result.digest,
+            "tags": sorted(tags),
+            "kept": sorted(kept),
+            "high_water": result.high_water,
+        }
@@ -0,0 +1,205 @@
+"""
+MC Structure Cleaner
+Read-only inventory of the structure tags in a world
+
+Like cleaning runs, scans don't print anything, they return the report
+and report progress to an optional callback.
+"""
+
+import csv
+import json
+import time
+import itertools as it
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+from structurecleaner.errors import (
+    CorruptChunkError,
+    InvalidRegionFileError,
+    InvalidFileNameError,
+    EmptyFileError,
+    UnsupportedCompressionError,
+)
+from structurecleaner.executors import AUTO, choose_executor, make_pool
+from structurecleaner.nbt_scan import scan_chunk
+from structurecleaner.progress import ScanProgressCallback
+from structurecleaner.region import RegionReader, decompress_chunk
+from structurecleaner.removal_strategies import PurgeRemovalStrategy
+from structurecleaner.remove_tags import _check_region_file, _schedule_regions
+from structurecleaner.results import ScanResult, ScanRun
+from structurecleaner.world import find_dimensions
+
+Report = Dict[str, dict]
+
+
+def _scan_region_task(src: Path) -> ScanResult:
+    """Count the structure tags in a region file without changing it"""
+    result = ScanResult(src, size=src.stat().st_size)
+    start = time.perf_counter()
+
+    try:
+        _check_region_file(src)
+    except (
+        InvalidRegionFileError,
+        InvalidFileNameError,
+        EmptyFileError,
+    ) as error:
+        result.skipped = True
+        result.error = str(error)
+        return result
+
+    with RegionReader.from_file(src) as region:
+        for chunk_x, chunk_z in it.product(range(32), repeat=2):
+            raw = region.raw_chunk(chunk_x, chunk_z)
+            if raw is None:
+                continue
+
+            try:
+                scan = scan_chunk(decompress_chunk(raw))
+            except (UnsupportedCompressionError, CorruptChunkError) as error:
+                result.skipped = True
+                result.error = f"{src} can't be read: {error}"
+                return result
+            result.starts.update(scan.starts)
+            result.references.update(scan.references)
+            result.chunks += 1
+
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+def build_report(results: Iterable[ScanResult]) -> Report:
+    """Combine region scans into a world wide inventory
+
+    Args:
+        results (Iterable[ScanResult]): The scanned regions
+
+    Returns:
+        Report: For every tag name, the number of Starts and References
+            entries, whether purge mode would remove it, and the regions
+            it appears in. Sorted from most to least common.
+    """
+    purge = PurgeRemovalStrategy()
+    report: Report = {}
+
+    for result in results:
+        for name in result.starts.keys() | result.references.keys():
+            entry = report.setdefault(
+                name,
+                {
+                    "starts": 0,
+                    "references": 0,
+                    "modded": purge.check_name(name),
+                    "regions": [],
+                },
+            )
+            entry["starts"] += result.starts[name]
+            entry["references"] += result.references[name]
+            entry["regions"].append(str(result.src))
+
+    for entry in report.values():
+        entry["regions"].sort()
+
+    return dict(
+        sorted(
+            report.items(),
+            key=lambda item: item[1]["starts"] + item[1]["references"],
+            reverse=True,
+        )
+    )
+
+
+def write_report(report: Report, path: Path) -> None:
+    """Save a report as CSV if path ends in .csv, as JSON otherwise
+
+    Args:
+        report (Report): The inventory to save
+        path (Path): Where to save it
+    """
+    if path.suffix.lower() != ".csv":
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+        return
+
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["tag", "starts", "references", "modded", "regions"])
+        for name, entry in report.items():
+            writer.writerow(
+                [
+                    name,
+                    entry["starts"],
+                    entry["references"],
+                    entry["modded"],
+                    " ".join(entry["regions"]),
+                ]
+            )
+
+
+def _scan_folders(
+    folders: List[Path],
+    jobs: int,
+    progress: Optional[ScanProgressCallback],
+    executor: str,
+) -> Report:
+    """Scan the region files of several folders with one pool"""
+    regions = [src for src, _ in _schedule_regions([(f, f) for f in folders])]
+    run = ScanRun(total=len(regions), jobs=max(jobs, 1))
+    run.total_bytes = sum(src.stat().st_size for src in regions)
+    run.executor = choose_executor(executor, run.jobs, run.total_bytes)
+    if progress is not None:
+        progress(run, None)
+
+    with make_pool(run.executor, run.jobs) as pool:
+        start = time.perf_counter()
+        for result in pool.imap_unordered(_scan_region_task, regions):
+            run.regions.append(result)
+            if progress is not None:
+                progress(run, result)
+        run.seconds = time.perf_counter() - start
+
+    return build_report(
+        result for result in run.regions if not result.skipped
+    )
+
+
+def scan_tags(
+    src: Path,
+    jobs: int,
+    progress: Optional[ScanProgressCallback] = None,
+    executor: str = AUTO,
+) -> Report:
+    """Inventory the structure tags of a region folder
+
+    Args:
+        src (Path): The source region files
+        jobs (int): Number of workers to use
+        progress (ScanProgressCallback, optional): Called when the regions
+            are scheduled and every time one is scanned, nothing is printed
+        executor (str): Worker pool to use (auto, process, thread, inline)
+
+    Returns:
+        Report: The inventory, see build_report
+    """
+    return _scan_folders([src], jobs, progress, executor)
+
+
+def scan_tags_world(
+    world: Path,
+    jobs: int,
+    progress: Optional[ScanProgressCallback] = None,
+    executor: str = AUTO,
+) -> Report:
+    """Inventory the structure tags of every dimension in a world
+
+    Args:
+        world (Path): The world folder
+        jobs (int): Number of workers to use
+        progress (ScanProgressCallback, optional): Called when the regions
+            are scheduled and every time one is scanned, nothing is printed
+        executor (str): Worker pool to use (auto, process, thread, inline)
+
+    Returns:
+        Report: The inventory, see build_report
+    """
+    folders = [world / dimension for dimension in find_dimensions(world)]
+    return _scan_folders(folders, jobs, progress, executor)
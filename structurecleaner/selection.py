@@ -0,0 +1,164 @@
+"""
+MC Structure Cleaner
+Selections restricting a run to an area of the world
+
+Region files outside the selection are kept as they are without being
+read, chunks outside it in the selected regions are copied unchanged.
+Selections are stored in block coordinates, boxes and radii can be given
+in blocks, chunks or regions.
+"""
+
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+from structurecleaner.constants import REGION_CHUNKS
+from structurecleaner.region import region_coords
+
+CHUNK_BLOCKS = 16  # Blocks per chunk along each axis
+
+# Blocks per unit along each axis
+UNITS = {
+    "block": 1,
+    "chunk": CHUNK_BLOCKS,
+    "region": CHUNK_BLOCKS * REGION_CHUNKS,
+}
+DEFAULT_UNIT = "block"
+
+
+class Selection(ABC):
+    """An area of the world, in block coordinates"""
+
+    @abstractmethod
+    def overlaps(self, min_x: int, min_z: int, max_x: int, max_z: int) -> bool:
+        """Check if the selection overlaps a rectangle of blocks
+
+        Args:
+            min_x (int): Lowest block X coordinate of the rectangle
+            min_z (int): Lowest block Z coordinate of the rectangle
+            max_x (int): Highest block X coordinate, inclusive
+            max_z (int): Highest block Z coordinate, inclusive
+
+        Returns:
+            bool: True if any block of the rectangle is selected
+        """
+        pass
+
+    def contains_chunk(self, chunk_x: int, chunk_z: int) -> bool:
+        """Check if any block of a chunk (global coordinates) is selected"""
+        return self._contains(chunk_x, chunk_z, CHUNK_BLOCKS)
+
+    def contains_region(self, region_x: int, region_z: int) -> bool:
+        """Check if any block of a region is selected"""
+        return self._contains(region_x, region_z, UNITS["region"])
+
+    def contains_file(self, path: Path) -> bool:
+        """Check if a region file (r.X.Z.mca) is selected, from its name.
+        Other files are never selected.
+        """
+        if path.suffix != ".mca":
+            return False
+        try:
+            region_x, region_z = region_coords(path)
+        except ValueError:
+            return False
+        return self.contains_region(region_x, region_z)
+
+    def select_chunks(
+        self, src: Path, chunks: List[Tuple[int, int]]
+    ) -> List[Tuple[int, int]]:
+        """Keep the chunks of a region file that are selected
+
+        Args:
+            src (Path): The region file
+            chunks (List[Tuple[int, int]]): Local chunk coordinates
+
+        Returns:
+            List[Tuple[int, int]]: The selected chunks
+        """
+        region_x, region_z = region_coords(src)
+        return [
+            (chunk_x, chunk_z)
+            for chunk_x, chunk_z in chunks
+            if self.contains_chunk(
+                region_x * REGION_CHUNKS + chunk_x,
+                region_z * REGION_CHUNKS + chunk_z,
+            )
+        ]
+
+    def _contains(self, x: int, z: int, size: int) -> bool:
+        return self.overlaps(
+            x * size, z * size, x * size + size - 1, z * size + size - 1
+        )
+
+
+class BoxSelection(Selection):
+    """Every block between two corners, inclusive"""
+
+    min_x: int
+    min_z: int
+    max_x: int
+    max_z: int
+
+    def __init__(self, x1: int, z1: int, x2: int, z2: int):
+        self.min_x, self.max_x = min(x1, x2), max(x1, x2)
+        self.min_z, self.max_z = min(z1, z2), max(z1, z2)
+
+    def overlaps(self, min_x, min_z, max_x, max_z) -> bool:
+        return (
+            min_x <= self.max_x
+            and self.min_x <= max_x
+            and min_z <= self.max_z
+            and self.min_z <= max_z
+        )
+
+
+class RadiusSelection(Selection):
+    """Every block within a distance of a center block"""
+
+    x: int
+    z: int
+    radius: int
+
+    def __init__(self, x: int, z: int, radius: int):
+        self.x = x
+        self.z = z
+        self.radius = radius
+
+    def overlaps(self, min_x, min_z, max_x, max_z) -> bool:
+        # Distance to the closest block of the rectangle
+        dx = max(min_x - self.x, 0, self.x - max_x)
+        dz = max(min_z - self.z, 0, self.z - max_z)
+        return dx * dx + dz * dz <= self.radius * self.radius
+
+
+def make_selection(
+    box: Optional[Sequence[int]] = None,
+    radius: Optional[Sequence[int]] = None,
+    unit: str = DEFAULT_UNIT,
+) -> Optional[Selection]:
+    """Create a selection from command line coordinates
+
+    Args:
+        box (Sequence[int], optional): Two corners, X1 Z1 X2 Z2
+        radius (Sequence[int], optional): A center and a radius, X Z R
+        unit (str): The unit of the coordinates (block, chunk, region)
+
+    Returns:
+        Optional[Selection]: The selection, None to select everything
+    """
+    size = UNITS[unit]
+    if box:
+        x1, z1, x2, z2 = box
+        return BoxSelection(
+            min(x1, x2) * size,
+            min(z1, z2) * size,
+            max(x1, x2) * size + size - 1,
+            max(z1, z2) * size + size - 1,
+        )
+    if radius:
+        x, z, distance = radius
+        # Chunk and region coordinates are measured from their center
+        return RadiusSelection(
+            x * size + size // 2, z * size + size // 2, distance * size
+        )
+    return None
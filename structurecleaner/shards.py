@@ -0,0 +1,276 @@
+"""
+MC Structure Cleaner
+Shards splitting a run over several machines
+
+Every machine runs the same command with its own shard (--shard I/N) on
+a shared world and output folder. The region files are spread over the
+shards by size, largest first onto the shard with the least data so
+far, with ties broken by region coordinates. Sizes change as soon as a
+shard cleans in place or the server saves, so the first shard to start
+saves the split to a manifest in the shared folder and the others, and
+later runs with as many shards, follow it. Regions missing from the
+manifest are spread by a hash of their folder and name. Each shard
+saves the result of its part of the run, and the results of all shards
+can be merged afterwards.
+"""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+from structurecleaner.errors import ShardError
+from structurecleaner.files import write_atomic
+from structurecleaner.results import RunResult
+from structurecleaner.region import region_coords
+
+SHARD_RESULT = "shard-{index}-of-{count}.json"
+SHARD_MANIFEST = ".structurecleaner-shards-{count}.json"
+MERGED_RESULT = "shards.json"
+
+
+class Shard(NamedTuple):
+    """Part index (from 1) of count parts of a run"""
+
+    index: int
+    count: int
+
+    def __str__(self) -> str:
+        return f"{self.index}/{self.count}"
+
+    @property
+    def result_name(self) -> str:
+        """File name of the shard's result"""
+        return SHARD_RESULT.format(index=self.index, count=self.count)
+
+    @property
+    def manifest_name(self) -> str:
+        """File name of the split shared by all shards of a run"""
+        return SHARD_MANIFEST.format(count=self.count)
+
+    def file_name(self, name: str) -> str:
+        """Name of the shard's own copy of a file in a shared folder,
+        like .structurecleaner-index-2-of-4.json"""
+        stem, dot, suffix = name.rpartition(".")
+        return f"{stem}-{self.index}-of-{self.count}{dot}{suffix}"
+
+
+def parse_shard(spec: str) -> Shard:
+    """Parse a shard given as I/N, like 2/4
+
+    Raises:
+        ValueError: If it isn't a shard between 1 and N
+    """
+    index, _, count = spec.partition("/")
+    shard = Shard(int(index), int(count))
+    if not 1 <= shard.index <= shard.count:
+        raise ValueError(f"Shard must be between 1/N and N/N, not {spec}")
+    return shard
+
+
+def _region_key(path: Path, position: Dict[Path, int]) -> str:
+    """Tell a region apart the same way on every machine. The world may
+    be mounted elsewhere on each, so the folder's position in the run is
+    used instead of its path."""
+    return f"{position[path.parent]}/{path.name}"
+
+
+def _split_regions(
+    regions: Sequence[Tuple[Path, Path]],
+    folders: Sequence[Tuple[Path, Path]],
+    count: int,
+) -> Dict[str, int]:
+    """Spread region files over shards by their current size
+
+    Args:
+        regions (Sequence[Tuple[Path, Path]]): Region files of the whole
+            run and their destination folders
+        folders (Sequence[Tuple[Path, Path]]): Source and destination
+            folders of the run, in the same order on every machine
+        count (int): Number of shards
+
+    Returns:
+        Dict[str, int]: The shard index (from 1) of every region's key
+    """
+    position = {src: number for number, (src, _) in enumerate(folders)}
+    sizes = {src: src.stat().st_size for src, _ in regions}
+
+    def order(src: Path) -> tuple:
+        return (-sizes[src], position[src.parent], region_coords(src))
+
+    loads = [0] * count
+    split = {}
+    for src in sorted(sizes, key=order):
+        smallest = loads.index(min(loads))
+        loads[smallest] += sizes[src]
+        split[_region_key(src, position)] = smallest + 1
+    return split
+
+
+def _load_split(path: Path, count: int) -> Optional[Dict[str, int]]:
+    """Load the split saved by another shard, None if there is none"""
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            data = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get("shards") != count:
+        return None
+    return data["regions"]
+
+
+def _hashed_shard(key: str, count: int) -> int:
+    """Pick the shard of a region the manifest doesn't know"""
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % count + 1
+
+
+def select_shard(
+    regions: Sequence[Tuple[Path, Path]],
+    folders: Sequence[Tuple[Path, Path]],
+    shard: Shard,
+    manifest: Optional[Path] = None,
+) -> List[Tuple[Path, Path]]:
+    """Keep the region files of one shard
+
+    Args:
+        regions (Sequence[Tuple[Path, Path]]): Region files of the whole
+            run and their destination folders
+        folders (Sequence[Tuple[Path, Path]]): Source and destination
+            folders of the run, in the same order on every machine
+        shard (Shard): The shard to keep
+        manifest (Path, optional): The split shared by all shards. Saved
+            from the current sizes if it doesn't exist yet, followed
+            otherwise.
+
+    Returns:
+        List[Tuple[Path, Path]]: The shard's regions, in the order given
+    """
+    split = None if manifest is None else _load_split(manifest, shard.count)
+    if split is None:
+        split = _split_regions(regions, folders, shard.count)
+        if manifest is not None:
+            data = {"shards": shard.count, "regions": split}
+            write_atomic(manifest, json.dumps(data, indent=1).encode("utf-8"))
+
+    position = {src: number for number, (src, _) in enumerate(folders)}
+    chosen = []
+    for task in regions:
+        key = _region_key(task[0], position)
+        if split.get(key, _hashed_shard(key, shard.count)) == shard.index:
+            chosen.append(task)
+    return chosen
+
+
+def shard_result(run: RunResult, shard: Shard) -> dict:
+    """Get the result of a shard as a JSON serializable record
+
+    Args:
+        run (RunResult): What the shard's run did
+        shard (Shard): The shard
+
+    Returns:
+        dict: Counts, removed tags and timings of the shard and its
+            regions
+    """
+    tags: Dict[str, int] = {}
+    for result in run.regions:
+        for name in result.removed_tags:
+            tags[name] = tags.get(name, 0) + 1
+
+    return {
+        "shard": str(shard),
+        "total": run.total,
+        "total_bytes": run.total_bytes,
+        "count": run.count,
+        "reclaimed": run.reclaimed,
+        "seconds": run.seconds,
+        "jobs": run.jobs,
+        "executor": run.executor,
+        "tags": dict(sorted(tags.items())),
+        "unchanged": [str(src) for src in run.unchanged],
+        "resumed": [str(src) for src in run.resumed],
+        "errors": {str(src): error for src, error in run.errors.items()},
+        "regions": [
+            {
+                "src": str(result.src),
+                "count": result.count,
+                "removed_tags": sorted(result.removed_tags),
+                "seconds": result.seconds,
+                "skipped": result.skipped,
+            }
+            for result in run.regions
+        ],
+    }
+
+
+def write_shard_result(run: RunResult, shard: Shard, path: Path) -> None:
+    """Save the result of a shard to a JSON file"""
+    data = json.dumps(shard_result(run, shard), indent=2)
+    write_atomic(path, data.encode("utf-8"))
+
+
+def merge_shard_results(results: Sequence[dict]) -> dict:
+    """Combine the results of the shards of a run
+
+    Args:
+        results (Sequence[dict]): Results saved by the shards
+
+    Raises:
+        ShardError: If the shards are from runs split differently, or a
+            shard is given twice
+
+    Returns:
+        dict: Summed counts and tags, the wall time of the slowest shard
+            and the shards that are missing
+    """
+    shards = [parse_shard(result["shard"]) for result in results]
+    counts = {shard.count for shard in shards}
+    if len(counts) > 1:
+        raise ShardError(f"Shards of differently split runs: {counts}")
+    if len(set(shards)) < len(shards):
+        raise ShardError("A shard was given more than once")
+
+    count = counts.pop() if counts else 0
+    given = {shard.index for shard in shards}
+    tags: Dict[str, int] = {}
+    errors: Dict[str, str] = {}
+    for result in results:
+        for name, regions in result["tags"].items():
+            tags[name] = tags.get(name, 0) + regions
+        errors.update(result["errors"])
+
+    return {
+        "shards": count,
+        "missing": [i for i in range(1, count + 1) if i not in given],
+        "total": sum(result["total"] for result in results),
+        "total_bytes": sum(result["total_bytes"] for result in results),
+        "count": sum(result["count"] for result in results),
+        "reclaimed": sum(result["reclaimed"] for result in results),
+        # The shards ran at the same time, on different machines
+        "seconds": max((result["seconds"] for result in results), default=0),
+        "shard_seconds": {
+            result["shard"]: result["seconds"] for result in results
+        },
+        "tags": dict(sorted(tags.items())),
+        "errors": errors,
+    }
+
+
+def merge_shard_files(paths: Sequence[Path], path: Path) -> dict:
+    """Merge the result files of several shards into one
+
+    Args:
+        paths (Sequence[Path]): Result files saved by the shards
+        path (Path): Where to save the merged result
+
+    Returns:
+        dict: The merged result
+    """
+    results = []
+    for shard_path in paths:
+        with open(shard_path, "r", encoding="utf-8") as file:
+            results.append(json.load(file))
+
+    merged = merge_shard_results(results)
+    write_atomic(path, json.dumps(merged, indent=2).encode("utf-8"))
+    return merged
@@ -12,53 +12,63 @@ class VersionStrategy(ABC):
         self.removal_strategy = removal_strategy
 
     @abstractmethod
-    def remove_tags(
-        self, data: nbt.NBTFile, data_copy: nbt.NBTFile, removed_tags: Set[str]
-    ) -> int:
+    def remove_tags(self, data: nbt.NBTFile, removed_tags: Set[str]) -> int:
         pass
 
 
-class OldDataVersion(VersionStrategy):
-    def remove_tags(self, data, data_copy, removed_tags: Set[str]) -> int:
+class EntitiesVersion(VersionStrategy):
+    """Chunks of the entities folder (1.17+). Matching entities are
+    removed by id, along with anything riding them."""
+
+    def remove_tags(self, data, removed_tags: Set[str]) -> int:
+        if "Entities" not in data:
+            return 0
+        return self._remove_entities(data["Entities"], removed_tags)
+
+    def _remove_entities(self, entities: nbt.TAG_List, removed_tags) -> int:
         count = 0
+        kept = []
 
-        if hasattr(data["Level"]["Structures"]["Starts"], "tags"):
-            for tag in data["Level"]["Structures"]["Starts"].tags:
-                if self.removal_strategy.check_tag(tag):
-                    del data_copy["Level"]["Structures"]["Starts"][tag.name]
-                    count += 1
-                    removed_tags.add(tag.name)
-
-        if hasattr(data["Level"]["Structures"]["References"], "tags"):
-            for tag in data["Level"]["Structures"]["References"].tags:
-                if self.removal_strategy.check_tag(tag):
-                    del data_copy["Level"]["Structures"]["References"][
-                        tag.name
-                    ]
-                    count += 1
-                    removed_tags.add(tag.name)
+        for entity in entities.tags:
+            name = entity["id"].value if "id" in entity else ""
+            if name and self.removal_strategy.check_name(name):
+                removed_tags.add(name)
+                count += 1
+                continue
 
+            if "Passengers" in entity:
+                passengers = entity["Passengers"]
+                count += self._remove_entities(passengers, removed_tags)
+                if not passengers.tags:
+                    del entity["Passengers"]
+            kept.append(entity)
+
+        entities.tags[:] = kept
         return count
 
 
-class NewDataVersion(VersionStrategy):
-    def remove_tags(self, data, data_copy, removed_tags: Set[str]) -> int:
+class PoiVersion(VersionStrategy):
+    """Chunks of the poi folder. Matching points of interest are removed
+    by type."""
+
+    def remove_tags(self, data, removed_tags: Set[str]) -> int:
+        if "Sections" not in data:
+            return 0
+
         count = 0
+        for section in data["Sections"].tags:
+            if "Records" not in section:
+                continue
 
-        if hasattr(data["structures"]["starts"], "tags"):
-            for tag in data["structures"]["starts"].tags:
-                if self.removal_strategy.check_tag(tag):
-                    del data_copy["structures"]["starts"][tag.name]
-                    count += 1
-                    removed_tags.add(tag.name)
-
-        if hasattr(data["structures"]["References"], "tags"):
-            for tag in data["structures"]["References"].tags:
-                if self.removal_strategy.check_tag(tag):
-                    del data_copy["structures"]["References"][
-                        tag.name
-                    ]
+            records = section["Records"]
+            kept = []
+            for record in records.tags:
+                name = record["type"].value if "type" in record else ""
+                if name and self.removal_strategy.check_name(name):
+                    removed_tags.add(name)
                     count += 1
-                    removed_tags.add(tag.name)
+                else:
+                    kept.append(record)
+            records.tags[:] = kept
 
         return count
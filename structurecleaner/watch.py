@@ -0,0 +1,41 @@
+"""
+MC Structure Cleaner
+Watch mode, cleaning newly saved chunks of a live world copy
+
+The region folders are polled every few seconds. Each pass is an
+incremental run: regions that haven't changed since the last pass are
+skipped by the index from their size and modification time, and only
+the chunks saved since the last pass are cleaned in the others.
+"""
+
+import threading
+from typing import Callable, Optional
+from structurecleaner.results import RunResult
+
+DEFAULT_INTERVAL = 10.0  # Seconds between passes
+
+
+def watch(
+    clean: Callable[[], RunResult],
+    interval: float = DEFAULT_INTERVAL,
+    stop: Optional[threading.Event] = None,
+    on_pass: Optional[Callable[[RunResult], None]] = None,
+) -> None:
+    """Clean the world over and over until stopped
+
+    Args:
+        clean (Callable[[], RunResult]): Runs one incremental pass
+        interval (float): Seconds to wait after each pass
+        stop (threading.Event, optional): Set to stop watching, otherwise
+            only an interrupt (Ctrl+C) stops it
+        on_pass (Callable[[RunResult], None], optional): Called with the
+            result of every pass
+    """
+    if stop is None:
+        stop = threading.Event()
+
+    while not stop.is_set():
+        result = clean()
+        if on_pass is not None:
+            on_pass(result)
+        stop.wait(interval)
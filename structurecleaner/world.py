@@ -0,0 +1,78 @@
+"""
+MC Structure Cleaner
+World folder layout
+"""
+
+from pathlib import Path
+from typing import List, Tuple
+from structurecleaner.constants import (
+    DIMENSIONS,
+    CUSTOM_DIMENSIONS,
+    REGION_FOLDER,
+    CHUNK_FOLDERS,
+)
+
+
+def find_dimensions(world: Path) -> List[Path]:
+    """Find the region folders of every dimension in a world
+
+    Args:
+        world (Path): The world folder
+
+    Returns:
+        List[Path]: The region folders, relative to the world folder
+    """
+    folders = sorted(Path(dimension) for dimension in DIMENSIONS)
+    folders += sorted(
+        folder.relative_to(world) for folder in world.glob(CUSTOM_DIMENSIONS)
+    )
+    return [folder for folder in folders if (world / folder).is_dir()]
+
+
+def sibling_folder(folder: Path, kind: str) -> Path:
+    """Get the folder for another kind of chunk data next to a region
+    folder, e.g. world/DIM-1/region -> world/DIM-1/entities, or for output
+    folders new_regionDIM-1 -> new_entitiesDIM-1
+
+    Args:
+        folder (Path): The region folder
+        kind (str): The kind of chunk data (entities, poi)
+
+    Returns:
+        Path: The sibling folder
+    """
+    if REGION_FOLDER in folder.name:
+        return folder.with_name(folder.name.replace(REGION_FOLDER, kind, 1))
+    return folder.with_name(f"{folder.name}_{kind}")
+
+
+def chunk_folders(folders: List[Tuple[Path, Path]]) -> List[Tuple[Path, Path]]:
+    """Add the entities and poi folders next to region folders.
+    Destination folders are created for the ones that exist.
+
+    Args:
+        folders (List[Tuple[Path, Path]]): Source and destination region
+            folders
+
+    Returns:
+        List[Tuple[Path, Path]]: The region folders followed by the
+            existing entities and poi folders
+    """
+    siblings = []
+    for src, dst in folders:
+        for kind in CHUNK_FOLDERS:
+            if sibling_folder(src, kind).is_dir():
+                target = sibling_folder(dst, kind)
+                target.mkdir(parents=True, exist_ok=True)
+                siblings.append((sibling_folder(src, kind), target))
+    return folders + siblings
+
+
+def chunk_kind(region: Path) -> str:
+    """Get the kind of chunk data in a region file from its folder
+
+    Returns:
+        str: region, entities or poi
+    """
+    kind = region.parent.name
+    return kind if kind in CHUNK_FOLDERS else REGION_FOLDER
@@ -3,10 +3,21 @@ MC Structure Cleaner
 Helper functions for tests
 """
 
-import filecmp
+import itertools as it
+from nbt import nbt
 from pathlib import Path
 from multiprocessing import cpu_count
-from structurecleaner.remove_tags import remove_tags
+from structurecleaner.compression import DEFAULT_LEVEL
+from structurecleaner.constants import SECTOR_SIZE
+from structurecleaner.output_strategies import CopyOutputStrategy
+from structurecleaner.region import RegionReader
+from structurecleaner.removal_strategies import RemovalStrategy
+from structurecleaner.results import RegionResult
+from structurecleaner.remove_tags import (
+    WorkerState,
+    _remove_tags_region_task,
+    remove_tags,
+)
 
 TEST_DIR = "tests/data"
 
@@ -25,8 +36,97 @@ def to_file_set(path: Path | str) -> set:
     return set(path.glob("*"))
 
 
+def to_python(tag: nbt.TAG) -> tuple:
+    """Convert an NBT tag into comparable python values
+    Compound tags become dicts, so the order of their entries is ignored.
+
+    Args:
+        tag (nbt.TAG): The tag to convert
+
+    Returns:
+        tuple: The tag type id and its converted value
+    """
+    if isinstance(tag, nbt.TAG_Compound):
+        return tag.id, {t.name: to_python(t) for t in tag.tags}
+    if isinstance(tag, nbt.TAG_List):
+        return tag.id, [to_python(t) for t in tag.tags]
+    if isinstance(tag, (nbt.TAG_Byte_Array, nbt.TAG_Int_Array)):
+        return tag.id, list(tag.value)
+    return tag.id, tag.value
+
+
+def assert_region_matches(path: Path, target: Path) -> None:
+    """Check that two region files hold the same chunks with the same data
+    Sector layout, compression and timestamps are allowed to differ.
+
+    Args:
+        path (Path): The region file that was written
+        target (Path): The expected region file
+    """
+    region = RegionReader.from_file(path)
+    expected = RegionReader.from_file(target)
+
+    with region, expected:
+        for chunk_x, chunk_z in it.product(range(32), repeat=2):
+            data = region.chunk_data(chunk_x, chunk_z)
+            expected_data = expected.chunk_data(chunk_x, chunk_z)
+            if expected_data is None:
+                assert data is None, f"{path.name} has extra chunk"
+            else:
+                assert data is not None, f"{path.name} is missing a chunk"
+                assert to_python(data) == to_python(
+                    expected_data
+                ), f"{path.name} chunk {chunk_x}, {chunk_z} is not target"
+
+
+def fragment(src: Path, dst: Path, gap: int) -> None:
+    """Copy a region, leaving gap free sectors after every chunk"""
+    region = RegionReader.from_file(src)
+    locations = bytearray(SECTOR_SIZE)
+    header_end = 2 * SECTOR_SIZE
+    timestamps = region.data[SECTOR_SIZE:header_end]
+    body = bytearray()
+    sector = 2  # After the header
+    for chunk_x, chunk_z in region.existing_chunks():
+        raw = region.data[region.raw_chunk_range(chunk_x, chunk_z)]
+        count = -(-len(raw) // SECTOR_SIZE)
+        index = 4 * (chunk_x + chunk_z * 32)
+        end = index + 3
+        locations[index:end] = sector.to_bytes(3, "big")
+        locations[end] = count
+        body += raw + bytes((count + gap) * SECTOR_SIZE - len(raw))
+        sector += count + gap
+    dst.write_bytes(locations + timestamps + body)
+
+
+def region_task(
+    strategy: RemovalStrategy,
+    src: Path,
+    dst: Path,
+    level: int = DEFAULT_LEVEL,
+) -> RegionResult:
+    """Run a region task in this process, like a worker would
+
+    Args:
+        strategy (RemovalStrategy): The removal strategy
+        src (Path): The source region file
+        dst (Path): The destination folder
+        level (int): Compression level of re-encoded chunks
+
+    Returns:
+        RegionResult: The result of the task
+    """
+    state = WorkerState(strategy, CopyOutputStrategy(), level)
+    return _remove_tags_region_task((src, dst), state)
+
+
 def remove_tags_test(
-    version: str, region: str, mode: str, tags: set, tmp_path: Path
+    version: str,
+    region: str,
+    mode: str,
+    tags: set,
+    tmp_path: Path,
+    split: bool = False,
 ) -> None:
     """Abstract testing for remove_tags
     Sets up the directories, runs the command, and then checks equality.
@@ -37,6 +137,7 @@ def remove_tags_test(
         mode (str): Purge or Remove
         tags (set): Set of tags (strings)
         tmp_path (Path): The current testing tmp_path
+        split (bool): Whether to split regions between processes
     """
     jobs = cpu_count() // 2
 
@@ -61,7 +162,7 @@ def remove_tags_test(
     assert (dst).exists(), "Output folder was not created"
 
     # Run remove_tags
-    remove_tags(tags, src, dst, jobs, mode)
+    remove_tags(tags, src, dst, jobs, mode, split=split)
 
     for file in region_files:
         assert (dst / file.name).exists(), f"{file.name} was not created"
@@ -69,6 +170,4 @@ def remove_tags_test(
 
     for file in region_target_files:
         print("\n\n", file, "\n\n")
-        assert filecmp.cmp(
-            (dst / file.name), file
-        ), f"{file.name} is not target"
+        assert_region_matches(dst / file.name, file)
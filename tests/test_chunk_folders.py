@@ -0,0 +1,95 @@
+"""
+MC Structure Cleaner
+Tests cleaning the entities and poi folders next to a region folder
+"""
+
+import pytest
+from pathlib import Path
+from structurecleaner.region import RegionReader, RegionWriter
+from structurecleaner.remove_tags import remove_tags
+from tests.test_nbt_scan import entities_chunk, poi_chunk
+
+
+def make_world(world: Path) -> None:
+    (world / "region").mkdir(parents=True)
+    for kind, data in (("entities", entities_chunk()), ("poi", poi_chunk())):
+        (world / kind).mkdir()
+        region = RegionWriter()
+        region.add_chunk(0, 0, data, 0)
+        region.save(world / kind / "r.0.0.mca")
+
+
+def test_entities_and_poi_by_pattern(tmp_path: Path) -> None:
+    world, dst = tmp_path / "world", tmp_path / "new_region"
+    make_world(world)
+    dst.mkdir()
+
+    remove_tags(
+        set(),
+        world / "region",
+        dst,
+        1,
+        "purge",
+        entities=True,
+        entity_tags={"mod:*"},
+    )
+
+    with RegionReader.from_file(tmp_path / "new_entities/r.0.0.mca") as r:
+        entities = r.chunk_data(0, 0)["Entities"]
+    assert [entity["id"].value for entity in entities.tags] == [
+        "minecraft:zombie"
+    ]
+    assert "Passengers" not in entities.tags[0]
+
+    with RegionReader.from_file(tmp_path / "new_poi/r.0.0.mca") as r:
+        sections = r.chunk_data(0, 0)["Sections"]
+    assert [record["type"].value for record in sections["0"]["Records"]] == [
+        "minecraft:home"
+    ]
+
+
+def test_list_entities(tmp_path: Path) -> None:
+    world, dst = tmp_path / "world", tmp_path / "new_region"
+    make_world(world)
+    dst.mkdir()
+
+    # Structure tags are never matched against entities
+    src = world / "region"
+    remove_tags(
+        {"mod:*"},
+        src,
+        dst,
+        1,
+        "normal",
+        "changed",
+        entities=True,
+        entity_tags={"mod:rider"},
+    )
+
+    with RegionReader.from_file(tmp_path / "new_entities/r.0.0.mca") as r:
+        entities = r.chunk_data(0, 0)["Entities"]
+    assert [entity["id"].value for entity in entities.tags] == [
+        "minecraft:zombie",
+        "mod:beast",
+    ]
+    assert not (tmp_path / "new_poi/r.0.0.mca").exists()
+
+
+def test_entities_are_opt_in(tmp_path: Path) -> None:
+    world, dst = tmp_path / "world", tmp_path / "new_region"
+    make_world(world)
+    dst.mkdir()
+
+    remove_tags(set(), world / "region", dst, 1, "purge")
+    assert not (tmp_path / "new_entities").exists()
+
+
+def test_entities_need_entity_tags(tmp_path: Path) -> None:
+    world, dst = tmp_path / "world", tmp_path / "new_region"
+    make_world(world)
+    dst.mkdir()
+
+    # Purge mode would remove the entities of every installed mod
+    with pytest.raises(ValueError):
+        remove_tags(set(), world / "region", dst, 1, "purge", entities=True)
+    assert not (tmp_path / "new_entities").exists()
@@ -0,0 +1,164 @@
+"""
+MC Structure Cleaner
+Tests reading and writing every chunk compression type
+"""
+
+import random
+import shutil
+import struct
+import pytest
+from pathlib import Path
+from benchmarks.synthetic import MODDED_PREFIX, NEW_LAYOUT, generate_chunk
+from structurecleaner import compression
+from structurecleaner.compression import (
+    GZIP,
+    LZ4,
+    UNCOMPRESSED,
+    ZLIB,
+    compress,
+    decompress,
+    output_compression,
+)
+from structurecleaner.errors import (
+    CorruptChunkError,
+    UnsupportedCompressionError,
+)
+from structurecleaner.region import (
+    RegionReader,
+    RegionWriter,
+    decompress_chunk,
+    encode_chunk,
+)
+from structurecleaner.removal_strategies import ListRemovalStrategy
+from structurecleaner.remove_tags import remove_tags
+from tests.abstract_test import TEST_DIR, region_task
+
+DATA = b"\x0a\x00\x00" + bytes(range(256)) * 64 + b"\x00"
+
+# Chunk records that can't be cleaned, and the error they are reported with
+UNREADABLE = [
+    (b"\x00\x00\x00\x02\x09\x00", "Compression type 9"),
+    (b"\x00\x00\x00\x05\x02junk", "Invalid chunk payload"),
+    (b"\x00\x00\x00\x05\x03\x0a\x00\x00\x01", "Invalid chunk NBT"),
+]
+
+
+def lz4_block(method: int, payload: bytes, original: int) -> bytes:
+    header = struct.pack(
+        "<8sBiii", b"LZ4Block", method, len(payload), original, 0
+    )
+    return header + payload
+
+
+@pytest.mark.parametrize("kind", [GZIP, ZLIB, UNCOMPRESSED])
+def test_round_trip(kind: int) -> None:
+    for level in (1, 9):
+        assert decompress(kind, compress(kind, DATA, level)) == DATA
+    assert output_compression(kind) == kind
+
+
+def test_lz4_raw_blocks() -> None:
+    stream = (
+        lz4_block(0x10, DATA[:100], 100)
+        + lz4_block(0x10, DATA[100:], len(DATA) - 100)
+        + lz4_block(0x10, b"", 0)
+    )
+    assert decompress(LZ4, stream) == DATA
+    assert output_compression(LZ4) == ZLIB
+
+
+def test_lz4_compressed_blocks() -> None:
+    if compression.lz4 is None:
+        stream = lz4_block(0x20, b"\x00", len(DATA))
+        with pytest.raises(UnsupportedCompressionError):
+            decompress(LZ4, stream)
+        return
+
+    payload = compression.lz4.block.compress(DATA, store_size=False)
+    stream = lz4_block(0x25, payload, len(DATA)) + lz4_block(0x10, b"", 0)
+    assert decompress(LZ4, stream) == DATA
+
+
+def test_unknown_compression() -> None:
+    with pytest.raises(UnsupportedCompressionError):
+        decompress(127, DATA)
+    with pytest.raises(UnsupportedCompressionError):
+        compress(LZ4, DATA)
+
+
+def test_corrupt_payload() -> None:
+    with pytest.raises(CorruptChunkError):
+        decompress(ZLIB, b"junk")
+    with pytest.raises(CorruptChunkError):
+        decompress(GZIP, compress(GZIP, DATA)[:-8])
+    with pytest.raises(CorruptChunkError):
+        decompress(LZ4, lz4_block(0x10, DATA, len(DATA))[:10])
+
+
+def test_clean_keeps_compression(tmp_path: Path) -> None:
+    data = generate_chunk(random.Random(0), 0, 0, NEW_LAYOUT, density=1.0)
+    src_folder, dst = tmp_path / "region", tmp_path / "output"
+    src_folder.mkdir()
+    dst.mkdir()
+
+    writer = RegionWriter()
+    writer.set_chunk(0, 0, encode_chunk(data, GZIP), 0)
+    writer.set_chunk(1, 0, encode_chunk(data, UNCOMPRESSED), 0)
+    writer.save(src_folder / "r.0.0.mca")
+
+    strategy = ListRemovalStrategy({f"{MODDED_PREFIX}*"})
+    result = region_task(strategy, src_folder / "r.0.0.mca", dst, 1)
+    assert result.count > 0
+    assert result.metrics.modified == 2
+
+    with RegionReader.from_file(dst / "r.0.0.mca") as region:
+        for chunk_x, kind in ((0, GZIP), (1, UNCOMPRESSED)):
+            raw = region.raw_chunk(chunk_x, 0)
+            assert raw[4] == kind
+            assert MODDED_PREFIX.encode() not in decompress_chunk(raw)
+
+
+def test_unreadable_region_is_skipped(tmp_path: Path) -> None:
+    writer = RegionWriter()
+    writer.set_chunk(0, 0, b"\x00\x00\x00\x02\x7f\x00", 0)
+    writer.save(tmp_path / "r.0.0.mca")
+
+    strategy = ListRemovalStrategy({"a"})
+    result = region_task(strategy, tmp_path / "r.0.0.mca", tmp_path, 6)
+    assert result.skipped
+    assert "Compression type 127" in result.error
+
+
+@pytest.mark.parametrize("record, message", UNREADABLE)
+@pytest.mark.parametrize(
+    "split, prefetch", [(False, 0), (True, 0), (False, 2)]
+)
+@pytest.mark.parametrize("output", ["copy", "link", "changed"])
+def test_unreadable_region_is_kept(
+    tmp_path: Path,
+    split: bool,
+    prefetch: int,
+    output: str,
+    record: bytes,
+    message: str,
+) -> None:
+    src, dst = tmp_path / "region", tmp_path / "new_region"
+    src.mkdir()
+    dst.mkdir()
+    shutil.copy(f"{TEST_DIR}/tags_region/input/r.0.0.mca", src)
+    writer = RegionWriter()
+    writer.set_chunk(0, 0, record, 0)
+    writer.save(src / "r.1.0.mca")
+
+    run = remove_tags(
+        {"a"}, src, dst, 2, "normal", output, split, prefetch=prefetch
+    )
+    assert run.skipped == [src / "r.1.0.mca"]
+    assert message in run.errors[src / "r.1.0.mca"]
+
+    # Output that replaces the region folder still holds the region
+    kept = dst / "r.1.0.mca"
+    if output == "changed":
+        assert not kept.exists()
+    else:
+        assert kept.read_bytes() == (src / "r.1.0.mca").read_bytes()
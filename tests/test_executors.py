@@ -0,0 +1,86 @@
+"""
+MC Structure Cleaner
+Tests that every executor cleans regions the same way
+"""
+
+import pytest
+import shutil
+from pathlib import Path
+from typing import Optional
+from structurecleaner.executors import (
+    INLINE,
+    PROCESS,
+    SMALL_WORLD_BYTES,
+    THREAD,
+    InlinePool,
+    choose_executor,
+    make_pool,
+)
+from structurecleaner.remove_tags import remove_tags
+from structurecleaner.results import RegionResult, RunResult
+from tests.abstract_test import TEST_DIR, assert_region_matches
+
+state = []
+
+
+def test_choose_executor() -> None:
+    assert choose_executor("auto", 0, 2**40) == INLINE
+    assert choose_executor("auto", 1, 2**40) == INLINE
+    assert choose_executor("auto", 4, SMALL_WORLD_BYTES - 1) == THREAD
+    assert choose_executor("auto", 4, SMALL_WORLD_BYTES) == PROCESS
+    assert choose_executor(PROCESS, 1, 0) == PROCESS
+
+
+def test_inline_pool_runs_initializer() -> None:
+    with make_pool(INLINE, 4, state.append, ("ready",)) as pool:
+        assert isinstance(pool, InlinePool)
+        assert state == ["ready"]
+        assert sorted(pool.imap_unordered(abs, [-2, 1])) == [1, 2]
+
+
+@pytest.mark.parametrize("executor", [PROCESS, THREAD, INLINE])
+def test_executors_match(executor: str, tmp_path: Path) -> None:
+    src = Path(f"{TEST_DIR}/1.15.2/input/region")
+    target = Path(f"{TEST_DIR}/1.15.2/expected_purge/region")
+
+    remove_tags(set(), src, tmp_path, 2, "purge", executor=executor)
+
+    for file in target.iterdir():
+        assert_region_matches(tmp_path / file.name, file)
+
+
+@pytest.mark.parametrize("executor", [THREAD, INLINE])
+def test_nested_runs_keep_their_strategies(
+    executor: str, tmp_path: Path
+) -> None:
+    src = tmp_path / "world"
+    src.mkdir()
+    region = Path(f"{TEST_DIR}/tags_region/input/r.0.0.mca")
+    for name in ("r.0.0.mca", "r.1.0.mca"):
+        shutil.copy(region, src / name)
+    tags = {"repurposed_structures:mineshaft_icy"}
+    (tmp_path / "outer").mkdir()
+    (tmp_path / "inner").mkdir()
+
+    def progress(run: RunResult, result: Optional[RegionResult]) -> None:
+        # Another run in the same process while the first one is going
+        if result is not None and len(run.regions) == 1:
+            remove_tags(
+                {"minecraft:nothing"},
+                src,
+                tmp_path / "inner",
+                1,
+                "normal",
+                executor=executor,
+            )
+
+    run = remove_tags(
+        tags,
+        src,
+        tmp_path / "outer",
+        1,
+        "normal",
+        progress=progress,
+        executor=executor,
+    )
+    assert [result.count > 0 for result in run.regions] == [True, True]
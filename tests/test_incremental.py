@@ -0,0 +1,153 @@
+"""
+MC Structure Cleaner
+Tests incremental runs from chunk timestamps and the watch loop
+"""
+
+import threading
+import pytest
+from pathlib import Path
+from structurecleaner.region import RegionReader, RegionWriter
+from structurecleaner.remove_tags import remove_tags
+from structurecleaner.removal_strategies import ListRemovalStrategy
+from structurecleaner.results import RunResult
+from structurecleaner.scan_index import ScanIndex
+from structurecleaner.watch import watch
+from tests.abstract_test import TEST_DIR, assert_region_matches
+
+test_file = Path(f"{TEST_DIR}/tags_region/input/r.0.0.mca")
+tags = {"repurposed_structures:mineshaft_icy"}
+
+
+def save_region(path: Path, timestamps: dict) -> None:
+    """Copy the test region to path with new chunk timestamps"""
+    with RegionReader(test_file.read_bytes(), test_file) as region:
+        writer = RegionWriter()
+        for chunk_x, chunk_z in region.existing_chunks():
+            raw = region.raw_chunk(chunk_x, chunk_z)
+            timestamp = timestamps[chunk_x, chunk_z]
+            writer.set_chunk(chunk_x, chunk_z, raw, timestamp)
+        writer.save(path)
+
+
+def resave_chunk(
+    path: Path, timestamp: int, source: Path = test_file, chunk=(0, 1)
+) -> None:
+    """Save a chunk of source, (0, 1) of the original by default, as chunk
+    (0, 1) of path"""
+    with RegionReader(path.read_bytes(), path) as region:
+        with RegionReader.from_file(source) as original:
+            writer = RegionWriter()
+            for chunk_x, chunk_z in region.existing_chunks():
+                writer.copy_chunk(region, chunk_x, chunk_z)
+            writer.set_chunk(0, 1, original.raw_chunk(*chunk), timestamp)
+            writer.save(path)
+
+
+def test_latest_timestamp() -> None:
+    with RegionReader.from_file(test_file) as region:
+        assert region.latest_timestamp() == max(
+            region.timestamp(chunk_x, chunk_z)
+            for chunk_x, chunk_z in region.existing_chunks()
+        )
+
+
+# Pipelined, every worker on its own regions, and split regions
+MODES = [{"prefetch": 2}, {}, {"split": True}]
+
+
+@pytest.mark.parametrize("mode", MODES)
+@pytest.mark.parametrize("output", ["copy", "changed", "link", "inplace"])
+def test_only_new_chunks_are_cleaned(
+    output: str, mode: dict, tmp_path: Path
+) -> None:
+    src, dst, full = tmp_path / "src", tmp_path / "dst", tmp_path / "full"
+    for folder in (src, dst, full):
+        folder.mkdir()
+    region = src / test_file.name
+    save_region(region, {(0, 0): 1000, (0, 1): 2000})
+
+    first = remove_tags(
+        tags, src, dst, 1, "normal", output, incremental=True, **mode
+    )
+    assert first.regions[0].since == 0
+    # Inplace runs keep their index out of the region folder
+    state = tmp_path if output == "inplace" else dst
+    entry = ScanIndex.load(state).entries[str(region.resolve())]
+    assert entry["high_water"] == 2000
+    assert not set(entry["kept"]) & tags
+
+    # The server saves chunk (0, 1) again, with the tag back in it
+    resave_chunk(region, 3000)
+
+    second = remove_tags(
+        tags, src, dst, 1, "normal", output, incremental=True, **mode
+    )
+    result = second.regions[0]
+    assert result.since == 2000
+    assert result.metrics.chunks == 1
+    assert result.count > 0
+
+    # Nothing was saved since
+    third = remove_tags(tags, src, dst, 1, "normal", output, incremental=True)
+    assert third.unchanged == [region]
+
+    # Chunk (0, 0) still comes out clean, from the first run
+    save_region(full / region.name, {(0, 0): 1000, (0, 1): 3000})
+    remove_tags(tags, full, full, 1, "normal", "inplace")
+    target = region if output == "inplace" else dst / region.name
+    assert_region_matches(target, full / region.name)
+
+    # Saved again with other data and without the tag, nothing is removed
+    # but the output still has to take the new chunk
+    expected = full / region.name
+    resave_chunk(region, 4000, expected, (0, 0))
+    fourth = remove_tags(
+        tags, src, dst, 1, "normal", output, incremental=True, **mode
+    )
+    assert fourth.count == 0
+    resave_chunk(expected, 4000, expected, (0, 0))
+    assert_region_matches(target, expected)
+
+
+def test_restored_region_is_cleaned_fully(tmp_path: Path) -> None:
+    src, dst = tmp_path / "src", tmp_path / "dst"
+    src.mkdir()
+    dst.mkdir()
+    save_region(src / test_file.name, {(0, 0): 1000, (0, 1): 2000})
+    remove_tags(tags, src, dst, 1, "normal", incremental=True)
+
+    # Older than the last run, e.g. restored from a backup
+    save_region(src / test_file.name, {(0, 0): 500, (0, 1): 600})
+    result = remove_tags(tags, src, dst, 1, "normal", incremental=True)
+    assert result.regions[0].since == 0
+    assert result.regions[0].metrics.chunks == 2
+
+
+def test_new_strategy_cleans_fully(tmp_path: Path) -> None:
+    src, dst = tmp_path / "src", tmp_path / "dst"
+    src.mkdir()
+    dst.mkdir()
+    region = src / test_file.name
+    save_region(region, {(0, 0): 1000, (0, 1): 2000})
+    remove_tags({"absent:tag"}, src, dst, 1, "normal", incremental=True)
+
+    index = ScanIndex.load(dst)
+    assert index.watermark(region, ListRemovalStrategy({"absent:x"})) == 2000
+    # The last run left these tags in
+    assert index.watermark(region, ListRemovalStrategy(tags)) == 0
+
+
+def test_watch_until_stopped() -> None:
+    stop = threading.Event()
+    passes = []
+
+    def clean() -> RunResult:
+        return RunResult(total=len(passes))
+
+    def on_pass(result: RunResult) -> None:
+        passes.append(result)
+        if len(passes) == 3:
+            stop.set()
+
+    watch(clean, 0.01, stop, on_pass)
+    assert [result.total for result in passes] == [0, 1, 2]
@@ -0,0 +1,128 @@
+"""
+MC Structure Cleaner
+Tests the journal of resumable runs and crash-safe writes
+"""
+
+import json
+import os
+import shutil
+import pytest
+from pathlib import Path
+from structurecleaner.files import atomic_file
+from structurecleaner.journal import JOURNAL_FILE, Journal
+from structurecleaner.remove_tags import remove_tags
+from structurecleaner.results import RegionResult
+from tests.abstract_test import TEST_DIR
+
+test_file = Path(f"{TEST_DIR}/tags_region/input/r.0.0.mca")
+tags = {"repurposed_structures:mineshaft_icy"}
+
+
+def finished(src: Path) -> RegionResult:
+    stat = src.stat()
+    return RegionResult(src, size=stat.st_size, mtime=stat.st_mtime_ns)
+
+
+@pytest.fixture
+def world(tmp_path: Path) -> Path:
+    src = tmp_path / "src"
+    src.mkdir()
+    for name in ("r.0.0.mca", "r.1.0.mca"):
+        shutil.copy2(test_file, src / name)
+    return src
+
+
+def interrupt(src: Path, dst: Path) -> Path:
+    """Leave dst as a run interrupted after the first region"""
+    dst.mkdir()
+    done = src / "r.0.0.mca"
+    (dst / done.name).write_bytes(b"finished")
+    with Journal(dst) as journal:
+        journal.record(finished(done))
+    # A record cut short by the crash
+    with open(dst / JOURNAL_FILE, "a", encoding="utf-8") as file:
+        file.write('{"src": "')
+    return done
+
+
+def test_journal_records_finished_regions(world: Path, tmp_path: Path):
+    dst = tmp_path / "dst"
+    done = interrupt(world, dst)
+
+    journal = Journal(dst, resume=True)
+    assert journal.is_done(done)
+    assert not journal.is_done(world / "r.1.0.mca")
+
+    # Skipped regions weren't finished
+    with journal:
+        journal.record(RegionResult(world / "r.1.0.mca", skipped=True))
+    assert not Journal(dst, resume=True).is_done(world / "r.1.0.mca")
+
+    # A new run starts a new journal
+    with Journal(dst):
+        pass
+    assert not Journal(dst, resume=True).is_done(done)
+
+
+def test_journal_appends_after_torn_line(world: Path, tmp_path: Path):
+    dst = tmp_path / "dst"
+    interrupt(world, dst)
+
+    with Journal(dst, resume=True) as journal:
+        journal.record(finished(world / "r.1.0.mca"))
+
+    lines = (dst / JOURNAL_FILE).read_text(encoding="utf-8").splitlines()
+    assert json.loads(lines[-1])["src"] == str(world.resolve() / "r.1.0.mca")
+    assert len(Journal(dst, resume=True).done) == 2
+
+
+def test_resume_skips_finished_regions(world: Path, tmp_path: Path):
+    dst = tmp_path / "dst"
+    done = interrupt(world, dst)
+
+    result = remove_tags(tags, world, dst, 1, "normal", resume=True)
+    assert result.resumed == [done]
+    assert [region.src for region in result.regions] == [world / "r.1.0.mca"]
+    assert result.done == result.total == 2
+    assert (dst / done.name).read_bytes() == b"finished"
+
+    # Finished runs don't leave a journal or temporary files behind
+    assert sorted(path.name for path in dst.iterdir()) == [
+        "r.0.0.mca",
+        "r.1.0.mca",
+    ]
+
+
+def test_resume_redoes_changed_regions(world: Path, tmp_path: Path):
+    dst = tmp_path / "dst"
+    done = interrupt(world, dst)
+    stat = done.stat()
+    os.utime(done, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    result = remove_tags(tags, world, dst, 1, "normal", resume=True)
+    assert result.resumed == []
+    assert len(result.regions) == 2
+    assert (dst / done.name).read_bytes() != b"finished"
+
+
+def test_without_resume_everything_is_redone(world: Path, tmp_path: Path):
+    dst = tmp_path / "dst"
+    interrupt(world, dst)
+
+    result = remove_tags(tags, world, dst, 1, "normal")
+    assert result.resumed == []
+    assert len(result.regions) == 2
+    assert not (dst / JOURNAL_FILE).exists()
+
+
+def test_atomic_file_keeps_target_on_error(tmp_path: Path):
+    target = tmp_path / "r.0.0.mca"
+    target.write_bytes(b"old")
+
+    with pytest.raises(RuntimeError):
+        with atomic_file(target) as file:
+            file.write(b"partial")
+            raise RuntimeError("interrupted")
+
+    assert target.read_bytes() == b"old"
+    assert list(tmp_path.iterdir()) == [target]
@@ -0,0 +1,74 @@
+"""
+MC Structure Cleaner
+Tests the metrics measured by the workers
+"""
+
+import json
+from pathlib import Path
+from structurecleaner.metrics import MetricsWriter, STAGES, summarize
+from structurecleaner.remove_tags import remove_tags
+from structurecleaner.removal_strategies import ListRemovalStrategy
+from structurecleaner.results import Metrics, RegionResult
+from tests.abstract_test import TEST_DIR, region_task
+
+test_folder = Path(f"{TEST_DIR}/tags_region/input")
+strategy = ListRemovalStrategy({"repurposed_structures:mineshaft_icy"})
+
+
+def test_region_metrics(tmp_path: Path) -> None:
+    src = test_folder / "r.0.0.mca"
+    result = region_task(strategy, src, tmp_path)
+    metrics = result.metrics
+
+    assert metrics.bytes_read == src.stat().st_size
+    assert 0 < metrics.modified <= metrics.chunks <= 1024
+    # Structure entries are cut out without parsing the chunks
+    assert metrics.parse == 0
+    assert all(
+        getattr(metrics, stage) > 0 for stage in STAGES if stage != "parse"
+    )
+    assert metrics.peak_rss > 0
+
+
+def test_add() -> None:
+    total = Metrics(chunks=2, parse=1.0, peak_rss=10)
+    total.add(Metrics(chunks=3, parse=0.5, peak_rss=5))
+    assert (total.chunks, total.parse, total.peak_rss) == (5, 1.5, 10)
+
+
+def test_summary() -> None:
+    results = [
+        RegionResult(Path("a"), seconds=1.0, metrics=Metrics(chunks=4)),
+        RegionResult(Path("b"), seconds=2.0, metrics=Metrics(chunks=6)),
+        RegionResult(Path("c"), seconds=9.0, skipped=True),
+    ]
+    lines = summarize(results, 2.0)
+    assert "Scanned 10 chunks, modified 0" in lines
+    assert lines[-1] == "Slowest region: b (2.000 s)"
+
+
+def test_metrics_file(tmp_path: Path) -> None:
+    path = tmp_path / "metrics.jsonl"
+    dst = tmp_path / "output"
+    dst.mkdir()
+
+    remove_tags(
+        {"repurposed_structures:mineshaft_icy"},
+        test_folder,
+        dst,
+        1,
+        "normal",
+        metrics=path,
+    )
+
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert len(records) == len(list(test_folder.iterdir()))
+    assert {record["src"] for record in records} == {
+        str(src) for src in test_folder.iterdir()
+    }
+    assert sum(record["modified"] for record in records) > 0
+
+
+def test_no_metrics_file() -> None:
+    with MetricsWriter(None) as writer:
+        writer.write(RegionResult(Path("a")))
@@ -0,0 +1,163 @@
+"""
+MC Structure Cleaner
+Tests the streaming NBT scanner against full NBT parsing
+"""
+
+import itertools as it
+import pytest
+from io import BytesIO
+from nbt import nbt
+from pathlib import Path
+from structurecleaner.errors import CorruptChunkError
+from structurecleaner.nbt_scan import (
+    cut_ranges,
+    scan_chunk,
+    scan_entities,
+    scan_poi,
+)
+from structurecleaner.region import RegionReader, decompress_chunk, parse_chunk
+from structurecleaner.removal_strategies import PurgeRemovalStrategy
+from tests.abstract_test import TEST_DIR
+
+test_file = Path(f"{TEST_DIR}/1.15.2/input/region/r.0.0.mca")
+
+
+def long_array(name: str) -> nbt.TAG_Long_Array:
+    tag = nbt.TAG_Long_Array(name=name)
+    tag.value = [1, 2, 3]
+    return tag
+
+
+def to_buffer(data: nbt.NBTFile) -> bytes:
+    buffer = BytesIO()
+    data.write_file(buffer=buffer)
+    return buffer.getvalue()
+
+
+def test_scan_old_layout() -> None:
+    region = RegionReader.from_file(test_file)
+    for chunk_x, chunk_z in it.product(range(32), repeat=2):
+        raw = region.raw_chunk(chunk_x, chunk_z)
+        if raw is None:
+            continue
+
+        buffer = decompress_chunk(raw)
+        scan = scan_chunk(buffer)
+        data = parse_chunk(buffer)
+        structures = data["Level"]["Structures"]
+        assert scan.starts == [t.name for t in structures["Starts"].tags]
+        assert scan.references == [
+            t.name for t in structures["References"].tags
+        ]
+
+
+def test_scan_new_layout() -> None:
+    data = nbt.NBTFile()
+    data.tags.append(nbt.TAG_Int(name="DataVersion", value=3465))
+    sections = nbt.TAG_List(name="sections", type=nbt.TAG_Compound)
+    sections.tags.append(nbt.TAG_Compound())
+    sections.tags[0].tags.append(long_array("data"))
+    data.tags.append(sections)
+
+    structures = nbt.TAG_Compound(name="structures")
+    starts = nbt.TAG_Compound(name="starts")
+    starts.tags.append(nbt.TAG_Compound(name="mod:tower"))
+    references = nbt.TAG_Compound(name="References")
+    references.tags.append(long_array("mod:tower"))
+    references.tags.append(long_array("minecraft:village"))
+    structures.tags.extend([starts, references])
+    data.tags.append(structures)
+
+    scan = scan_chunk(to_buffer(data))
+    assert scan.starts == ["mod:tower"]
+    assert scan.references == ["mod:tower", "minecraft:village"]
+
+
+def entities_chunk() -> nbt.NBTFile:
+    data = nbt.NBTFile()
+    entities = nbt.TAG_List(name="Entities", type=nbt.TAG_Compound)
+    for name, rider in (("minecraft:zombie", "mod:rider"), ("mod:beast", "")):
+        entity = nbt.TAG_Compound()
+        entity.tags.append(nbt.TAG_String(name="id", value=name))
+        entity.tags.append(long_array("UUID"))
+        if rider:
+            passengers = nbt.TAG_List(name="Passengers", type=nbt.TAG_Compound)
+            passengers.tags.append(nbt.TAG_Compound())
+            passengers.tags[0].tags.append(
+                nbt.TAG_String(name="id", value=rider)
+            )
+            entity.tags.append(passengers)
+        entities.tags.append(entity)
+    data.tags.append(entities)
+    return data
+
+
+def poi_chunk() -> nbt.NBTFile:
+    data = nbt.NBTFile()
+    sections = nbt.TAG_Compound(name="Sections")
+    for y, types in (("0", ["minecraft:home", "mod:altar"]), ("-1", [])):
+        section = nbt.TAG_Compound(name=y)
+        section.tags.append(nbt.TAG_Byte(name="Valid", value=1))
+        records = nbt.TAG_List(name="Records", type=nbt.TAG_Compound)
+        for poi_type in types:
+            record = nbt.TAG_Compound()
+            record.tags.append(nbt.TAG_Int(name="free_tickets", value=0))
+            record.tags.append(nbt.TAG_String(name="type", value=poi_type))
+            records.tags.append(record)
+        section.tags.append(records)
+        sections.tags.append(section)
+    data.tags.append(sections)
+    return data
+
+
+def test_scan_entities() -> None:
+    assert scan_entities(to_buffer(entities_chunk())) == [
+        "minecraft:zombie",
+        "mod:rider",
+        "mod:beast",
+    ]
+
+
+def test_scan_poi() -> None:
+    assert scan_poi(to_buffer(poi_chunk())) == ["minecraft:home", "mod:altar"]
+
+
+def test_scan_without_structures() -> None:
+    data = nbt.NBTFile()
+    data.tags.append(nbt.TAG_String(name="Status", value="empty"))
+
+    scan = scan_chunk(to_buffer(data))
+    assert scan == ([], [], [])
+
+
+def test_cut_structure_entries() -> None:
+    region = RegionReader.from_file(test_file)
+    strategy = PurgeRemovalStrategy()
+    for chunk_x, chunk_z in it.product(range(32), repeat=2):
+        raw = region.raw_chunk(chunk_x, chunk_z)
+        if raw is None:
+            continue
+
+        buffer = decompress_chunk(raw)
+        ranges = [
+            (start, end)
+            for name, start, end in scan_chunk(buffer).entries
+            if strategy.check_name(name)
+        ]
+        data = parse_chunk(buffer)
+        structures = data["Level"]["Structures"]
+        for compound in (structures["Starts"], structures["References"]):
+            for tag in list(compound.tags):
+                if strategy.check_name(tag.name):
+                    del compound[tag.name]
+
+        # Same as removing the tags from the parsed chunk
+        assert cut_ranges(buffer, ranges) == to_buffer(data)
+
+
+def test_truncated_chunk() -> None:
+    with RegionReader.from_file(test_file) as region:
+        buffer = decompress_chunk(region.raw_chunk(0, 0))
+    for end in (0, 1, 4, len(buffer) // 2, len(buffer) - 1):
+        with pytest.raises(CorruptChunkError):
+            scan_chunk(buffer[:end])
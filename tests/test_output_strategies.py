@@ -0,0 +1,171 @@
+"""
+MC Structure Cleaner
+Tests the ways processed region files are written
+"""
+
+import os
+import shutil
+import pytest
+from pathlib import Path
+from structurecleaner.compression import UNCOMPRESSED
+from structurecleaner.region import RegionWriter, encode_chunk
+from structurecleaner.remove_tags import _remove_tags_region, remove_tags
+from structurecleaner.removal_strategies import ListRemovalStrategy
+from structurecleaner.output_strategies import (
+    ChangedOutputStrategy,
+    CopyOutputStrategy,
+    LinkOutputStrategy,
+    InPlaceOutputStrategy,
+)
+from structurecleaner.results import RegionResult
+from tests.abstract_test import TEST_DIR, assert_region_matches, fragment
+from tests.test_region import oversized_chunk
+
+TS = {
+    "repurposed_structures:mineshaft_icy",
+    "repurposed_structures:mineshaft_end",
+}
+
+tag_strategy = ListRemovalStrategy(TS)
+empty_strategy = ListRemovalStrategy(set())
+
+test_data_path = f"{TEST_DIR}/tags_region"
+file_name = "r.0.0.mca"
+test_file = Path(f"{test_data_path}/input/{file_name}")
+
+
+def test_changed_skips_unchanged(tmp_path: Path) -> None:
+    strategy = ChangedOutputStrategy()
+    _remove_tags_region(empty_strategy, test_file, tmp_path, strategy)
+    assert not (tmp_path / file_name).exists()
+
+    _remove_tags_region(tag_strategy, test_file, tmp_path, strategy)
+    target_file = Path(f"{test_data_path}/output_remove/{file_name}")
+    assert_region_matches(tmp_path / file_name, target_file)
+
+
+def test_link_unchanged(tmp_path: Path) -> None:
+    strategy = LinkOutputStrategy()
+    _remove_tags_region(empty_strategy, test_file, tmp_path, strategy)
+    assert (tmp_path / file_name).samefile(test_file)
+
+
+def test_link_replaced_by_changed(tmp_path: Path) -> None:
+    src, dst = tmp_path / "src", tmp_path / "dst"
+    src.mkdir()
+    dst.mkdir()
+    shutil.copy(test_file, src / file_name)
+    strategy = LinkOutputStrategy()
+    _remove_tags_region(empty_strategy, src / file_name, dst, strategy)
+
+    # The cleaned region replaces the link instead of writing through it
+    _remove_tags_region(tag_strategy, src / file_name, dst, strategy)
+    assert (src / file_name).read_bytes() == test_file.read_bytes()
+    target_file = Path(f"{test_data_path}/output_remove/{file_name}")
+    assert_region_matches(dst / file_name, target_file)
+
+
+def test_inplace(tmp_path: Path) -> None:
+    src = tmp_path / file_name
+    shutil.copy(test_file, src)
+    strategy = InPlaceOutputStrategy()
+
+    _remove_tags_region(empty_strategy, src, tmp_path, strategy)
+    assert src.read_bytes() == test_file.read_bytes()
+
+    _remove_tags_region(tag_strategy, src, tmp_path, strategy)
+    target_file = Path(f"{test_data_path}/output_remove/{file_name}")
+    assert_region_matches(src, target_file)
+    assert list(tmp_path.iterdir()) == [src]
+
+
+def test_written_file_modes(tmp_path: Path) -> None:
+    src, dst = tmp_path / "src", tmp_path / "dst"
+    src.mkdir()
+    dst.mkdir()
+    shutil.copy(test_file, src / file_name)
+    (src / file_name).chmod(0o640)
+
+    # New files get the umask's permissions, replaced files keep theirs
+    umask = os.umask(0o022)
+    try:
+        _remove_tags_region(
+            tag_strategy, src / file_name, dst, ChangedOutputStrategy()
+        )
+        strategy = InPlaceOutputStrategy()
+        _remove_tags_region(tag_strategy, src / file_name, src, strategy)
+    finally:
+        os.umask(umask)
+    assert (dst / file_name).stat().st_mode & 0o777 == 0o644
+    assert (src / file_name).stat().st_mode & 0o777 == 0o640
+
+
+def test_compact_rewrites_fragmented(tmp_path: Path) -> None:
+    src, dst = tmp_path / "src", tmp_path / "dst"
+    src.mkdir()
+    dst.mkdir()
+    fragment(test_file, src / file_name, 1)
+    size = (src / file_name).stat().st_size
+
+    # Nothing to remove, only written when compacting
+    for strategy, written in (
+        (ChangedOutputStrategy(), False),
+        (ChangedOutputStrategy(compact=True), True),
+    ):
+        result = RegionResult(src / file_name)
+        _remove_tags_region(
+            empty_strategy, src / file_name, dst, strategy, result=result
+        )
+        assert (dst / file_name).exists() == written
+
+    assert result.reclaimed == size - (dst / file_name).stat().st_size > 0
+    assert_region_matches(dst / file_name, src / file_name)
+
+    # Already compact regions are left alone
+    shutil.copy(dst / file_name, src / file_name)
+    (dst / file_name).unlink()
+    _remove_tags_region(empty_strategy, src / file_name, dst, strategy)
+    assert not (dst / file_name).exists()
+
+
+def test_compact_inplace(tmp_path: Path) -> None:
+    src = tmp_path / file_name
+    fragment(test_file, src, 1)
+    size = src.stat().st_size
+    strategy = InPlaceOutputStrategy(compact=True, order="morton")
+
+    result = RegionResult(src)
+    _remove_tags_region(
+        empty_strategy, src, tmp_path, strategy, result=result
+    )
+    assert result.reclaimed == size - src.stat().st_size > 0
+    assert result.digest is None
+    assert_region_matches(src, test_file)
+
+
+@pytest.mark.parametrize("strategy", [CopyOutputStrategy, LinkOutputStrategy])
+def test_kept_with_mcc_files(tmp_path: Path, strategy) -> None:
+    src, dst = tmp_path / "src", tmp_path / "dst"
+    src.mkdir()
+    dst.mkdir()
+    writer = RegionWriter()
+    writer.set_chunk(1, 2, encode_chunk(oversized_chunk(), UNCOMPRESSED), 9)
+    writer.save(src / "r.1.-1.mca")
+    shutil.copy(test_file, src / file_name)
+    external = "c.33.-30.mcc"
+
+    # .mcc files aren't regions of their own
+    run = remove_tags(TS, src, dst, 1, "normal", strategy().get_name())
+    assert run.total == 2 and not run.errors
+
+    # Kept regions bring their .mcc files, other regions' stay behind
+    shutil.rmtree(dst)
+    dst.mkdir()
+    strategy().keep(src / "r.1.-1.mca", dst)
+    assert sorted(path.name for path in dst.iterdir()) == [
+        external,
+        "r.1.-1.mca",
+    ]
+    assert (dst / external).read_bytes() == (src / external).read_bytes()
+    strategy().keep(src / file_name, dst)
+    assert (dst / file_name).exists()
@@ -0,0 +1,93 @@
+"""
+MC Structure Cleaner
+Tests the staged read, clean and write pipeline
+"""
+
+import threading
+import pytest
+from pathlib import Path
+from structurecleaner.executors import INLINE, THREAD, make_pool
+from structurecleaner.pipeline import NFS_PREFETCH, run_pipeline
+from structurecleaner.remove_tags import remove_tags
+from tests.abstract_test import TEST_DIR
+
+test_folder = Path(f"{TEST_DIR}/tags_region/input")
+
+
+def test_every_item_is_written() -> None:
+    written = []
+
+    def write(item: int) -> int:
+        written.append(item)
+        return item
+
+    with make_pool(THREAD, 2) as pool:
+        results = run_pipeline(range(20), abs, abs, write, pool, 3)
+        assert sorted(results) == list(range(20))
+    assert sorted(written) == list(range(20))
+
+
+def test_limit() -> None:
+    lock = threading.Lock()
+    in_flight = [0, 0]  # Current, most
+
+    def read(item: int) -> int:
+        with lock:
+            in_flight[0] += 1
+            in_flight[1] = max(in_flight)
+        return item
+
+    def write(item: int) -> int:
+        with lock:
+            in_flight[0] -= 1
+        return item
+
+    with make_pool(THREAD, 4) as pool:
+        results = list(run_pipeline(range(50), read, abs, write, pool, 3))
+    assert len(results) == 50
+    assert in_flight == [0, 3]
+
+
+def fail(item: int) -> int:
+    if item == 5:
+        raise ValueError(item)
+    return item
+
+
+@pytest.mark.parametrize("stage", ["read", "process", "write"])
+def test_errors(stage: str) -> None:
+    stages = {"read": abs, "process": abs, "write": abs, stage: fail}
+    with make_pool(INLINE, 1) as pool:
+        with pytest.raises(ValueError):
+            list(
+                run_pipeline(
+                    range(10),
+                    stages["read"],
+                    stages["process"],
+                    stages["write"],
+                    pool,
+                    2,
+                )
+            )
+
+
+@pytest.mark.parametrize("executor", ["process", THREAD, INLINE])
+def test_prefetch_matches(executor: str, tmp_path: Path) -> None:
+    tags = {"repurposed_structures:mineshaft_icy"}
+    pipelined, direct = tmp_path / "pipelined", tmp_path / "direct"
+    pipelined.mkdir()
+    direct.mkdir()
+
+    remove_tags(
+        tags,
+        test_folder,
+        pipelined,
+        2,
+        "normal",
+        executor=executor,
+        prefetch=NFS_PREFETCH,
+    )
+    remove_tags(tags, test_folder, direct, 2, "normal")
+
+    for file in direct.iterdir():
+        assert (pipelined / file.name).read_bytes() == file.read_bytes()
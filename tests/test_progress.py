@@ -0,0 +1,100 @@
+"""
+MC Structure Cleaner
+Tests the progress line rendered by the main process
+"""
+
+from io import StringIO
+from pathlib import Path
+from structurecleaner.progress import ConsoleProgress, Progress
+from structurecleaner.remove_tags import remove_tags
+from structurecleaner.results import RegionResult, RunResult
+from tests.abstract_test import TEST_DIR
+
+
+class Terminal(StringIO):
+    def isatty(self) -> bool:
+        return True
+
+
+def test_piped_progress() -> None:
+    stream = StringIO()
+    progress = Progress(200, 200 * 10, stream=stream)
+    for _ in range(200):
+        progress.advance(10, 2)
+    progress.finish()
+
+    lines = stream.getvalue().splitlines()
+    assert len(lines) == 101
+    assert lines[0].startswith("[1/200] 0% | ")
+    assert lines[-1].startswith("[200/200] 100% | ")
+    assert lines[-1].endswith("| 400 tags removed | ETA 0:00:00")
+
+
+def test_terminal_progress() -> None:
+    stream = Terminal()
+    progress = Progress(3, 30, stream=stream, done=1)
+    progress.advance(10, 1)
+    progress.log("r.0.0.mca is empty.")
+    progress.advance(20, 2)
+    progress.finish()
+
+    output = stream.getvalue()
+    assert "\n" not in output.split("r.0.0.mca is empty.")[0]
+    assert "\rr.0.0.mca is empty.\n\r[2/3]" in output
+    assert output.endswith("3 tags removed | ETA 0:00:00\n")
+
+
+def test_verbose_has_no_progress() -> None:
+    stream = StringIO()
+    progress = Progress(2, 20, verbose=True, stream=stream)
+    progress.advance(10, 1)
+    progress.log("detail")
+    progress.advance(10, 1)
+    progress.finish()
+    assert stream.getvalue() == "detail\n"
+
+
+def test_workers_are_quiet(tmp_path: Path, capfd) -> None:
+    remove_tags(
+        {"repurposed_structures:mineshaft_icy"},
+        Path(f"{TEST_DIR}/tags_region/input"),
+        tmp_path,
+        1,
+        "normal",
+        progress=ConsoleProgress(),
+    )
+    output = capfd.readouterr().out
+    assert "Checking file" not in output
+    assert "[1/1] 100% | " in output
+
+
+def test_library_runs_print_nothing(tmp_path: Path, capfd) -> None:
+    remove_tags(
+        {"repurposed_structures:mineshaft_icy"},
+        Path(f"{TEST_DIR}/tags_region/input"),
+        tmp_path,
+        1,
+        "normal",
+    )
+    assert capfd.readouterr().out == ""
+
+
+def test_console_progress() -> None:
+    stream = StringIO()
+    progress = ConsoleProgress(verbose=True, stream=stream)
+    run = RunResult(total=2, total_bytes=20, jobs=1, executor="inline")
+    progress(run, None)
+
+    for src, skipped in (("a", False), ("b", True)):
+        result = RegionResult(Path(src), count=1, skipped=skipped)
+        result.removed_tags = {"mod:tower"}
+        result.error = "b is empty." if skipped else ""
+        run.regions.append(result)
+        progress(run, result)
+
+    assert stream.getvalue().splitlines() == [
+        "Using 1 inline workers",
+        "[1/2] a: 1 instances of tags removed in 0.000 s",
+        "Removed tags: ['mod:tower']",
+        "b is empty.",
+    ]
@@ -0,0 +1,149 @@
+"""
+MC Structure Cleaner
+Tests sector level region reading and writing
+"""
+
+import itertools as it
+import pytest
+from nbt import nbt
+from pathlib import Path
+from structurecleaner.compression import UNCOMPRESSED
+from structurecleaner.constants import SECTOR_SIZE
+from structurecleaner.region import (
+    CHUNK_ORDERS,
+    RegionReader,
+    RegionWriter,
+    encode_chunk,
+    morton_index,
+)
+from tests.abstract_test import TEST_DIR, fragment
+
+test_file = Path(f"{TEST_DIR}/tags_region/input/r.0.0.mca")
+
+
+def test_copy_is_verbatim(tmp_path: Path) -> None:
+    region = RegionReader.from_file(test_file)
+    writer = RegionWriter()
+    for chunk_x, chunk_z in it.product(range(32), repeat=2):
+        if region.chunk_location(chunk_x, chunk_z) != (0, 0):
+            writer.copy_chunk(region, chunk_x, chunk_z)
+    writer.save(tmp_path / "r.0.0.mca")
+
+    copy = RegionReader.from_file(tmp_path / "r.0.0.mca")
+    for chunk_x, chunk_z in it.product(range(32), repeat=2):
+        assert copy.raw_chunk(chunk_x, chunk_z) == region.raw_chunk(
+            chunk_x, chunk_z
+        )
+        assert copy.timestamp(chunk_x, chunk_z) == region.timestamp(
+            chunk_x, chunk_z
+        )
+
+
+def test_add_chunk_keeps_data(tmp_path: Path) -> None:
+    region = RegionReader.from_file(test_file)
+    data = region.chunk_data(0, 0)
+    writer = RegionWriter()
+    writer.add_chunk(0, 0, data, 1234)
+    writer.save(tmp_path / "r.0.0.mca")
+
+    copy = RegionReader.from_file(tmp_path / "r.0.0.mca")
+    assert copy.timestamp(0, 0) == 1234
+    assert copy.chunk_location(0, 0) == (2, 2)
+    assert copy.chunk_location(0, 1) == (0, 0)
+    assert copy.chunk_data(0, 0)["DataVersion"].value == 2230
+
+
+def test_reader_is_mapped(tmp_path: Path) -> None:
+    with RegionReader.from_file(test_file) as region:
+        writer = RegionWriter()
+        writer.copy_chunk(region, 0, 0)
+        assert writer.chunks[0][0] is region
+        expected = writer.to_bytes()
+        writer.save(tmp_path / "r.0.0.mca")
+    assert region.data.closed
+
+    assert (tmp_path / "r.0.0.mca").read_bytes() == expected
+
+
+def oversized_chunk() -> nbt.NBTFile:
+    data = nbt.NBTFile()
+    data.tags.append(nbt.TAG_Int(name="DataVersion", value=3465))
+    blob = nbt.TAG_Byte_Array(name="blob")
+    blob.value = bytearray(300 * SECTOR_SIZE)
+    data.tags.append(blob)
+    return data
+
+
+def test_oversized_chunk(tmp_path: Path) -> None:
+    raw = encode_chunk(oversized_chunk(), UNCOMPRESSED)
+    writer = RegionWriter()
+    writer.set_chunk(1, 2, raw, 99)
+    writer.save(tmp_path / "r.1.-1.mca")
+
+    external = tmp_path / "c.33.-30.mcc"
+    assert external.stat().st_size == len(raw) - 5
+    assert (tmp_path / "r.1.-1.mca").stat().st_size == 3 * SECTOR_SIZE
+
+    # Copying the chunk writes the .mcc file next to the new region
+    copy_folder = tmp_path / "copy"
+    copy_folder.mkdir()
+    with RegionReader.from_file(tmp_path / "r.1.-1.mca") as region:
+        assert region.is_external(1, 2)
+        assert region.raw_chunk(1, 2) == raw
+        copy = RegionWriter()
+        copy.copy_chunk(region, 1, 2)
+        copy.save(copy_folder / "r.1.-1.mca")
+
+    assert (copy_folder / external.name).read_bytes() == raw[5:]
+    with RegionReader.from_file(copy_folder / "r.1.-1.mca") as region:
+        assert region.chunk_data(1, 2)["DataVersion"].value == 3465
+
+
+def test_oversized_chunk_needs_path() -> None:
+    writer = RegionWriter()
+    writer.set_chunk(0, 0, encode_chunk(oversized_chunk(), UNCOMPRESSED), 0)
+    with pytest.raises(ValueError):
+        writer.to_bytes()
+
+
+def test_morton_index() -> None:
+    # (0, 0), (1, 0), (0, 1), (1, 1), then the next 2x2 block
+    assert [morton_index(x, z) for x, z in [(0, 0), (1, 0), (0, 1)]] == [
+        0,
+        1,
+        2,
+    ]
+    assert morton_index(2, 0) == 4
+    assert morton_index(31, 31) == 1023
+    for layout in CHUNK_ORDERS.values():
+        assert sorted(layout) == list(range(1024))
+
+
+@pytest.mark.parametrize("order", list(CHUNK_ORDERS))
+def test_compact_layout(order: str, tmp_path: Path) -> None:
+    fragmented = tmp_path / "fragmented" / "r.0.0.mca"
+    fragmented.parent.mkdir()
+    fragment(test_file, fragmented, 2)
+
+    region = RegionReader.from_file(fragmented)
+    writer = RegionWriter()
+    for chunk_x, chunk_z in region.existing_chunks():
+        writer.copy_chunk(region, chunk_x, chunk_z)
+    writer.save(tmp_path / "r.0.0.mca", order)
+
+    assert writer.size() == (tmp_path / "r.0.0.mca").stat().st_size
+    assert writer.size() < fragmented.stat().st_size
+    compact = RegionReader.from_file(tmp_path / "r.0.0.mca")
+    sectors = []
+    for index in CHUNK_ORDERS[order]:
+        chunk_x, chunk_z = index % 32, index // 32
+        assert compact.raw_chunk(chunk_x, chunk_z) == region.raw_chunk(
+            chunk_x, chunk_z
+        )
+        sector, count = compact.chunk_location(chunk_x, chunk_z)
+        if sector:
+            sectors.append((sector, count))
+
+    # Back to back, in the order given
+    for (sector, count), (next_sector, _) in zip(sectors, sectors[1:]):
+        assert next_sector == sector + count
@@ -0,0 +1,55 @@
+"""
+MC Structure Cleaner
+Tests tag name matching of the removal strategies
+"""
+
+from structurecleaner.removal_strategies import (
+    ListRemovalStrategy,
+    PurgeRemovalStrategy,
+)
+
+
+def test_list_exact_and_prefix() -> None:
+    strategy = ListRemovalStrategy({"mod:tower", "other:*"})
+    assert strategy.check_name("mod:tower")
+    assert not strategy.check_name("mod:tower_2")
+    assert strategy.check_name("other:anything")
+    assert strategy.check_name("other:")
+    assert not strategy.check_name("Other:anything")
+
+
+def test_list_glob_and_regex() -> None:
+    strategy = ListRemovalStrategy(
+        {"mod:*_tower", "mod:ruin_?", r"re:mod:(camp|fort)_\d+"}
+    )
+    assert strategy.check_name("mod:stone_tower")
+    assert not strategy.check_name("mod:stone_tower_top")
+    assert strategy.check_name("mod:ruin_a")
+    assert not strategy.check_name("mod:ruin_ab")
+    assert strategy.check_name("mod:camp_12")
+    assert not strategy.check_name("mod:camp_12a")
+    assert not strategy.check_name("mod:house")
+
+
+def test_list_special_characters() -> None:
+    strategy = ListRemovalStrategy({"my structure.v2*", "a+b"})
+    assert strategy.check_name("my structure.v2 big")
+    assert not strategy.check_name("my structureXv2")
+    assert strategy.check_name("a+b")
+    assert not strategy.check_name("aab")
+
+
+def test_decisions_are_cached() -> None:
+    strategy = ListRemovalStrategy({"mod:*"})
+    assert strategy.check_name("mod:a")
+    strategy.matcher = None
+    assert strategy.check_name("mod:a")
+    assert not strategy.check_name("mod:b")
+
+
+def test_purge() -> None:
+    strategy = PurgeRemovalStrategy()
+    assert not strategy.check_name("Mineshaft")
+    assert not strategy.check_name("minecraft:village")
+    assert not strategy.check_name("MINECRAFT:custom")
+    assert strategy.check_name("mod:mineshaft")
@@ -32,6 +32,14 @@ def test_rt_remove_1_15_2(tmp_path: Path) -> None:
     remove_tags_test("1.15.2", "region", "remove", TS, tmp_path)
 
 
+def test_rt_remove_1_15_2_split(tmp_path: Path) -> None:
+    """
+    Test remove mode for 1.15.2 with regions split between processes
+    Expected behaviour: Only tags in TS are removed
+    """
+    remove_tags_test("1.15.2", "region", "remove", TS, tmp_path, split=True)
+
+
 # def test_rt_purge_1_18_2(tmp_path: Path) -> None:
 #    """
 #    Test purge mode for 1.15.2
@@ -4,7 +4,6 @@ Tests tag removal logic for individual region files.
 Uses a custom 1.15.2 region file
 """
 
-import filecmp
 import pytest
 from structurecleaner.remove_tags import _remove_tags_region
 from structurecleaner.errors import (
@@ -16,7 +15,7 @@ from structurecleaner.removal_strategies import (
     ListRemovalStrategy,
     PurgeRemovalStrategy,
 )
-from tests.abstract_test import TEST_DIR
+from tests.abstract_test import TEST_DIR, assert_region_matches
 from pathlib import Path
 
 TS = {
@@ -55,7 +54,7 @@ def test_mca_purge_empty(tmp_path: Path) -> None:
     target_file = Path(f"{test_data_path}/output_purge/{file_name}")
     result = _remove_tags_region(purge_strategy, test_file, tmp_path)
     assert result != 0
-    assert filecmp.cmp((tmp_path / file_name), target_file)
+    assert_region_matches(tmp_path / file_name, target_file)
 
 
 def test_mca_remove_empty(tmp_path: Path) -> None:
@@ -63,7 +62,7 @@ def test_mca_remove_empty(tmp_path: Path) -> None:
     target_file = Path(f"{test_data_path}/output_remove_0/{file_name}")
     result = _remove_tags_region(empty_strategy, test_file, tmp_path)
     assert result == 0
-    assert filecmp.cmp((tmp_path / file_name), target_file)
+    assert_region_matches(tmp_path / file_name, target_file)
 
 
 def test_mca_remove(tmp_path: Path) -> None:
@@ -71,4 +70,4 @@ def test_mca_remove(tmp_path: Path) -> None:
     target_file = Path(f"{test_data_path}/output_remove/{file_name}")
     result = _remove_tags_region(tag_strategy, test_file, tmp_path)
     assert result != 0
-    assert filecmp.cmp((tmp_path / file_name), target_file)
+    assert_region_matches(tmp_path / file_name, target_file)
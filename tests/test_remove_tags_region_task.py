@@ -5,9 +5,9 @@ Uses a custom 1.15.2 region file
 """
 
 from pathlib import Path
-from structurecleaner.remove_tags import _remove_tags_region_task
+from structurecleaner.remove_tags import _schedule_regions
 from structurecleaner.removal_strategies import ListRemovalStrategy
-from tests.abstract_test import TEST_DIR
+from tests.abstract_test import TEST_DIR, region_task
 
 TS = {
     "repurposed_structures:mineshaft_icy",
@@ -22,23 +22,39 @@ file_name = "r.0.0.mca"
 
 def test_remove_tags_region_task(tmp_path: Path) -> None:
     test_file = Path(f"{test_data_path}/input/{file_name}")
-    result = _remove_tags_region_task((strategy, test_file, tmp_path))
-    assert result != 0
+    result = region_task(strategy, test_file, tmp_path)
+    assert result.count != 0
+    assert not result.skipped
+    assert not result.error
 
 
 def test_empty_mca(tmp_path: Path) -> None:
     test_file = Path(f"{test_data_path}/input_empty/{file_name}")
-    result = _remove_tags_region_task((strategy, test_file, tmp_path))
-    assert result == 0
+    result = region_task(strategy, test_file, tmp_path)
+    assert result.count == 0
+    assert result.skipped
+    assert result.error == f"{test_file} is empty."
 
 
 def test_not_mca(tmp_path: Path) -> None:
     test_file = Path(f"{test_data_path}/input_wrong_filetype/r.0.0.txt")
-    result = _remove_tags_region_task((strategy, test_file, tmp_path))
-    assert result == 0
+    result = region_task(strategy, test_file, tmp_path)
+    assert result.count == 0
+    assert result.skipped
+    assert result.error == f"{test_file} is not a valid region file."
 
 
 def test_too_short(tmp_path: Path) -> None:
     test_file = Path("./")
-    result = _remove_tags_region_task((strategy, test_file, tmp_path))
-    assert result == 0
+    result = region_task(strategy, test_file, tmp_path)
+    assert result.count == 0
+    assert result.skipped
+
+
+def test_schedule_largest_first() -> None:
+    world = Path(f"{TEST_DIR}/1.15.2/input")
+    folders = [(world / "region", world), (world / "DIM1/region", world)]
+    regions = _schedule_regions(folders)
+    sizes = [region.stat().st_size for region, _ in regions]
+    assert len(regions) == 4
+    assert sizes == sorted(sizes, reverse=True)
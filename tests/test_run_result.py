@@ -0,0 +1,50 @@
+"""
+MC Structure Cleaner
+Tests the results returned by library runs
+"""
+
+from pathlib import Path
+from structurecleaner import RunResult, remove_tags
+from tests.abstract_test import TEST_DIR
+
+test_folder = Path(f"{TEST_DIR}/tags_region/input")
+tags = {"repurposed_structures:mineshaft_icy"}
+
+
+def test_run_result(tmp_path: Path) -> None:
+    src = tmp_path / "input"
+    src.mkdir()
+    (src / "r.0.0.mca").write_bytes((test_folder / "r.0.0.mca").read_bytes())
+    (src / "r.1.0.mca").touch()
+    dst = tmp_path / "output"
+    dst.mkdir()
+
+    events = []
+    result = remove_tags(
+        tags,
+        src,
+        dst,
+        1,
+        "normal",
+        progress=lambda run, region: events.append(region),
+    )
+
+    assert isinstance(result, RunResult)
+    assert (result.total, result.done) == (2, 2)
+    assert result.count > 0
+    assert result.removed_tags == tags
+    empty = src / "r.1.0.mca"
+    assert result.skipped == [empty]
+    assert result.errors == {empty: f"{empty} is empty."}
+    assert result.seconds > 0
+    # The cleaned region is written without the source's free sectors
+    written = (dst / "r.0.0.mca").stat().st_size
+    source = (src / "r.0.0.mca").stat().st_size
+    assert result.reclaimed == source - written
+
+    # Once when the regions are scheduled, then once per region
+    assert events[0] is None
+    assert sorted(region.src.name for region in events[1:]) == [
+        "r.0.0.mca",
+        "r.1.0.mca",
+    ]
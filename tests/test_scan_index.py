@@ -0,0 +1,86 @@
+"""
+MC Structure Cleaner
+Tests the persistent index of scanned regions
+"""
+
+import os
+import pytest
+import shutil
+from pathlib import Path
+from multiprocessing import cpu_count
+from structurecleaner.remove_tags import remove_tags
+from structurecleaner.removal_strategies import ListRemovalStrategy
+from structurecleaner.scan_index import ScanIndex, INDEX_FILE
+from tests.abstract_test import TEST_DIR
+
+TS = {
+    "repurposed_structures:mineshaft_icy",
+    "repurposed_structures:mineshaft_end",
+}
+
+absent = {"absent:structure"}
+
+
+def test_index_skips_unchanged(tmp_path: Path) -> None:
+    src = tmp_path / "region"
+    dst = tmp_path / "new_region"
+    shutil.copytree(f"{TEST_DIR}/1.15.2/input/region", src)
+    dst.mkdir()
+
+    remove_tags(absent, src, dst, cpu_count() // 2, "normal", index=True)
+    assert (dst / INDEX_FILE).exists()
+
+    index = ScanIndex.load(dst)
+    region = src / "r.0.0.mca"
+    assert TS <= set(index.entries[str(region.resolve())]["tags"])
+    assert index.can_skip(region, ListRemovalStrategy(absent))
+    assert not index.can_skip(region, ListRemovalStrategy(TS))
+
+    # Same contents with a new modification time
+    os.utime(region, ns=(0, 0))
+    assert index.can_skip(region, ListRemovalStrategy(absent))
+
+    with open(region, "r+b") as file:
+        file.seek(8192)
+        file.write(b"changed")
+    os.utime(region, ns=(10**9, 10**9))
+    assert not index.can_skip(region, ListRemovalStrategy(absent))
+
+
+def test_index_missing(tmp_path: Path) -> None:
+    index = ScanIndex.load(tmp_path)
+    assert index.entries == {}
+    (tmp_path / INDEX_FILE).write_text("not json")
+    assert ScanIndex.load(tmp_path).entries == {}
+
+
+def test_inplace_index_stays_out_of_region_folder(tmp_path: Path) -> None:
+    src = tmp_path / "region"
+    shutil.copytree(f"{TEST_DIR}/1.15.2/input/region", src)
+    regions = sorted(src.iterdir())
+
+    for _ in range(2):
+        run = remove_tags(
+            absent, src, src, 1, "normal", "inplace", index=True
+        )
+        assert run.skipped == []
+    assert (tmp_path / INDEX_FILE).exists()
+    assert sorted(src.iterdir()) == regions
+
+    # Stray files in a region folder are never scheduled
+    (src / INDEX_FILE).write_text("{}")
+    (src / "r.0.0.mca.bak").write_bytes(regions[0].read_bytes())
+    run = remove_tags(absent, src, src, 1, "normal", "inplace")
+    assert run.skipped == []
+    assert run.total == len(regions)
+
+
+@pytest.mark.parametrize("mode", [{}, {"split": True}, {"prefetch": 2}])
+def test_sources_only_hashed_for_index(tmp_path: Path, mode: dict) -> None:
+    src = Path(f"{TEST_DIR}/1.15.2/input/region")
+    for index in (False, True):
+        dst = tmp_path / str(index)
+        dst.mkdir()
+        run = remove_tags(absent, src, dst, 2, "normal", index=index, **mode)
+        digests = [result.digest is not None for result in run.regions]
+        assert digests == [index] * len(run.regions)
@@ -0,0 +1,62 @@
+"""
+MC Structure Cleaner
+Tests the read-only structure tag inventory
+"""
+
+import csv
+import json
+import shutil
+from pathlib import Path
+from multiprocessing import cpu_count
+from structurecleaner.region import RegionWriter
+from structurecleaner.scan_tags import scan_tags, write_report
+from tests.abstract_test import TEST_DIR, to_file_set
+
+test_data_path = Path(f"{TEST_DIR}/tags_region/input")
+
+
+def test_scan_tags(tmp_path: Path, capsys) -> None:
+    before = {file: file.read_bytes() for file in to_file_set(test_data_path)}
+    calls = []
+    report = scan_tags(
+        test_data_path,
+        cpu_count() // 2,
+        lambda run, result: calls.append((run.done, run.total, result)),
+    )
+    assert capsys.readouterr().out == ""
+    assert [call[:2] for call in calls] == [(0, 1), (1, 1)]
+    assert calls[0][2] is None and calls[1][2].count > 0
+
+    entry = report["repurposed_structures:mineshaft_icy"]
+    assert entry["modded"]
+    assert entry["starts"] + entry["references"] > 0
+    assert entry["regions"] == [str(test_data_path / "r.0.0.mca")]
+    assert not report["Mineshaft"]["modded"]
+
+    # Nothing is written
+    assert {f: f.read_bytes() for f in to_file_set(test_data_path)} == before
+
+    write_report(report, tmp_path / "report.json")
+    with open(tmp_path / "report.json") as file:
+        assert json.load(file) == report
+
+    write_report(report, tmp_path / "report.csv")
+    with open(tmp_path / "report.csv", newline="") as file:
+        rows = list(csv.DictReader(file))
+    assert [row["tag"] for row in rows] == list(report)
+
+
+def test_corrupt_region_is_skipped(tmp_path: Path) -> None:
+    shutil.copy(test_data_path / "r.0.0.mca", tmp_path)
+    writer = RegionWriter()
+    writer.set_chunk(0, 0, b"\x00\x00\x00\x05\x02junk", 0)
+    writer.save(tmp_path / "r.1.0.mca")
+
+    results = []
+    report = scan_tags(tmp_path, 1, lambda _, result: results.append(result))
+    skipped = [result for result in results[1:] if result.skipped]
+    assert [result.src for result in skipped] == [tmp_path / "r.1.0.mca"]
+    assert "Invalid chunk payload" in skipped[0].error
+    assert report["repurposed_structures:mineshaft_icy"]["regions"] == [
+        str(tmp_path / "r.0.0.mca")
+    ]
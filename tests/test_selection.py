@@ -0,0 +1,89 @@
+"""
+MC Structure Cleaner
+Tests restricting a run to an area of the world
+"""
+
+from pathlib import Path
+from structurecleaner.region import RegionReader
+from structurecleaner.remove_tags import remove_tags
+from structurecleaner.selection import (
+    BoxSelection,
+    RadiusSelection,
+    make_selection,
+)
+from tests.abstract_test import TEST_DIR
+
+test_folder = Path(f"{TEST_DIR}/tags_region/input")
+tags = {"repurposed_structures:mineshaft_icy"}
+
+
+def test_box() -> None:
+    box = BoxSelection(20, 40, -20, 0)
+    assert box.contains_chunk(0, 0)
+    assert box.contains_chunk(-2, 2)
+    assert not box.contains_chunk(-3, 0)
+    assert not box.contains_chunk(0, 3)
+    assert box.contains_region(-1, 0)
+    assert not box.contains_region(0, -1)
+
+
+def test_radius() -> None:
+    radius = RadiusSelection(0, 0, 100)
+    assert radius.contains_chunk(6, 0)
+    assert not radius.contains_chunk(7, 0)
+    # The closest block of chunk (5, 5) is 80 blocks away on each axis
+    assert not radius.contains_chunk(5, 5)
+    assert radius.contains_chunk(4, 4)
+    assert radius.contains_region(-1, -1)
+    assert not radius.contains_region(1, 0)
+
+
+def test_units() -> None:
+    chunks = make_selection(box=[0, 0, 1, 1], unit="chunk")
+    assert (chunks.min_x, chunks.min_z, chunks.max_x, chunks.max_z) == (
+        0,
+        0,
+        31,
+        31,
+    )
+
+    regions = make_selection(radius=[0, 0, 1], unit="region")
+    assert (regions.x, regions.z, regions.radius) == (256, 256, 512)
+    assert make_selection() is None
+
+
+def test_files() -> None:
+    box = BoxSelection(0, 0, 511, 511)
+    assert box.contains_file(Path("r.0.0.mca"))
+    assert not box.contains_file(Path("r.1.0.mca"))
+    assert not box.contains_file(Path("c.0.0.mcc"))
+    assert not box.contains_file(Path("level.dat"))
+
+
+def test_chunks_outside_are_copied(tmp_path: Path) -> None:
+    src = test_folder / "r.0.0.mca"
+    selected, everything = tmp_path / "selected", tmp_path / "everything"
+    selected.mkdir()
+    everything.mkdir()
+
+    # Only chunk (0, 0)
+    selection = make_selection(box=[0, 0, 0, 0], unit="chunk")
+    remove_tags(tags, test_folder, selected, 1, "normal", selection=selection)
+    remove_tags(tags, test_folder, everything, 1, "normal")
+
+    with RegionReader.from_file(src) as source, RegionReader.from_file(
+        selected / src.name
+    ) as region, RegionReader.from_file(everything / src.name) as cleaned:
+        assert region.raw_chunk(0, 1) == source.raw_chunk(0, 1)
+        assert region.raw_chunk(0, 0) == cleaned.raw_chunk(0, 0)
+
+
+def test_regions_outside_are_kept(tmp_path: Path) -> None:
+    selection = make_selection(box=[1, 1, 2, 2], unit="region")
+    run = remove_tags(
+        tags, test_folder, tmp_path, 1, "normal", selection=selection
+    )
+    assert run.regions == []
+    assert sorted(run.outside) == sorted(test_folder.glob("r.*.mca"))
+    for src in run.outside:
+        assert (tmp_path / src.name).read_bytes() == src.read_bytes()
@@ -0,0 +1,179 @@
+"""
+MC Structure Cleaner
+Tests runs split into shards and merging their results
+"""
+
+import json
+import shutil
+import subprocess
+import sys
+import pytest
+from pathlib import Path
+from structurecleaner.errors import ShardError
+from structurecleaner.remove_tags import remove_tags
+from structurecleaner.shards import (
+    Shard,
+    merge_shard_results,
+    parse_shard,
+    select_shard,
+    shard_result,
+)
+from tests.abstract_test import TEST_DIR, assert_region_matches
+
+test_file = Path(f"{TEST_DIR}/tags_region/input/r.0.0.mca")
+expected_file = Path(f"{TEST_DIR}/tags_region/output_remove/r.0.0.mca")
+tags = {
+    "repurposed_structures:mineshaft_icy",
+    "repurposed_structures:mineshaft_end",
+}
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def make_world(folder: Path, sizes: list) -> list:
+    """Create fake region files of the given sizes"""
+    folder.mkdir(parents=True)
+    for x, size in enumerate(sizes):
+        (folder / f"r.{x}.0.mca").write_bytes(bytes(size))
+    return [(folder / f"r.{x}.0.mca", folder) for x in range(len(sizes))]
+
+
+def test_parse_shard() -> None:
+    assert parse_shard("2/4") == Shard(2, 4)
+    assert str(Shard(2, 4)) == "2/4"
+    assert Shard(2, 4).result_name == "shard-2-of-4.json"
+    assert Shard(2, 4).file_name(".index.json") == ".index-2-of-4.json"
+    for spec in ("0/4", "5/4", "2", "a/b"):
+        with pytest.raises(ValueError):
+            parse_shard(spec)
+
+
+def test_shards_are_balanced(tmp_path: Path) -> None:
+    regions = make_world(tmp_path / "region", [90, 50, 40, 30, 20, 10])
+    folders = [(tmp_path / "region", tmp_path)]
+
+    shards = [
+        select_shard(regions, folders, Shard(index, 3))
+        for index in range(1, 4)
+    ]
+    assert sorted(task for shard in shards for task in shard) == regions
+    loads = [sum(src.stat().st_size for src, _ in shard) for shard in shards]
+    assert loads == [90, 80, 70]
+
+
+def test_shards_dont_depend_on_paths(tmp_path: Path) -> None:
+    # The same world, mounted in different places on two machines
+    first = tmp_path / "a" / "region"
+    second = tmp_path / "mnt" / "world" / "region"
+    first_regions = make_world(first, [10] * 5)
+    second_regions = make_world(second, [10] * 5)
+
+    for shard in (Shard(1, 2), Shard(2, 2)):
+        names = [
+            [src.name for src, _ in select_shard(regions, folders, shard)]
+            for regions, folders in (
+                (first_regions, [(first, tmp_path)]),
+                (second_regions, [(second, tmp_path)]),
+            )
+        ]
+        assert names[0] == names[1]
+
+
+def test_shards_follow_the_manifest(tmp_path: Path) -> None:
+    regions = make_world(tmp_path / "region", [90, 50, 40, 30, 20, 10])
+    folders = [(tmp_path / "region", tmp_path)]
+    manifest = tmp_path / Shard(1, 3).manifest_name
+    expected = [
+        select_shard(regions, folders, Shard(index, 3))
+        for index in range(1, 4)
+    ]
+
+    assert select_shard(regions, folders, Shard(1, 3), manifest) == (
+        expected[0]
+    )
+    assert manifest.exists()
+
+    # The first shard cleans its regions in place, then a region is added
+    for src, _ in expected[0]:
+        src.write_bytes(bytes(5))
+    new = make_world(tmp_path / "new", [1])
+    regions, folders = regions + new, folders + [(tmp_path / "new", tmp_path)]
+
+    shards = [
+        select_shard(regions, folders, Shard(index, 3), manifest)
+        for index in range(1, 4)
+    ]
+    old = [[task for task in shard if task not in new] for shard in shards]
+    assert old == expected
+    assert sum(shard.count(new[0]) for shard in shards) == 1
+
+
+def test_merge_shard_results(tmp_path: Path) -> None:
+    src = tmp_path / "src"
+    src.mkdir()
+    for x in range(3):
+        shutil.copy(test_file, src / f"r.{x}.0.mca")
+
+    results = []
+    for index in (1, 2):
+        shard = Shard(index, 3)
+        dst = tmp_path / f"dst{index}"
+        dst.mkdir()
+        run = remove_tags(tags, src, dst, 1, "normal", shard=shard)
+        results.append(shard_result(run, shard))
+
+    merged = merge_shard_results(results)
+    assert merged["shards"] == 3
+    assert merged["missing"] == [3]
+    assert merged["total"] == 2
+    assert merged["count"] == sum(result["count"] for result in results)
+    assert merged["tags"] == {name: 2 for name in results[0]["tags"]}
+    assert set(merged["tags"]) <= tags
+    assert set(merged["shard_seconds"]) == {"1/3", "2/3"}
+
+    with pytest.raises(ShardError):
+        merge_shard_results(results + results[:1])
+    with pytest.raises(ShardError):
+        merge_shard_results(results + [{**results[0], "shard": "1/2"}])
+
+
+def test_shards_in_separate_processes(tmp_path: Path) -> None:
+    world = tmp_path / "world"
+    (world / "region").mkdir(parents=True)
+    for x in range(5):
+        shutil.copy(test_file, world / "region" / f"r.{x}.0.mca")
+    output = tmp_path / "output"
+    output.mkdir()
+
+    # Every process stands in for a machine
+    command = [sys.executable, str(ROOT / "main.py"), "-p", str(world)]
+    command += ["-o", str(output), "-t", *tags, "-j", "1"]
+    nodes = [
+        subprocess.Popen(
+            command + ["--shard", f"{index}/3"],
+            cwd=ROOT,
+            stdout=subprocess.DEVNULL,
+        )
+        for index in range(1, 4)
+    ]
+    assert [node.wait(timeout=300) for node in nodes] == [0, 0, 0]
+
+    new_region = output / "new_region"
+    assert sorted(path.name for path in new_region.glob("*.mca")) == [
+        f"r.{x}.0.mca" for x in range(5)
+    ]
+    for path in new_region.glob("*.mca"):
+        assert_region_matches(path, expected_file)
+
+    results = [output / f"shard-{index}-of-3.json" for index in range(1, 4)]
+    subprocess.run(
+        [sys.executable, str(ROOT / "main.py"), "-o", str(output)]
+        + ["--merge", *map(str, results)],
+        cwd=ROOT,
+        stdout=subprocess.DEVNULL,
+        check=True,
+    )
+    merged = json.loads((output / "shards.json").read_text())
+    assert merged["missing"] == []
+    assert merged["total"] == 5
+    assert merged["tags"] and set(merged["tags"]) <= tags
+    assert set(merged["tags"].values()) == {5}
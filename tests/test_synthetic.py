@@ -0,0 +1,59 @@
+"""
+MC Structure Cleaner
+Tests that generated benchmark worlds are cleaned like real ones
+"""
+
+from pathlib import Path
+from benchmarks.synthetic import (
+    MODDED_PREFIX,
+    NEW_LAYOUT,
+    OLD_LAYOUT,
+    generate_world,
+)
+from structurecleaner.nbt_scan import scan_chunk
+from structurecleaner.region import RegionReader, decompress_chunk
+from structurecleaner.remove_tags import remove_tags
+
+
+def structure_names(path: Path) -> list:
+    names = []
+    with RegionReader.from_file(path) as region:
+        for chunk_x, chunk_z in region.existing_chunks():
+            raw = region.raw_chunk(chunk_x, chunk_z)
+            scan = scan_chunk(decompress_chunk(raw))
+            names.extend(scan.starts + scan.references)
+    return names
+
+
+def clean_generated(layout: str, tmp_path: Path) -> None:
+    src, dst = tmp_path / "region", tmp_path / "output"
+    dst.mkdir()
+    paths = generate_world(src, 2, layout, density=0.5, chunks=32)
+    assert [p.name for p in paths] == ["r.0.0.mca", "r.0.1.mca"]
+
+    names = structure_names(paths[0])
+    assert any(name.startswith(MODDED_PREFIX) for name in names)
+
+    remove_tags({f"{MODDED_PREFIX}*"}, src, dst, 1, "list")
+
+    for path in paths:
+        names = structure_names(dst / path.name)
+        assert names, "Vanilla structures were removed"
+        assert not any(name.startswith(MODDED_PREFIX) for name in names)
+
+
+def test_clean_old_layout(tmp_path: Path) -> None:
+    clean_generated(OLD_LAYOUT, tmp_path)
+
+
+def test_clean_new_layout(tmp_path: Path) -> None:
+    clean_generated(NEW_LAYOUT, tmp_path)
+
+
+def test_generation_is_seeded(tmp_path: Path) -> None:
+    first = generate_world(tmp_path / "a", 1, NEW_LAYOUT, 0.2, chunks=8)
+    second = generate_world(tmp_path / "b", 1, NEW_LAYOUT, 0.2, chunks=8)
+    with RegionReader.from_file(first[0]) as a, RegionReader.from_file(
+        second[0]
+    ) as b:
+        assert a.raw_chunk(3, 0) == b.raw_chunk(3, 0)
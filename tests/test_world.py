@@ -0,0 +1,59 @@
+"""
+MC Structure Cleaner
+Tests world layout discovery and whole world cleaning
+"""
+
+from pathlib import Path
+from multiprocessing import cpu_count
+from structurecleaner.constants import VANILLA_STRUCTURES as VS
+from structurecleaner.remove_tags import remove_tags_world
+from structurecleaner.world import (
+    chunk_folders,
+    chunk_kind,
+    find_dimensions,
+    sibling_folder,
+)
+from tests.abstract_test import TEST_DIR, assert_region_matches
+
+
+def test_find_dimensions(tmp_path: Path) -> None:
+    for folder in ("region", "DIM-1/region", "dimensions/mod/sky/region"):
+        (tmp_path / folder).mkdir(parents=True)
+    (tmp_path / "dimensions/mod/empty").mkdir(parents=True)
+
+    assert find_dimensions(tmp_path) == [
+        Path("DIM-1/region"),
+        Path("region"),
+        Path("dimensions/mod/sky/region"),
+    ]
+
+
+def test_sibling_folders(tmp_path: Path) -> None:
+    assert sibling_folder(Path("w/region"), "poi") == Path("w/poi")
+    assert sibling_folder(Path("out/new_regionDIM1"), "entities") == Path(
+        "out/new_entitiesDIM1"
+    )
+    assert sibling_folder(Path("out/clean"), "poi") == Path("out/clean_poi")
+
+    (tmp_path / "world/region").mkdir(parents=True)
+    (tmp_path / "world/entities").mkdir()
+    folders = [(tmp_path / "world/region", tmp_path / "new_region")]
+    assert chunk_folders(folders) == folders + [
+        (tmp_path / "world/entities", tmp_path / "new_entities")
+    ]
+    assert (tmp_path / "new_entities").is_dir()
+    assert not (tmp_path / "new_poi").exists()
+
+    assert chunk_kind(tmp_path / "world/entities/r.0.0.mca") == "entities"
+    assert chunk_kind(tmp_path / "world/region/r.0.0.mca") == "region"
+
+
+def test_remove_tags_world(tmp_path: Path) -> None:
+    world = Path(f"{TEST_DIR}/1.15.2/input")
+    target = Path(f"{TEST_DIR}/1.15.2/expected_purge")
+
+    remove_tags_world(VS, world, tmp_path, cpu_count() // 2, "purge")
+
+    for dimension in find_dimensions(world):
+        for file in (target / dimension).iterdir():
+            assert_region_matches(tmp_path / dimension / file.name, file)